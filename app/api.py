@@ -1,129 +1,266 @@
 """ Маршруты для FastAPI """
-import json
-from typing import Any
-
-from fastapi import APIRouter, HTTPException, status
-
-from app.schemas import NewsItem, PublishedNews, Keywords, Source
-from app.news_parser import collect_from_all_sources
+from datetime import date, datetime, timedelta
+from typing import Any, Callable, Literal
+from uuid import uuid4
+
+from fastapi import APIRouter, HTTPException, Path, Query, Request, Response, status
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel
+
+from app.bulk import (
+    CSV_MEDIA_TYPE,
+    NDJSON_MEDIA_TYPE,
+    BulkImportRejected,
+    bulk_import,
+    detect_format,
+    export_items,
+    keyword_dedupe_key,
+    source_dedupe_key,
+)
+from app.circuit_breaker import breaker_states
+from app.config import settings
+from app.lists import load_list, next_id, save_list
+from app.locks import LockBusy
+from app.schemas import Channel, NewsItem, PublishedNews, PublishStats, Keywords, Source
+from app.news_parser import SOURCES_KEY, collect_from_all_sources_coalesced
+from app.news_store import query_news
+from app.search import search_news
+from app.stats import get_stats
 from app.redis_client import ping_redis, get_redis_client
-from app.tasks import PUBLISHED_POSTS_KEY
+from app.responses import json_response, versioned_json_response
+from app.routing import CHANNELS_KEY
+from app.keys import KEYWORDS_KEY, PUBLISHED_POSTS_KEY, PUBLISH_TRIGGER_KEY
+from app.utils import prepare_keywords
 
 
 api_router = APIRouter()
 
-# Redis keys для CRUD
-SOURCES_KEY = "sources:list"
-KEYWORDS_KEY = "keywords:list"
 
-
-"""Загрузить список объектов из Redis по ключу"""
-def _load_list(key: str) -> list[dict[str, Any]]:
-    client = get_redis_client()
-    raw = client.get(key)
-    if not raw:
-        return []
+"""Прочитать тело запроса не больше limit байт: заявленный Content-Length проверяется до чтения,
+а поток обрывается с 413, как только прочитано больше limit (в памяти не держится больше лимита)"""
+async def _read_body_limited(request: Request, limit: int) -> bytes:
+    content_length = request.headers.get("content-length", "")
+    if content_length.isdigit() and int(content_length) > limit:
+        raise HTTPException(status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE, detail="Payload too large")
+
+    chunks: list[bytes] = []
+    received = 0
+    async for chunk in request.stream():
+        received += len(chunk)
+        if received > limit:
+            raise HTTPException(status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE, detail="Payload too large")
+        chunks.append(chunk)
+    return b"".join(chunks)
+
+"""Массовый импорт: валидация за один проход и запись списка одной транзакцией"""
+async def _bulk_import(
+    key: str,
+    request: Request,
+    format: str | None,
+    mode: str,
+    dry_run: bool,
+    model: type[BaseModel],
+    dedupe_key: Callable[[Any], str],
+) -> dict[str, Any]:
+    body = await _read_body_limited(request, settings.bulk_import_max_bytes)
+    fmt = detect_format(format, request.headers.get("content-type"))
     try:
-        data = json.loads(raw)
-        if isinstance(data, list):
-            return [x for x in data if isinstance(x, dict)]
-    except json.JSONDecodeError:
-        return []
-    return []
-
-"""Сохранить список объектов в Redis"""
-def _save_list(key: str, items: list[dict[str, Any]]) -> None:
-    client = get_redis_client()
-    client.set(key, json.dumps(items, ensure_ascii=False))
-
-"""Сгенерировать следующий id для новой записи"""
-def _next_id(items: list[dict[str, Any]]) -> int:
-    max_id = 0
-    for it in items:
-        try:
-            max_id = max(max_id, int(it.get("id", 0)))
-        except (TypeError, ValueError):
-            continue
-    return max_id + 1
+        return await run_in_threadpool(bulk_import, key, body, fmt, model, dedupe_key, mode, dry_run)
+    except UnicodeDecodeError:
+        raise HTTPException(status_code=status.HTTP_422_UNPROCESSABLE_ENTITY, detail="Body must be UTF-8")
+    except BulkImportRejected as exc:
+        # replace не записывает ничего, если в загрузке есть ошибки или она пустая
+        raise HTTPException(status_code=status.HTTP_422_UNPROCESSABLE_ENTITY, detail=exc.report)
+    except RuntimeError as exc:
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=str(exc))
+
+"""Массовый экспорт в NDJSON/CSV"""
+def _bulk_export(items: list[BaseModel], format: str, fields: list[str], name: str) -> Response:
+    media_type = CSV_MEDIA_TYPE if format == "csv" else NDJSON_MEDIA_TYPE
+    return Response(
+        content=export_items(items, format, fields),
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="{name}.{format}"'},
+    )
 
 
 @api_router.get("/health")
 async def health():
     """Проверка состояния сервиса."""
     redis_ok = ping_redis()
-    return {
+    result = {
         "status": "ok",
         "redis": redis_ok,
+        "breakers": breaker_states() if redis_ok else {},
     }
+    if redis_ok:
+        from app.task_metrics import queue_latency_stats
+
+        result["task_queues"] = queue_latency_stats()
+    if redis_ok and settings.continuous_publish_enabled:
+        from app.publish_queue import queue_stats
+
+        result["publish_queue"] = queue_stats()
+    return result
 
 
 @api_router.get("/news", response_model=list[NewsItem])
-async def news_list() -> list[NewsItem]:
-    fake_news = [
-        NewsItem(
-            id="test1",
-            title="FASTAPI 2.0.1 is released",
-            url="https://fastapi.com/",
-            summary="Краткое описание новости o FastAPI",
-            source="FastAPI blog",
-            published_at="2025-01-01T00:00:00Z",
-            keywords=["python", "fastapi"]
-        ),
-        NewsItem(
-            id="test2",
-            title="Python 3.15.1 is released",
-            url="https://python.org/",
-            summary="Краткое описание новости o Python",
-            source="Python blog",
-            published_at="2025-01-02T00:00:00Z",
-            keywords=["python"]
-        )
-    ]
-    return fake_news
+async def news_list(
+    source: str | None = Query(default=None, description="Фильтр по источнику"),
+    keyword: str | None = Query(default=None, description="Фильтр по ключевому слову"),
+    offset: int = Query(default=0, ge=0),
+    limit: int = Query(default=20, ge=1, le=100),
+) -> list[NewsItem]:
+    """Последние собранные новости (новые сверху) из хранилища Redis."""
+    return query_news(source=source, keyword=keyword, offset=offset, limit=limit)
+
+
+@api_router.get("/news/search", response_model=list[NewsItem])
+async def news_search(
+    q: str = Query(..., min_length=1, max_length=200, description="Поисковый запрос"),
+    offset: int = Query(default=0, ge=0),
+    limit: int = Query(default=20, ge=1, le=100),
+) -> list[NewsItem]:
+    """Полнотекстовый поиск по собранным новостям (заголовок, описание, текст), по убыванию релевантности."""
+    return search_news(q, offset=offset, limit=limit)
 
 
 @api_router.get("/news/scrape", response_model=list[NewsItem])
-async def scrape_news() -> list[NewsItem]:
-    """Ручной запуск парсинга(без публикации)"""
-    return collect_from_all_sources()
+def scrape_news(request: Request):
+    """Ручной запуск парсинга(без публикации).
+    Если сбор уже идёт, возвращается его результат; если дождаться не удалось — статус coalesced.
+    Telegram-каналы не читаются: их сообщения забирает только сбор, который сохраняет новости.
+    """
+    try:
+        batch, _ = collect_from_all_sources_coalesced(include_tg=False)
+        return json_response(request, batch.to_items(), list[NewsItem])
+    except LockBusy:
+        return JSONResponse(
+            status_code=status.HTTP_202_ACCEPTED,
+            content={"status": "coalesced", "detail": "Сбор новостей уже выполняется"},
+        )
+
+
+@api_router.get("/claims/{claim_id}", response_model=list[NewsItem])
+async def get_claim(request: Request, claim_id: str = Path(..., pattern=r"^[0-9a-f]{32}$")):
+    """Пачка новостей по ссылке claim-check из результата задачи сбора."""
+    from app.claim_check import ClaimNotFound, load_news_batch
+
+    try:
+        items = load_news_batch(claim_id)
+    except ClaimNotFound:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Claim not found or expired")
+    # Содержимое пачки неизменно (ключ — хеш содержимого), поэтому claim_id годится как ETag
+    return json_response(request, items, list[NewsItem], etag=f'"{claim_id}"')
 
 
 @api_router.post("/publish")
 async def publish_now():
-    """Ручной запуск задачи публикации новостей в Telegram"""
+    """Ручной запуск задачи публикации новостей в Telegram.
+    Если ручная публикация уже запущена, новая задача не создаётся.
+    """
     from app.tasks import publish_news
 
-    publish_news.delay()
-    return {"status": "publish task started"}
+    client = get_redis_client()
+    task_id = str(uuid4())
+    if not client.set(PUBLISH_TRIGGER_KEY, task_id, nx=True, ex=settings.publish_lock_ttl):
+        return {"status": "coalesced", "task_id": client.get(PUBLISH_TRIGGER_KEY)}
+
+    # Отдельная очередь: ручной запуск не ждёт плановых задач и догоняющего сбора
+    publish_news.apply_async(task_id=task_id, queue=settings.celery_interactive_queue)
+    return {"status": "publish task started", "task_id": task_id}
+
+
+@api_router.post("/news/backfill", status_code=status.HTTP_202_ACCEPTED)
+async def backfill_news(
+    source: str = Query(default="habr", description="Источник с постраничной лентой"),
+    max_pages: int | None = Query(default=None, ge=2, le=100, description="Последняя страница ленты"),
+):
+    """Запуск догоняющего сбора после простоя: страницы 2..max_pages источника параллельно."""
+    from app.news_parser.backfill import PAGINATED_SOURCES
+    from app.tasks import backfill_news as backfill_task
+
+    if source not in PAGINATED_SOURCES:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail=f"Source {source!r} has no paginated listing",
+        )
 
+    task = backfill_task.delay(source, max_pages)
+    return {"status": "backfill task started", "task_id": task.id}
 
-@api_router.get("/posts", response_model=list[PublishedNews])
-async def get_posts():
-    """История публикаций (последние сверху)."""
+
+def _load_posts() -> list[PublishedNews]:
     client = get_redis_client()
     raw_items = client.lrange(PUBLISHED_POSTS_KEY, 0, -1)[::-1]
 
     posts: list[PublishedNews] = []
     for raw in raw_items:
         try:
-            data = json.loads(raw)
-            posts.append(PublishedNews(**data))
-        except (json.JSONDecodeError, TypeError, ValueError):
+            posts.append(PublishedNews.model_validate_json(raw))
+        except ValueError:
             continue
 
     return posts
 
 
+@api_router.get("/posts", response_model=list[PublishedNews])
+async def get_posts(request: Request):
+    """История публикаций (последние сверху)."""
+    return versioned_json_response(request, PUBLISHED_POSTS_KEY, _load_posts, list[PublishedNews])
+
+
+@api_router.get("/stats", response_model=PublishStats)
+async def publish_stats(
+    request: Request,
+    since: date | None = Query(default=None, description="Первый день (UTC), по умолчанию за 7 дней до until"),
+    until: date | None = Query(default=None, description="Последний день включительно (UTC), по умолчанию сегодня"),
+):
+    """Статистика публикаций по дням, источникам, ключевым словам и каналам.
+    Счётчики ведутся при публикации, поэтому ответ не зависит от длины истории.
+    """
+    until = until or datetime.utcnow().date()
+    since = since or until - timedelta(days=6)
+    if since > until:
+        raise HTTPException(status_code=status.HTTP_422_UNPROCESSABLE_ENTITY, detail="since must not be after until")
+    if (until - since).days >= settings.stats_max_days:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail=f"Range is limited to {settings.stats_max_days} days",
+        )
+    return json_response(request, PublishStats(**get_stats(since, until)), PublishStats)
+
+
 """CRUD: /api/sources/"""
 @api_router.get("/api/sources/", response_model=list[Source])
-async def list_sources() -> list[Source]:
-    items = _load_list(SOURCES_KEY)
-    return [Source(**x) for x in items]
+async def list_sources(request: Request):
+    return versioned_json_response(
+        request, SOURCES_KEY, lambda: [Source(**x) for x in load_list(SOURCES_KEY)], list[Source]
+    )
+
+
+@api_router.post("/api/sources/import")
+async def import_sources(
+    request: Request,
+    format: Literal["ndjson", "csv"] | None = Query(default=None, description="Формат тела (по умолчанию — по Content-Type)"),
+    mode: Literal["append", "replace"] = Query(default="append"),
+    dry_run: bool = Query(default=False, description="Только проверить, ничего не записывая"),
+):
+    """Массовый импорт источников из NDJSON или CSV (тело запроса). id назначаются сервером."""
+    return await _bulk_import(SOURCES_KEY, request, format, mode, dry_run, Source, source_dedupe_key)
+
+
+@api_router.get("/api/sources/export")
+async def export_sources(format: Literal["ndjson", "csv"] = Query(default="ndjson")):
+    """Выгрузка источников в NDJSON или CSV."""
+    items = [Source(**x) for x in load_list(SOURCES_KEY)]
+    return _bulk_export(items, format, ["id", "type", "name", "url", "enabled"], "sources")
 
 
 @api_router.get("/api/sources/{source_id}", response_model=Source)
 async def get_source(source_id: int) -> Source:
-    items = _load_list(SOURCES_KEY)
+    items = load_list(SOURCES_KEY)
     for x in items:
         if int(x.get("id", 0)) == source_id:
             return Source(**x)
@@ -132,28 +269,28 @@ async def get_source(source_id: int) -> Source:
 
 @api_router.post("/api/sources/", response_model=Source, status_code=status.HTTP_201_CREATED)
 async def create_source(payload: Source) -> Source:
-    items = _load_list(SOURCES_KEY)
+    items = load_list(SOURCES_KEY)
 
     # назначаем id автоматически
-    new_id = _next_id(items)
+    new_id = next_id(items)
     data = payload.model_dump()
     data["id"] = new_id
 
     items.append(data)
-    _save_list(SOURCES_KEY, items)
+    save_list(SOURCES_KEY, items)
     return Source(**data)
 
 
 @api_router.put("/api/sources/{source_id}", response_model=Source)
 async def update_source(source_id: int, payload: Source) -> Source:
-    items = _load_list(SOURCES_KEY)
+    items = load_list(SOURCES_KEY)
 
     for i, x in enumerate(items):
         if int(x.get("id", 0)) == source_id:
             data = payload.model_dump()
             data["id"] = source_id
             items[i] = data
-            _save_list(SOURCES_KEY, items)
+            save_list(SOURCES_KEY, items)
             return Source(**data)
 
     raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Source not found")
@@ -161,24 +298,43 @@ async def update_source(source_id: int, payload: Source) -> Source:
 
 @api_router.delete("/api/sources/{source_id}", status_code=status.HTTP_204_NO_CONTENT)
 async def delete_source(source_id: int):
-    items = _load_list(SOURCES_KEY)
+    items = load_list(SOURCES_KEY)
     new_items = [x for x in items if int(x.get("id", 0)) != source_id]
     if len(new_items) == len(items):
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Source not found")
-    _save_list(SOURCES_KEY, new_items)
+    save_list(SOURCES_KEY, new_items)
     return None
 
 
 """CRUD: /api/keywords/"""
 @api_router.get("/api/keywords/", response_model=list[Keywords])
-async def list_keywords() -> list[Keywords]:
-    items = _load_list(KEYWORDS_KEY)
-    return [Keywords(**x) for x in items]
+async def list_keywords(request: Request):
+    return versioned_json_response(
+        request, KEYWORDS_KEY, lambda: [Keywords(**x) for x in load_list(KEYWORDS_KEY)], list[Keywords]
+    )
+
+
+@api_router.post("/api/keywords/import")
+async def import_keywords(
+    request: Request,
+    format: Literal["ndjson", "csv"] | None = Query(default=None, description="Формат тела (по умолчанию — по Content-Type)"),
+    mode: Literal["append", "replace"] = Query(default="append"),
+    dry_run: bool = Query(default=False, description="Только проверить, ничего не записывая"),
+):
+    """Массовый импорт ключевых слов из NDJSON или CSV (тело запроса). id назначаются сервером."""
+    return await _bulk_import(KEYWORDS_KEY, request, format, mode, dry_run, Keywords, keyword_dedupe_key)
+
+
+@api_router.get("/api/keywords/export")
+async def export_keywords(format: Literal["ndjson", "csv"] = Query(default="ndjson")):
+    """Выгрузка ключевых слов в NDJSON или CSV."""
+    items = [Keywords(**x) for x in load_list(KEYWORDS_KEY)]
+    return _bulk_export(items, format, ["id", "word", "weight"], "keywords")
 
 
 @api_router.get("/api/keywords/{keyword_id}", response_model=Keywords)
 async def get_keyword(keyword_id: int) -> Keywords:
-    items = _load_list(KEYWORDS_KEY)
+    items = load_list(KEYWORDS_KEY)
     for x in items:
         if int(x.get("id", 0)) == keyword_id:
             return Keywords(**x)
@@ -187,7 +343,7 @@ async def get_keyword(keyword_id: int) -> Keywords:
 
 @api_router.post("/api/keywords/", response_model=Keywords, status_code=status.HTTP_201_CREATED)
 async def create_keyword(payload: Keywords) -> Keywords:
-    items = _load_list(KEYWORDS_KEY)
+    items = load_list(KEYWORDS_KEY)
 
     # защита от дублей по word
     word = (payload.word or "").strip()
@@ -198,19 +354,19 @@ async def create_keyword(payload: Keywords) -> Keywords:
         if str(x.get("word", "")).strip().lower() == word.lower():
             raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="Keyword already exists")
 
-    new_id = _next_id(items)
+    new_id = next_id(items)
     data = payload.model_dump()
     data["id"] = new_id
     data["word"] = word
 
     items.append(data)
-    _save_list(KEYWORDS_KEY, items)
+    save_list(KEYWORDS_KEY, items)
     return Keywords(**data)
 
 
 @api_router.put("/api/keywords/{keyword_id}", response_model=Keywords)
 async def update_keyword(keyword_id: int, payload: Keywords) -> Keywords:
-    items = _load_list(KEYWORDS_KEY)
+    items = load_list(KEYWORDS_KEY)
 
     word = (payload.word or "").strip()
     if not word:
@@ -227,7 +383,7 @@ async def update_keyword(keyword_id: int, payload: Keywords) -> Keywords:
             data["id"] = keyword_id
             data["word"] = word
             items[i] = data
-            _save_list(KEYWORDS_KEY, items)
+            save_list(KEYWORDS_KEY, items)
             return Keywords(**data)
 
     raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Keyword not found")
@@ -235,9 +391,75 @@ async def update_keyword(keyword_id: int, payload: Keywords) -> Keywords:
 
 @api_router.delete("/api/keywords/{keyword_id}", status_code=status.HTTP_204_NO_CONTENT)
 async def delete_keyword(keyword_id: int):
-    items = _load_list(KEYWORDS_KEY)
+    items = load_list(KEYWORDS_KEY)
     new_items = [x for x in items if int(x.get("id", 0)) != keyword_id]
     if len(new_items) == len(items):
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Keyword not found")
-    _save_list(KEYWORDS_KEY, new_items)
-    return None
\ No newline at end of file
+    save_list(KEYWORDS_KEY, new_items)
+    return None
+
+
+"""CRUD: /api/channels/"""
+@api_router.get("/api/channels/", response_model=list[Channel])
+async def list_channels(request: Request):
+    return versioned_json_response(
+        request, CHANNELS_KEY, lambda: [Channel(**x) for x in load_list(CHANNELS_KEY)], list[Channel]
+    )
+
+
+@api_router.get("/api/channels/{channel_pk}", response_model=Channel)
+async def get_channel(channel_pk: int) -> Channel:
+    items = load_list(CHANNELS_KEY)
+    for x in items:
+        if int(x.get("id", 0)) == channel_pk:
+            return Channel(**x)
+    raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Channel not found")
+
+
+@api_router.post("/api/channels/", response_model=Channel, status_code=status.HTTP_201_CREATED)
+async def create_channel(payload: Channel) -> Channel:
+    items = load_list(CHANNELS_KEY)
+
+    # один Telegram-канал — одна подписка
+    for x in items:
+        if str(x.get("channel_id", "")) == payload.channel_id:
+            raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="Channel already exists")
+
+    new_id = next_id(items)
+    data = payload.model_dump()
+    data["id"] = new_id
+    data["keywords"] = prepare_keywords(payload.keywords)
+
+    items.append(data)
+    save_list(CHANNELS_KEY, items)
+    return Channel(**data)
+
+
+@api_router.put("/api/channels/{channel_pk}", response_model=Channel)
+async def update_channel(channel_pk: int, payload: Channel) -> Channel:
+    items = load_list(CHANNELS_KEY)
+
+    for x in items:
+        if int(x.get("id", 0)) != channel_pk and str(x.get("channel_id", "")) == payload.channel_id:
+            raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="Channel already exists")
+
+    for i, x in enumerate(items):
+        if int(x.get("id", 0)) == channel_pk:
+            data = payload.model_dump()
+            data["id"] = channel_pk
+            data["keywords"] = prepare_keywords(payload.keywords)
+            items[i] = data
+            save_list(CHANNELS_KEY, items)
+            return Channel(**data)
+
+    raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Channel not found")
+
+
+@api_router.delete("/api/channels/{channel_pk}", status_code=status.HTTP_204_NO_CONTENT)
+async def delete_channel(channel_pk: int):
+    items = load_list(CHANNELS_KEY)
+    new_items = [x for x in items if int(x.get("id", 0)) != channel_pk]
+    if len(new_items) == len(items):
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Channel not found")
+    save_list(CHANNELS_KEY, new_items)
+    return None
@@ -0,0 +1,192 @@
+"""Компактная пачка новостей для конвейера сбора и публикации.
+NewsBatch хранит поля новостей параллельными списками (колонками), а не объектами NewsItem:
+разбор, сопоставление с ключевыми словами, дедупликация и маршрутизация работают с целой пачкой,
+имена источников интернируются (одна строка на источник), а списки совпавших слов разделяются
+между новостями. В NewsItem пачка превращается только на границах: ответы API, outbox, очередь публикаций.
+
+Отдельная новость пачки — NewsRow (именованный кортеж со ссылками на значения колонок, без копирования).
+У NewsRow те же атрибуты, что у NewsItem, поэтому хранилище, поиск, ранжирование и форматирование
+сообщений принимают и то и другое.
+"""
+from __future__ import annotations
+
+import json
+import sys
+from datetime import datetime
+from typing import Any, Iterable, Iterator, NamedTuple, overload
+
+from pydantic import AnyHttpUrl, TypeAdapter, ValidationError
+
+from app.schemas import NEWS_BATCH_ADAPTER, NewsItem
+
+_URLS_ADAPTER = TypeAdapter(list[AnyHttpUrl])
+
+# Колонки NewsBatch в порядке полей NewsRow / NewsItem
+NEWS_BATCH_COLUMNS = ("ids", "titles", "urls", "summaries", "sources", "published_at", "raw_texts", "keywords")
+
+
+class NewsRow(NamedTuple):
+    """Новость пачки; url — уже проверенная строка."""
+
+    id: str
+    title: str
+    url: str
+    summary: str | None
+    source: str
+    published_at: datetime | None
+    raw_text: str | None
+    keywords: list[str]
+
+    def to_record(self) -> dict[str, Any]:
+        """Словарь, пригодный для json.dumps и совместимый с NewsItem."""
+        return {
+            "id": self.id,
+            "title": self.title,
+            "url": self.url,
+            "summary": self.summary,
+            "source": self.source,
+            "published_at": self.published_at.isoformat() if self.published_at else None,
+            "raw_text": self.raw_text,
+            "keywords": list(self.keywords),
+        }
+
+    def to_item(self) -> NewsItem:
+        return NewsItem(**self.to_record())
+
+
+def validate_urls(urls: list[str]) -> tuple[list[str], set[int]]:
+    """Проверить колонку URL одним вызовом (как поле url у NewsItem).
+        Возвращает URL в нормализованном виде и номера некорректных.
+    """
+    try:
+        return [str(url) for url in _URLS_ADAPTER.validate_python(urls)], set()
+    except ValidationError as exc:
+        invalid = {error["loc"][0] for error in exc.errors() if error["loc"]}
+
+    # Редкий случай: повторная проверка только корректных URL
+    valid = [url for i, url in enumerate(urls) if i not in invalid]
+    normalized = iter(str(url) for url in _URLS_ADAPTER.validate_python(valid))
+    return [url if i in invalid else next(normalized) for i, url in enumerate(urls)], invalid
+
+
+def news_json(item: NewsItem | NewsRow) -> str:
+    """JSON одной новости (NewsItem или NewsRow) в формате NewsItem."""
+    if isinstance(item, NewsRow):
+        return json.dumps(item.to_record(), ensure_ascii=False)
+    return item.model_dump_json()
+
+
+class NewsBatch:
+    """Пачка новостей в колоночном виде."""
+
+    __slots__ = NEWS_BATCH_COLUMNS
+
+    def __init__(
+        self,
+        ids: list[str] | None = None,
+        titles: list[str] | None = None,
+        urls: list[str] | None = None,
+        summaries: list[str | None] | None = None,
+        sources: list[str] | None = None,
+        published_at: list[datetime | None] | None = None,
+        raw_texts: list[str | None] | None = None,
+        keywords: list[list[str]] | None = None,
+    ):
+        self.ids = ids if ids is not None else []
+        self.titles = titles if titles is not None else []
+        self.urls = urls if urls is not None else []
+        self.summaries = summaries if summaries is not None else []
+        self.sources = sources if sources is not None else []
+        self.published_at = published_at if published_at is not None else []
+        self.raw_texts = raw_texts if raw_texts is not None else []
+        self.keywords = keywords if keywords is not None else [[] for _ in self.ids]
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def __bool__(self) -> bool:
+        return bool(self.ids)
+
+    def __iter__(self) -> Iterator[NewsRow]:
+        return map(NewsRow._make, zip(*self._columns()))
+
+    @overload
+    def __getitem__(self, index: int) -> NewsRow: ...
+
+    @overload
+    def __getitem__(self, index: slice) -> NewsBatch: ...
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return self.take(range(len(self))[index])
+        return NewsRow(*(column[index] for column in self._columns()))
+
+    def __repr__(self) -> str:
+        return f"NewsBatch(len={len(self)})"
+
+    def _columns(self) -> tuple[list, ...]:
+        return tuple(getattr(self, name) for name in NEWS_BATCH_COLUMNS)
+
+    def append(
+        self,
+        id: str,
+        title: str,
+        url: str,
+        summary: str | None,
+        source: str,
+        published_at: datetime | None,
+        raw_text: str | None,
+        keywords: list[str] | None = None,
+    ) -> None:
+        self.ids.append(id)
+        self.titles.append(title)
+        self.urls.append(url)
+        self.summaries.append(summary)
+        self.sources.append(sys.intern(source))
+        self.published_at.append(published_at)
+        self.raw_texts.append(raw_text)
+        self.keywords.append(keywords or [])
+
+    def extend(self, other: NewsBatch) -> None:
+        for mine, theirs in zip(self._columns(), other._columns()):
+            mine.extend(theirs)
+
+    def take(self, indices: Iterable[int], keywords: list[list[str]] | None = None) -> NewsBatch:
+        """Новая пачка из новостей с номерами indices (значения не копируются).
+            keywords — заменить колонку совпавших слов (например, слова конкретного канала).
+        """
+        indices = list(indices)
+        columns = {name: [column[i] for i in indices] for name, column in zip(NEWS_BATCH_COLUMNS, self._columns())}
+        if keywords is not None:
+            columns["keywords"] = keywords
+        return NewsBatch(**columns)
+
+    def match(self, router) -> None:
+        """Заполнить колонку совпавших слов по объединению подписок ChannelRouter."""
+        self.keywords = [router.match_text(title, summary) for title, summary in zip(self.titles, self.summaries)]
+
+    def to_records(self) -> list[dict[str, Any]]:
+        return [row.to_record() for row in self]
+
+    def to_items(self) -> list[NewsItem]:
+        """Список NewsItem — для ответов API и других границ, где нужны модели."""
+        return NEWS_BATCH_ADAPTER.validate_python(self.to_records())
+
+    def dump_json(self) -> bytes:
+        """JSON в формате list[NewsItem] (читается NEWS_BATCH_ADAPTER.validate_json)."""
+        return json.dumps(self.to_records(), ensure_ascii=False).encode("utf-8")
+
+    def to_columns(self) -> dict[str, list]:
+        """Колоночное JSON-представление (для передачи между процессами и single-flight)."""
+        columns = {name: column for name, column in zip(NEWS_BATCH_COLUMNS, self._columns())}
+        columns["published_at"] = [x.isoformat() if x else None for x in self.published_at]
+        return columns
+
+    @classmethod
+    def from_columns(cls, data: dict[str, list]) -> NewsBatch:
+        columns = {name: list(data.get(name) or []) for name in NEWS_BATCH_COLUMNS}
+        columns["sources"] = [sys.intern(x) for x in columns["sources"]]
+        columns["published_at"] = [datetime.fromisoformat(x) if x else None for x in columns["published_at"]]
+        if not columns["keywords"]:
+            columns["keywords"] = [[] for _ in columns["ids"]]
+        return cls(**columns)
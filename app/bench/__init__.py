@@ -0,0 +1 @@
+"""Бенчмарки проекта (запускаются как модули: python -m app.bench.<name>)"""
@@ -0,0 +1,118 @@
+"""Бенчмарк времени импорта точек входа.
+Каждая точка входа импортируется в чистом интерпретаторе несколько раз, берётся медиана.
+Скрипт завершается с кодом 1, если время превышает бюджет или загружены «тяжёлые» модули,
+которые этому процессу не нужны.
+
+    python -m app.bench.imports
+    python -m app.bench.imports --runs 10 --budget api=300 --budget beat=400
+"""
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+from dataclasses import dataclass, field
+
+
+@dataclass
+class EntryPoint:
+    name: str
+    module: str
+    budget_ms: float
+    forbidden: list[str] = field(default_factory=list)
+
+
+ENTRY_POINTS: list[EntryPoint] = [
+    # Больше половины времени API — сами fastapi/starlette/pydantic и redis, лениво их не загрузить;
+    # бюджет с запасом на медленные машины, регрессии вроде импорта Celery ловит список forbidden
+    EntryPoint("api", "main", 1000, ["celery", "kombu", "bs4", "requests", "telethon", "uvicorn"]),
+    EntryPoint("worker", "celery_worker", 700, ["bs4", "requests", "telethon"]),
+    EntryPoint("beat", "app.tasks", 700, ["bs4", "requests", "telethon"]),
+    EntryPoint("publisher", "app.telegram.publisher", 500, ["celery", "kombu", "bs4", "requests", "telethon"]),
+]
+
+_PROBE = """
+import json, sys, time
+start = time.perf_counter()
+import {module}
+elapsed = (time.perf_counter() - start) * 1000
+print(json.dumps({{"ms": elapsed, "modules": sorted(sys.modules)}}))
+"""
+
+
+def measure(entry: EntryPoint, runs: int) -> tuple[float, list[str]]:
+    """Медианное время импорта (мс) и список загруженных модулей."""
+    timings: list[float] = []
+    modules: list[str] = []
+    for _ in range(runs):
+        output = subprocess.run(
+            [sys.executable, "-c", _PROBE.format(module=entry.module)],
+            check=True,
+            capture_output=True,
+            text=True,
+        ).stdout
+        data = json.loads(output.strip().splitlines()[-1])
+        timings.append(data["ms"])
+        modules = data["modules"]
+    return statistics.median(timings), modules
+
+
+def top_imports(module: str, count: int = 5) -> list[tuple[str, float]]:
+    """Самые дорогие пакеты верхнего уровня по накопленному времени (по данным python -X importtime)."""
+    stderr = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        check=True,
+        capture_output=True,
+        text=True,
+    ).stderr
+
+    cumulative: dict[str, float] = {}
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        parts = line.split(":", 1)[1].split("|")
+        root = parts[2].strip().split(".")[0]
+        if root == module.split(".")[0]:
+            continue
+        cumulative[root] = max(cumulative.get(root, 0.0), int(parts[1]) / 1000)
+
+    return sorted(cumulative.items(), key=lambda pair: pair[1], reverse=True)[:count]
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Время импорта точек входа NewsBot")
+    parser.add_argument("--runs", type=int, default=5, help="Сколько раз импортировать каждую точку входа")
+    parser.add_argument(
+        "--budget",
+        action="append",
+        default=[],
+        metavar="NAME=MS",
+        help="Переопределить бюджет точки входа, например api=300",
+    )
+    parser.add_argument("--top", type=int, default=5, help="Сколько самых дорогих импортов показать")
+    args = parser.parse_args()
+
+    budgets = dict(item.split("=", 1) for item in args.budget)
+
+    failed = False
+    for entry in ENTRY_POINTS:
+        budget = float(budgets.get(entry.name, entry.budget_ms))
+        elapsed, modules = measure(entry, args.runs)
+        loaded = [name for name in entry.forbidden if name in modules]
+
+        status = "OK"
+        if elapsed > budget or loaded:
+            status = "FAIL"
+            failed = True
+
+        print(f"{entry.name:<10} {entry.module:<24} {elapsed:8.1f} ms  (бюджет {budget:.0f} ms)  {status}")
+        if loaded:
+            print(f"    лишние модули: {', '.join(loaded)}")
+        for name, ms in top_imports(entry.module, args.top):
+            print(f"    {name:<40} {ms:8.1f} ms")
+
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
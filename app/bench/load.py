@@ -0,0 +1,403 @@
+"""Нагрузочный тест API на asyncio + httpx.
+По умолчанию приложение запускается в том же процессе (httpx.ASGITransport) на Redis в памяти
+(REDIS_URL=fakeredis://, нужен пакет fakeredis) с заранее заполненными данными.
+С --url запросы идут на уже запущенный сервер (например, uvicorn на localhost).
+Тестовые данные по умолчанию создаются только в fakeredis: заполнение настоящего Redis заменяет
+историю публикаций, ключевые слова и источники, поэтому требует --seed N и --confirm-seed.
+
+Для каждого маршрута считаются p50/p95/p99, пропускная способность и доля ошибок.
+В режиме in-process дополнительно измеряется задержка event loop: если обработчик
+блокирует цикл (синхронный I/O в async def), она растёт вместе с задержками всех маршрутов.
+Результат можно сохранить как baseline и сравнивать с ним следующие прогоны (код возврата 1 при регрессии).
+
+    python -m app.bench.load --duration 10 --concurrency 50
+    python -m app.bench.load --mix posts=5 --mix health=1 --save-baseline bench-load.json
+    python -m app.bench.load --baseline bench-load.json --tolerance 0.3
+    python -m app.bench.load --url http://127.0.0.1:8000
+    python -m app.bench.load --redis-url redis://localhost:6379/15 --seed 200 --confirm-seed
+"""
+import argparse
+import asyncio
+import itertools
+import json
+import random
+import sys
+import time
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta, timezone
+from typing import Any, Callable
+
+import httpx
+
+from app.config import settings
+from app.redis_client import FAKE_REDIS_SCHEME
+
+# Сколько запросов каждого воркера не учитываются (прогрев)
+WARMUP_REQUESTS = 5
+# Интервал проверки задержки event loop, сек
+LOOP_LAG_INTERVAL = 0.01
+# Абсолютный допуск при сравнении с baseline, мс: разница меньше этого — шум, а не регрессия
+BASELINE_MIN_DELTA_MS = 5.0
+
+
+@dataclass
+class Route:
+    method: str
+    path: str
+    # Тело запроса и подстановки в путь; получает номер запроса
+    build: Callable[[int], dict[str, Any]] | None = None
+    expected: tuple[int, ...] = (200,)
+
+
+@dataclass
+class RouteStats:
+    latencies: list[float] = field(default_factory=list)
+    errors: int = 0
+
+
+_seed_size = 200
+_word_counter = itertools.count()
+
+
+def _random_id(_: int) -> dict[str, Any]:
+    return {"id": random.randint(1, max(_seed_size, 1))}
+
+
+def _new_keyword(n: int) -> dict[str, Any]:
+    return {"json": {"id": 0, "word": f"load-{time.time_ns()}-{next(_word_counter)}"}}
+
+
+def _update_keyword(n: int) -> dict[str, Any]:
+    return {**_random_id(n), "json": {"id": 0, "word": f"load-upd-{time.time_ns()}-{next(_word_counter)}"}}
+
+
+ROUTES: dict[str, Route] = {
+    "health": Route("GET", "/health"),
+    "posts": Route("GET", "/posts"),
+    "news": Route("GET", "/news?limit=20"),
+    "keywords_list": Route("GET", "/api/keywords/"),
+    "keyword_get": Route("GET", "/api/keywords/{id}", _random_id, (200, 404)),
+    "keyword_create": Route("POST", "/api/keywords/", _new_keyword, (201,)),
+    "keyword_update": Route("PUT", "/api/keywords/{id}", _update_keyword, (200, 404)),
+    "sources_list": Route("GET", "/api/sources/"),
+    "channels_list": Route("GET", "/api/channels/"),
+}
+
+DEFAULT_MIX: dict[str, int] = {
+    "posts": 4,
+    "health": 2,
+    "news": 2,
+    "keywords_list": 2,
+    "keyword_get": 2,
+    "keyword_create": 1,
+    "keyword_update": 1,
+    "sources_list": 1,
+    "channels_list": 1,
+}
+
+
+def seed_data(size: int) -> None:
+    """Заполнить Redis тестовыми данными: ключевые слова, источники, история публикаций, новости."""
+    from app.keys import KEYWORDS_KEY, PUBLISHED_POSTS_KEY
+    from app.news_parser import SOURCES_KEY
+    from app.news_store import save_news
+    from app.redis_client import bump_data_version, get_redis_client
+    from app.schemas import NewsItem
+
+    client = get_redis_client()
+    now = datetime.now(timezone.utc)
+
+    keywords = [{"id": i, "word": f"word{i}"} for i in range(1, size + 1)]
+    sources = [
+        {"id": i, "type": "site", "name": f"source{i}", "url": f"https://example.com/{i}", "enabled": True}
+        for i in range(1, min(size, 50) + 1)
+    ]
+    posts = [
+        json.dumps(
+            {
+                "news_id": f"news-{i}",
+                "title": f"Новость {i}",
+                "published_at": (now - timedelta(minutes=i)).isoformat(),
+                "channel_id": "@load_test",
+                "url": f"https://example.com/news/{i}",
+            },
+            ensure_ascii=False,
+        )
+        for i in range(size)
+    ]
+
+    pipe = client.pipeline(transaction=True)
+    pipe.set(KEYWORDS_KEY, json.dumps(keywords, ensure_ascii=False))
+    pipe.set(SOURCES_KEY, json.dumps(sources, ensure_ascii=False))
+    pipe.delete(PUBLISHED_POSTS_KEY)
+    if posts:
+        pipe.rpush(PUBLISHED_POSTS_KEY, *posts)
+    for key in (KEYWORDS_KEY, SOURCES_KEY, PUBLISHED_POSTS_KEY):
+        bump_data_version(pipe, key)
+    pipe.execute()
+
+    save_news(
+        [
+            NewsItem(
+                id=f"news-{i}",
+                title=f"Новость {i} про python",
+                url=f"https://example.com/news/{i}",
+                source="habr" if i % 2 else "rbc",
+                published_at=now - timedelta(minutes=i),
+                keywords=["python"],
+            )
+            for i in range(size)
+        ]
+    )
+
+
+def percentile(sorted_values: list[float], q: float) -> float:
+    """Перцентиль по методу ближайшего ранга (значения уже отсортированы)."""
+    if not sorted_values:
+        return 0.0
+    index = max(0, min(len(sorted_values) - 1, int(round(q / 100 * len(sorted_values) + 0.5)) - 1))
+    return sorted_values[index]
+
+
+def summarize(latencies: list[float], errors: int, elapsed: float) -> dict[str, float]:
+    values = sorted(latencies)
+    count = len(values)
+    return {
+        "requests": count,
+        "rps": round(count / elapsed, 1) if elapsed else 0.0,
+        "error_rate": round(errors / count, 4) if count else 0.0,
+        "p50_ms": round(percentile(values, 50), 2),
+        "p95_ms": round(percentile(values, 95), 2),
+        "p99_ms": round(percentile(values, 99), 2),
+    }
+
+
+async def _worker(
+    client: httpx.AsyncClient,
+    names: list[str],
+    weights: list[int],
+    stats: dict[str, RouteStats],
+    deadline: float,
+    budget: itertools.count | None,
+    max_requests: int | None,
+) -> None:
+    n = 0
+    while time.perf_counter() < deadline:
+        if budget is not None and next(budget) >= max_requests:
+            return
+
+        name = random.choices(names, weights)[0]
+        route = ROUTES[name]
+        params = route.build(n) if route.build else {}
+        path = route.path.format(**params)
+
+        start = time.perf_counter()
+        try:
+            response = await client.request(route.method, path, json=params.get("json"))
+            ok = response.status_code in route.expected
+        except httpx.HTTPError:
+            ok = False
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        # In-process запрос может ни разу не отдать управление циклу: уступаем явно,
+        # чтобы воркеры и монитор задержки чередовались
+        await asyncio.sleep(0)
+
+        n += 1
+        if n <= WARMUP_REQUESTS:
+            continue
+        stats[name].latencies.append(elapsed_ms)
+        if not ok:
+            stats[name].errors += 1
+
+
+async def _loop_lag_monitor(lags: list[float], stop: asyncio.Event) -> None:
+    while not stop.is_set():
+        start = time.perf_counter()
+        await asyncio.sleep(LOOP_LAG_INTERVAL)
+        lags.append(max(0.0, (time.perf_counter() - start - LOOP_LAG_INTERVAL) * 1000))
+
+
+async def run_load(
+    mix: dict[str, int],
+    concurrency: int,
+    duration: float,
+    max_requests: int | None = None,
+    url: str | None = None,
+) -> dict[str, Any]:
+    """Запустить нагрузку и вернуть отчёт по маршрутам."""
+    if url:
+        transport = None
+        base_url = url.rstrip("/")
+    else:
+        from main import app
+
+        transport = httpx.ASGITransport(app=app)
+        base_url = "http://loadtest"
+
+    names = [name for name, weight in mix.items() if weight > 0]
+    weights = [mix[name] for name in names]
+    stats = {name: RouteStats() for name in names}
+    lags: list[float] = []
+    stop = asyncio.Event()
+
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(transport=transport, base_url=base_url, limits=limits, timeout=30) as client:
+        monitor = asyncio.create_task(_loop_lag_monitor(lags, stop)) if transport else None
+        budget = itertools.count() if max_requests else None
+        started = time.perf_counter()
+        await asyncio.gather(
+            *(
+                _worker(client, names, weights, stats, started + duration, budget, max_requests)
+                for _ in range(concurrency)
+            )
+        )
+        elapsed = time.perf_counter() - started
+        stop.set()
+        if monitor:
+            await monitor
+
+    all_latencies = [x for s in stats.values() for x in s.latencies]
+    report: dict[str, Any] = {
+        "concurrency": concurrency,
+        "elapsed_s": round(elapsed, 2),
+        "routes": {name: summarize(s.latencies, s.errors, elapsed) for name, s in stats.items()},
+        "total": summarize(all_latencies, sum(s.errors for s in stats.values()), elapsed),
+    }
+    if transport:
+        lag_values = sorted(lags)
+        report["loop_lag"] = {
+            "p99_ms": round(percentile(lag_values, 99), 2),
+            "max_ms": round(lag_values[-1], 2) if lag_values else 0.0,
+        }
+    return report
+
+
+def compare_with_baseline(report: dict[str, Any], baseline: dict[str, Any], tolerance: float) -> list[str]:
+    """Список регрессий относительно baseline: рост p95/p99, рост ошибок, падение пропускной способности."""
+    problems: list[str] = []
+
+    def worse(current: float, base: float) -> bool:
+        return current > base * (1 + tolerance) and current - base > BASELINE_MIN_DELTA_MS
+
+    for name, base in baseline.get("routes", {}).items():
+        current = report["routes"].get(name)
+        if not current or not current["requests"]:
+            continue
+        for metric in ("p95_ms", "p99_ms"):
+            if worse(current[metric], base[metric]):
+                problems.append(f"{name}: {metric} {current[metric]} > {base[metric]} (baseline)")
+        if current["error_rate"] > base["error_rate"] + 0.01:
+            problems.append(f"{name}: error_rate {current['error_rate']} > {base['error_rate']} (baseline)")
+
+    base_total, total = baseline.get("total"), report["total"]
+    if base_total and total["rps"] < base_total["rps"] * (1 - tolerance):
+        problems.append(f"total: rps {total['rps']} < {base_total['rps']} (baseline)")
+
+    base_lag, lag = baseline.get("loop_lag"), report.get("loop_lag")
+    if base_lag and lag and worse(lag["p99_ms"], base_lag["p99_ms"]):
+        problems.append(f"event loop: lag p99 {lag['p99_ms']} > {base_lag['p99_ms']} ms (baseline)")
+
+    return problems
+
+
+def print_report(report: dict[str, Any]) -> None:
+    print(f"{'route':<16} {'req':>7} {'rps':>8} {'err%':>6} {'p50':>8} {'p95':>8} {'p99':>8}")
+    rows = list(report["routes"].items()) + [("TOTAL", report["total"])]
+    for name, s in rows:
+        print(
+            f"{name:<16} {s['requests']:>7} {s['rps']:>8.1f} {s['error_rate'] * 100:>6.2f} "
+            f"{s['p50_ms']:>8.2f} {s['p95_ms']:>8.2f} {s['p99_ms']:>8.2f}"
+        )
+    if "loop_lag" in report:
+        lag = report["loop_lag"]
+        print(f"event loop lag: p99 {lag['p99_ms']:.2f} ms, max {lag['max_ms']:.2f} ms")
+
+
+def parse_mix(values: list[str]) -> dict[str, int]:
+    if not values:
+        return dict(DEFAULT_MIX)
+    mix: dict[str, int] = {}
+    for value in values:
+        for part in value.split(","):
+            name, _, weight = part.partition("=")
+            name = name.strip()
+            if name not in ROUTES:
+                raise SystemExit(f"Неизвестный маршрут {name!r}, доступны: {', '.join(ROUTES)}")
+            mix[name] = int(weight or 1)
+    return mix
+
+
+def main() -> int:
+    global _seed_size
+
+    parser = argparse.ArgumentParser(description="Нагрузочный тест API NewsBot")
+    parser.add_argument("--url", help="Адрес запущенного сервера; по умолчанию приложение запускается in-process")
+    parser.add_argument(
+        "--redis-url",
+        default=None,
+        help="Redis для in-process режима (по умолчанию fakeredis:// — Redis в памяти процесса)",
+    )
+    parser.add_argument("--concurrency", type=int, default=20, help="Число одновременных клиентов")
+    parser.add_argument("--duration", type=float, default=10.0, help="Длительность прогона, сек")
+    parser.add_argument("--requests", type=int, default=None, help="Остановиться после N запросов")
+    parser.add_argument(
+        "--mix",
+        action="append",
+        default=[],
+        metavar="ROUTE=WEIGHT",
+        help=f"Доля маршрута в нагрузке (можно несколько), маршруты: {', '.join(ROUTES)}",
+    )
+    parser.add_argument(
+        "--seed",
+        type=int,
+        default=None,
+        help="Сколько тестовых записей создать (0 — не заполнять); по умолчанию 200 только для fakeredis://",
+    )
+    parser.add_argument(
+        "--confirm-seed",
+        action="store_true",
+        help="Разрешить --seed для настоящего Redis: история публикаций, ключевые слова и источники будут заменены",
+    )
+    parser.add_argument("--save-baseline", metavar="PATH", help="Сохранить отчёт как baseline")
+    parser.add_argument("--baseline", metavar="PATH", help="Сравнить с сохранённым baseline")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="Допустимое ухудшение относительно baseline")
+    args = parser.parse_args()
+
+    mix = parse_mix(args.mix)
+
+    if not args.url:
+        settings.redis_url = args.redis_url or FAKE_REDIS_SCHEME
+    # seed_data заменяет историю публикаций, ключевые слова и источники: по умолчанию заполняется
+    # только Redis в памяти, настоящий — лишь по явному --seed с подтверждением
+    fake_redis = settings.redis_url.startswith(FAKE_REDIS_SCHEME)
+    _seed_size = args.seed if args.seed is not None else (200 if fake_redis else 0)
+    if _seed_size and not fake_redis and not args.confirm_seed:
+        raise SystemExit(
+            f"--seed перезапишет данные в {settings.redis_url}; добавьте --confirm-seed, если это тестовый Redis"
+        )
+    if _seed_size:
+        seed_data(_seed_size)
+
+    report = asyncio.run(run_load(mix, args.concurrency, args.duration, args.requests, args.url))
+    report["mix"] = mix
+    print_report(report)
+
+    if args.save_baseline:
+        with open(args.save_baseline, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        print(f"baseline сохранён: {args.save_baseline}")
+
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            problems = compare_with_baseline(report, json.load(f), args.tolerance)
+        for problem in problems:
+            print(f"REGRESSION {problem}")
+        if problems:
+            return 1
+        print("регрессий относительно baseline нет")
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,210 @@
+"""Массовый импорт/экспорт справочников (ключевые слова, источники) в NDJSON и CSV.
+Загрузка разбирается и валидируется за один проход, дубли отсекаются по ключу без учёта регистра
+(множество уже сохранённых ключей + ключей из загрузки), а итоговый список записывается
+в Redis одной транзакцией вместе с версией коллекции.
+"""
+import csv
+import io
+import json
+import logging
+from typing import Any, Callable, Literal
+
+from pydantic import BaseModel, ValidationError
+from redis.exceptions import WatchError
+
+from app.lists import load_list, next_id
+from app.redis_client import bump_data_version, get_redis_client
+from app.schemas import Keywords, Source
+
+logger = logging.getLogger(__name__)
+
+BulkFormat = Literal["ndjson", "csv"]
+BulkMode = Literal["append", "replace"]
+
+# Сколько раз повторить запись, если список изменили параллельно (WATCH)
+BULK_WRITE_RETRIES = 5
+
+# Максимум строк с ошибками/дублями в ответе: при битом файле на десятки тысяч строк ответ не должен раздуваться
+BULK_MAX_REPORTED_ERRORS = 100
+
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+CSV_MEDIA_TYPE = "text/csv"
+
+
+def keyword_dedupe_key(item: Keywords) -> str:
+    return item.word.strip().lower()
+
+
+def source_dedupe_key(item: Source) -> str:
+    return f"{item.type}:{item.url.strip().lower()}"
+
+
+def detect_format(format_param: str | None, content_type: str | None) -> BulkFormat:
+    """Формат загрузки: явный параметр format, иначе по Content-Type (по умолчанию NDJSON)."""
+    if format_param:
+        return "csv" if format_param.lower() == "csv" else "ndjson"
+    if content_type and "csv" in content_type.lower():
+        return "csv"
+    return "ndjson"
+
+
+def iter_rows(body: bytes, fmt: BulkFormat):
+    """Строки загрузки: пары (номер строки, dict) или (номер строки, текст ошибки разбора).
+        Номера строк — как в файле (для CSV заголовок — строка 1).
+    """
+    text = body.decode("utf-8-sig")
+
+    if fmt == "csv":
+        reader = csv.DictReader(io.StringIO(text))
+        for row in reader:
+            # Пустые ячейки не передаём в модель, чтобы сработали значения по умолчанию
+            data = {k.strip(): v.strip() for k, v in row.items() if k and v is not None and v.strip()}
+            if data:
+                yield reader.line_num, data
+        return
+
+    for line_num, line in enumerate(text.splitlines(), start=1):
+        if not line.strip():
+            continue
+        try:
+            data = json.loads(line)
+        except json.JSONDecodeError as exc:
+            yield line_num, f"invalid JSON: {exc.msg}"
+            continue
+        if not isinstance(data, dict):
+            yield line_num, "expected JSON object"
+            continue
+        yield line_num, {k: v.strip() if isinstance(v, str) else v for k, v in data.items()}
+
+
+def _validation_message(exc: ValidationError) -> str:
+    return "; ".join(
+        f"{'.'.join(str(x) for x in err['loc']) or 'row'}: {err['msg']}" for err in exc.errors()
+    )
+
+
+class BulkImportRejected(ValueError):
+    """Загрузка в режиме replace отклонена: в ней есть ошибочные строки или нет ни одной записи.
+        report — отчёт импорта с номерами строк и причинами.
+    """
+
+    def __init__(self, report: dict[str, Any]):
+        super().__init__("replace import rejected")
+        self.report = report
+
+
+def bulk_import(
+    key: str,
+    body: bytes,
+    fmt: BulkFormat,
+    model: type[BaseModel],
+    dedupe_key: Callable[[Any], str],
+    mode: BulkMode = "append",
+    dry_run: bool = False,
+) -> dict[str, Any]:
+    """Импортировать записи в список Redis по ключу key.
+        id назначаются сервером; append — добавить к существующим, replace — заменить список целиком.
+        Возвращает отчёт: imported, duplicates (+ номера строк), errors (номер строки + причина).
+        Списки строк в отчёте ограничены BULK_MAX_REPORTED_ERRORS.
+        replace записывает список только если все строки корректны и есть хотя бы одна запись,
+        иначе — BulkImportRejected (например, CSV, загруженный как NDJSON, не должен стереть справочник).
+    """
+    client = get_redis_client()
+
+    for _ in range(BULK_WRITE_RETRIES):
+        with client.pipeline(transaction=True) as pipe:
+            try:
+                pipe.watch(key)
+                existing = [] if mode == "replace" else load_list(key, pipe)
+                seen: set[str] = set()
+                for x in existing:
+                    try:
+                        seen.add(dedupe_key(model(**x)))
+                    except (TypeError, ValueError):
+                        continue
+
+                new_id = next_id(existing)
+                new_items: list[dict[str, Any]] = []
+                errors: list[dict[str, Any]] = []
+                duplicate_rows: list[int] = []
+                duplicate_count = 0
+                error_count = 0
+                total = 0
+
+                for line_num, data in iter_rows(body, fmt):
+                    total += 1
+                    if isinstance(data, str):
+                        error = data
+                    else:
+                        try:
+                            item = model(**{**data, "id": new_id})
+                            error = None
+                        except ValidationError as exc:
+                            error = _validation_message(exc)
+
+                    if error is not None:
+                        error_count += 1
+                        if len(errors) < BULK_MAX_REPORTED_ERRORS:
+                            errors.append({"row": line_num, "error": error})
+                        continue
+
+                    item_key = dedupe_key(item)
+                    if item_key in seen:
+                        duplicate_count += 1
+                        if len(duplicate_rows) < BULK_MAX_REPORTED_ERRORS:
+                            duplicate_rows.append(line_num)
+                        continue
+                    seen.add(item_key)
+                    new_items.append(item.model_dump())
+                    new_id += 1
+
+                report = {
+                    "total": total,
+                    "imported": len(new_items),
+                    "duplicates": duplicate_count,
+                    "duplicate_rows": duplicate_rows,
+                    "error_count": error_count,
+                    "errors": errors,
+                }
+
+                if dry_run:
+                    pipe.unwatch()
+                    return report
+
+                if mode == "replace" and (error_count or not new_items):
+                    pipe.unwatch()
+                    raise BulkImportRejected(report)
+
+                if not new_items:
+                    pipe.unwatch()
+                    return report
+
+                pipe.multi()
+                pipe.set(key, json.dumps(existing + new_items, ensure_ascii=False))
+                bump_data_version(pipe, key)
+                pipe.execute()
+                logger.info(
+                    "Импорт %s: добавлено=%s, дублей=%s, ошибок=%s",
+                    key,
+                    len(new_items),
+                    duplicate_count,
+                    error_count,
+                )
+                return report
+            except WatchError:
+                continue
+
+    raise RuntimeError(f"Не удалось записать {key}: список постоянно меняется параллельно")
+
+
+def export_items(items: list[BaseModel], fmt: BulkFormat, fields: list[str]) -> str:
+    """Выгрузить записи в NDJSON (по объекту на строку) или CSV с заголовком."""
+    if fmt == "ndjson":
+        return "".join(item.model_dump_json() + "\n" for item in items)
+
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=fields, extrasaction="ignore")
+    writer.writeheader()
+    for item in items:
+        writer.writerow(item.model_dump(mode="json"))
+    return buffer.getvalue()
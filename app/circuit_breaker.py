@@ -0,0 +1,124 @@
+"""Circuit breaker для источников новостей.
+Состояние хранится в Redis (hash breaker:<source>) и общее для всех воркеров:
+- closed: запросы идут, ошибки и медленные ответы считаются
+- open: после breaker_failure_threshold ошибок подряд источник пропускается мгновенно
+- half_open: по истечении паузы один воркер делает пробный запрос;
+  успех закрывает breaker, ошибка снова открывает его с удвоенной паузой
+"""
+import logging
+import math
+import time
+
+from app.config import settings
+from app.redis_client import get_redis_client
+
+logger = logging.getLogger(__name__)
+
+BREAKER_KEY_PREFIX = "breaker:"
+BREAKER_PROBE_KEY_PREFIX = "breaker:probe:"
+BREAKER_SOURCES_KEY = "breaker:sources"
+
+STATE_CLOSED = "closed"
+STATE_OPEN = "open"
+STATE_HALF_OPEN = "half_open"
+
+
+def probe_ttl() -> int:
+    """Сколько держать флаг пробного запроса: худшее время загрузки источника с повторами.
+        Каждая из fetch_retries + 1 попыток ждёт до fetch_timeout, а паузы между ними
+        (fetch_retry_backoff, удваивается, как в urllib3 Retry) дают backoff * (2 ** retries - 1).
+    """
+    backoff_total = settings.fetch_retry_backoff * (2 ** settings.fetch_retries - 1)
+    return max(math.ceil(settings.fetch_timeout * (settings.fetch_retries + 1) + backoff_total), 1)
+
+
+class CircuitBreaker:
+    """Circuit breaker одного источника."""
+
+    def __init__(self, name: str):
+        self.name = name
+        self.key = f"{BREAKER_KEY_PREFIX}{name}"
+        self.probe_key = f"{BREAKER_PROBE_KEY_PREFIX}{name}"
+        self.client = get_redis_client()
+
+    def allow_request(self) -> bool:
+        """Можно ли обращаться к источнику сейчас."""
+        state = self.client.hmget(self.key, ["state", "open_until"])
+        if state[0] in (None, STATE_CLOSED):
+            return True
+
+        if time.time() < float(state[1] or 0):
+            return False
+
+        # Пауза истекла: пробный запрос делает только один воркер
+        if not self.client.set(self.probe_key, "1", nx=True, ex=probe_ttl()):
+            return False
+
+        self.client.hset(self.key, "state", STATE_HALF_OPEN)
+        logger.info("Circuit breaker %s: half-open, пробный запрос", self.name)
+        return True
+
+    def record_success(self) -> None:
+        """Успешный запрос: закрыть breaker и сбросить счётчики."""
+        pipe = self.client.pipeline(transaction=True)
+        pipe.hset(self.key, mapping={"state": STATE_CLOSED, "failures": 0, "open_count": 0, "open_until": 0})
+        pipe.delete(self.probe_key)
+        pipe.sadd(BREAKER_SOURCES_KEY, self.name)
+        pipe.execute()
+
+    def record_failure(self, reason: str) -> None:
+        """Ошибка или медленный ответ: увеличить счётчик и при необходимости открыть breaker."""
+        pipe = self.client.pipeline(transaction=True)
+        pipe.hincrby(self.key, "failures", 1)
+        pipe.hget(self.key, "state")
+        pipe.hget(self.key, "open_count")
+        pipe.sadd(BREAKER_SOURCES_KEY, self.name)
+        failures, state, open_count, _ = pipe.execute()
+
+        if state == STATE_OPEN:
+            # Запоздалый сбой запроса, начатого до открытия: пауза уже идёт, не продлеваем её
+            logger.info("Circuit breaker %s: уже открыт, сбой не учитывается (%s)", self.name, reason)
+            return
+
+        if state != STATE_HALF_OPEN and failures < settings.breaker_failure_threshold:
+            logger.info(
+                "Circuit breaker %s: сбой %s/%s (%s)",
+                self.name,
+                failures,
+                settings.breaker_failure_threshold,
+                reason,
+            )
+            return
+
+        # Экспоненциальная пауза: каждое повторное открытие удваивает время до следующей пробы
+        open_count = int(open_count or 0)
+        pause = min(settings.breaker_open_seconds * 2 ** open_count, settings.breaker_max_open_seconds)
+
+        pipe = self.client.pipeline(transaction=True)
+        pipe.hset(
+            self.key,
+            mapping={"state": STATE_OPEN, "open_until": time.time() + pause, "open_count": open_count + 1},
+        )
+        pipe.delete(self.probe_key)
+        pipe.execute()
+        logger.warning("Circuit breaker %s: открыт на %ss (%s)", self.name, pause, reason)
+
+
+def breaker_states() -> dict[str, dict]:
+    """Состояние всех breaker-ов (для /health)."""
+    client = get_redis_client()
+    names = sorted(client.smembers(BREAKER_SOURCES_KEY))
+
+    pipe = client.pipeline(transaction=False)
+    for name in names:
+        pipe.hgetall(f"{BREAKER_KEY_PREFIX}{name}")
+
+    result: dict[str, dict] = {}
+    for name, data in zip(names, pipe.execute()):
+        open_until = float(data.get("open_until") or 0)
+        result[name] = {
+            "state": data.get("state", STATE_CLOSED),
+            "failures": int(data.get("failures") or 0),
+            "retry_in": max(0, round(open_until - time.time())) if data.get("state") == STATE_OPEN else 0,
+        }
+    return result
@@ -0,0 +1,70 @@
+"""Claim-check для результатов задач.
+Пачка новостей сохраняется один раз в сжатом виде в Redis-ключ с TTL (claim:news:<hash>),
+а задача возвращает в result backend Celery только маленькую ссылку.
+Получатель (API GET /claims/{claim_id}) читает пачку по ссылке, когда она действительно нужна.
+Ключ вычисляется по содержимому, поэтому одинаковые пачки хранятся один раз.
+"""
+import hashlib
+import logging
+import zlib
+from typing import Any
+
+from app.batch import NewsBatch
+from app.config import settings
+from app.redis_client import get_binary_redis_client
+from app.schemas import NEWS_BATCH_ADAPTER, NewsItem
+
+try:
+    import zstandard
+except ImportError:  # zstd необязателен: без него используется zlib
+    zstandard = None
+
+logger = logging.getLogger(__name__)
+
+CLAIM_KEY_PREFIX = "claim:news:"
+
+# Заголовок сжатого значения: по нему читатель выбирает распаковщик
+_ZSTD_MAGIC = b"Z"
+_ZLIB_MAGIC = b"L"
+
+
+class ClaimNotFound(KeyError):
+    """Пачка по ссылке не найдена: TTL истёк или ссылка неверна."""
+
+
+def claim_key(claim_id: str) -> str:
+    return f"{CLAIM_KEY_PREFIX}{claim_id}"
+
+
+def _compress(payload: bytes) -> bytes:
+    if zstandard is not None:
+        return _ZSTD_MAGIC + zstandard.ZstdCompressor(level=3).compress(payload)
+    return _ZLIB_MAGIC + zlib.compress(payload, 6)
+
+
+def _decompress(value: bytes) -> bytes:
+    magic, body = value[:1], value[1:]
+    if magic == _ZSTD_MAGIC:
+        if zstandard is None:
+            raise RuntimeError("Пачка сжата zstd, а пакет zstandard не установлен")
+        return zstandard.ZstdDecompressor().decompress(body)
+    return zlib.decompress(body)
+
+
+def store_news_batch(items: NewsBatch | list[NewsItem], ttl: int | None = None) -> dict[str, Any]:
+    """Сохранить пачку новостей и вернуть ссылку на неё: claim_id, count, bytes."""
+    payload = items.dump_json() if isinstance(items, NewsBatch) else NEWS_BATCH_ADAPTER.dump_json(items)
+    claim_id = hashlib.blake2b(payload, digest_size=16).hexdigest()
+    value = _compress(payload)
+
+    get_binary_redis_client().set(claim_key(claim_id), value, ex=ttl or settings.claim_check_ttl)
+    logger.info("Claim-check: пачка %s, новостей=%s, %s -> %s байт", claim_id, len(items), len(payload), len(value))
+    return {"claim_id": claim_id, "count": len(items), "bytes": len(value)}
+
+
+def load_news_batch(claim_id: str) -> list[NewsItem]:
+    """Прочитать пачку новостей по claim_id. ClaimNotFound, если её уже нет."""
+    value = get_binary_redis_client().get(claim_key(claim_id))
+    if value is None:
+        raise ClaimNotFound(claim_id)
+    return NEWS_BATCH_ADAPTER.validate_json(_decompress(value))
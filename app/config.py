@@ -1,5 +1,7 @@
 """Конфигурация проекта. Модуль содержит настройки приложения, загружаемые из переменного окружения
 (и файла .env)"""
+from typing import Literal
+
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
 
@@ -14,6 +16,10 @@ class Settings(BaseSettings):
     strict_filtering: bool = True  #Флаг строгой фильтрации новостей
 
     redis_url: str = "redis://localhost:6379/0" # в Docker: redis://redis:6379/0
+
+    stats_max_days: int = 366  #Максимальная длина диапазона GET /stats (дни)
+    response_compress_min_bytes: int = 1024  #Ответы API больше этого размера сжимаются (gzip/zstd)
+    bulk_import_max_bytes: int = 10 * 1024 * 1024  #Максимальный размер тела массового импорта (NDJSON/CSV)
     project_name: str = "newsbot"
 
     telegram_api_id: int = 0        #Telegram API ID для Telethon
@@ -21,9 +27,87 @@ class Settings(BaseSettings):
     telegram_bot_token: str = ""    # BOT TOKEN из BotFather
     telegram_channel_id: str = ""   #ID/username канала для публикаций
 
+    # Чтение Telegram-источников (Source type="tg")
+    tg_fetch_batch_size: int = 100        #Сообщений за один запрос к каналу
+    tg_max_messages_per_poll: int = 500   #Максимум новых сообщений канала за один сбор
+    tg_initial_messages: int = 20         #Сколько последних сообщений брать при первом чтении канала
+
+    # Режим публикации: "single" — одна новость в сообщении, "digest" — несколько новостей в одном сообщении
+    publish_mode: Literal["single", "digest"] = "single"
+    digest_group_by: Literal["source", "keyword", "none"] = "source"  #Группировка новостей в дайджесте
+    digest_layout: Literal["compact", "full"] = "compact"  #compact — только заголовки, full — заголовок + описание
+    digest_max_items: int = 30                                #Сколько новостей публиковать за один запуск в режиме дайджеста
+    digest_title: str = "Дайджест новостей"                   #Заголовок сообщения-дайджеста
+
+    # Очередь публикаций на Redis Streams (несколько реплик публикатора без дублей)
+    publish_outbox_enabled: bool = False
+    outbox_claim_idle_ms: int = 5 * 60 * 1000  #Через сколько мс забирать записи упавшего потребителя
+
+    # Single-flight: повторные запуски сбора/публикации присоединяются к уже идущему (секунды)
+    collect_lock_ttl: int = 120       #Аренда блокировки сбора новостей
+    collect_wait_timeout: int = 60    #Сколько ждать результат уже идущего сбора
+    publish_lock_ttl: int = 300       #Аренда блокировки публикации (продлевается перед каждой отправкой)
+
     # Фильтры ключевых слов по умолчанию (можно переопределить через .env)
     news_keywords: str = "python,fastapi,django,ai,aiogram,нейросети"
 
+    news_latest_limit: int = 1000  #Сколько последних новостей хранить в Redis (для GET /news)
+    search_postings_per_term: int = 1000  #Сколько лучших документов термина читать при поиске
+    search_index_limit: int = 50000       #Сколько последних новостей хранить в поисковом индексе
+
+    # Загрузка страниц источников
+    fetch_timeout: float = 10.0        #Таймаут HTTP-запроса к источнику (секунды)
+    fetch_retries: int = 1             #Повторы при обрыве соединения и ответах 502/503/504
+    fetch_retry_backoff: float = 0.5   #Базовая пауза между повторами (удваивается)
+    fetch_streaming: bool = True       #Читать страницу потоком и прекращать загрузку после limit новостей
+    fetch_chunk_size: int = 16384      #Размер куска при потоковом чтении (байт)
+    fetch_max_body_bytes: int = 5 * 1024 * 1024  #Жёсткий предел размера страницы источника (байт)
+
+    # Архив загруженных страниц источников (повторный разбор: python -m app.news_parser.replay)
+    archive_enabled: bool = False                   #Сохранять каждую загруженную страницу на диск
+    archive_dir: str = "data/archive"               #Каталог архива (подкаталог на каждый день)
+    archive_segment_max_bytes: int = 64 * 1024 * 1024  #Размер сегмента, после которого начинается новый
+    archive_compress_level: int = 3                 #Уровень сжатия zstd
+    archive_retention_days: int = 30                #Сколько дней хранить архив (0 — без ограничения)
+
+    # Разбор HTML и нормализация в пуле процессов (масштабирование сбора по ядрам)
+    parse_pool_enabled: bool = False   #Разбирать страницы источников в отдельных процессах
+    parse_pool_size: int = 0           #Число процессов пула (0 — по числу ядер минус одно)
+
+    # Непрерывная публикация из приоритетной очереди (вместо публикации раз в 30 минут)
+    continuous_publish_enabled: bool = False  #Включить очередь и частый сбор
+    continuous_publish_interval: float = 20.0  #Пауза между сообщениями (секунды)
+    continuous_poll_timeout: int = 5           #Сколько ждать новость в пустой очереди за раз (секунды)
+    continuous_collect_interval: int = 60      #Период сбора новостей через beat (секунды)
+    publish_queue_keyword_boost: int = 600     #Бонус приоритета за каждое совпавшее ключевое слово (секунды свежести)
+    publish_queue_max_size: int = 500          #Максимум новостей в очереди (вытесняются наименее приоритетные)
+
+    # Ранжирование кандидатов на публикацию
+    scoring_enabled: bool = True           #Публиковать самые релевантные новости, а не первые по порядку сбора
+    scoring_half_life_hours: float = 24.0  #Период полураспада оценки по возрасту новости (0 — без затухания)
+    scoring_default_weight: float = 1.0    #Вес ключевого слова, которого нет в справочнике
+    scoring_base_score: float = 1.0        #Базовая оценка (новости без совпадений ранжируются по свежести)
+
+    # Результаты задач сбора: пачка новостей хранится один раз в сжатом ключе Redis, задача возвращает ссылку
+    claim_check_enabled: bool = False  #Возвращать из collect_news ссылку вместо списка новостей
+    claim_check_ttl: int = 3600        #Сколько хранить пачку (секунды)
+
+    # Очереди Celery: ручные запуски не ждут плановых и массовых задач
+    celery_interactive_queue: str = "newsbot.interactive"  #POST /publish и другие запуски оператора
+    celery_bulk_queue: str = "newsbot.bulk"                #Задачи beat, сбор и догоняющий сбор
+    task_latency_samples: int = 500   #Сколько последних замеров ожидания/выполнения хранить на очередь
+
+    # Догоняющий сбор (страницы 2..N ленты источника)
+    backfill_max_pages: int = 10       #Максимальный номер страницы
+    backfill_concurrency: int = 4      #Сколько страниц загружать одновременно
+    backfill_backlog_ttl: int = 24 * 3600  #Сколько найденные новости ждут публикации в режиме по умолчанию (секунды)
+
+    # Circuit breaker источников (состояние общее для всех воркеров, хранится в Redis)
+    breaker_failure_threshold: int = 3     #Сколько сбоев подряд открывают breaker
+    breaker_slow_seconds: float = 5.0      #Ответ дольше этого считается сбоем
+    breaker_open_seconds: int = 60         #Пауза до первой пробы после открытия
+    breaker_max_open_seconds: int = 1800   #Максимальная пауза (пауза удваивается при каждой неудачной пробе)
+
     @property
     def keywords_list(self) -> list[str]:
         """Список ключевых слов для фильтрации новостей.
@@ -0,0 +1,15 @@
+"""Ключи Redis, общие для API, задач Celery и публикатора.
+Вынесены в отдельный лёгкий модуль, чтобы API не импортировал Celery ради констант.
+"""
+
+# Справочник ключевых слов (CRUD /api/keywords/, JSON-список)
+KEYWORDS_KEY = "keywords:list"
+
+# История публикаций (Redis list JSON-записей, для GET /posts)
+PUBLISHED_POSTS_KEY = "posts:published"
+
+# id задачи публикации, запущенной вручную и ещё не завершённой
+PUBLISH_TRIGGER_KEY = "singleflight:publish:task_id"
+
+# URL новостей, уже встречавшихся при сборе (Redis set)
+NEWS_URL_SEEN_KEY = "new:urls_seen"
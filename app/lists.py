@@ -0,0 +1,44 @@
+"""Справочники в Redis (источники, ключевые слова, каналы): JSON-список объектов под одним ключом.
+Общий код для CRUD-маршрутов API и массового импорта (app.bulk).
+"""
+import json
+from typing import Any
+
+from redis import Redis
+
+from app.redis_client import bump_data_version, get_redis_client
+
+
+def load_list(key: str, client: Redis | None = None) -> list[dict[str, Any]]:
+    """Загрузить список объектов из Redis по ключу. client — например, pipeline под WATCH."""
+    client = client or get_redis_client()
+    raw = client.get(key)
+    if not raw:
+        return []
+    try:
+        data = json.loads(raw)
+        if isinstance(data, list):
+            return [x for x in data if isinstance(x, dict)]
+    except json.JSONDecodeError:
+        return []
+    return []
+
+
+def save_list(key: str, items: list[dict[str, Any]]) -> None:
+    """Сохранить список объектов в Redis вместе с новой версией коллекции."""
+    client = get_redis_client()
+    pipe = client.pipeline(transaction=True)
+    pipe.set(key, json.dumps(items, ensure_ascii=False))
+    bump_data_version(pipe, key)
+    pipe.execute()
+
+
+def next_id(items: list[dict[str, Any]]) -> int:
+    """Сгенерировать следующий id для новой записи."""
+    max_id = 0
+    for it in items:
+        try:
+            max_id = max(max_id, int(it.get("id", 0)))
+        except (TypeError, ValueError):
+            continue
+    return max_id + 1
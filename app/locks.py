@@ -0,0 +1,179 @@
+"""Распределённые блокировки на Redis.
+- LeaseLock: блокировка с арендой (TTL) и fencing-токеном (монотонный счётчик INCR)
+- single_flight: параллельные вызовы одной операции присоединяются к результату уже идущего запуска
+"""
+import json
+import logging
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Callable, Iterator
+
+from redis import Redis
+
+from app.redis_client import get_redis_client
+
+logger = logging.getLogger(__name__)
+
+LOCK_KEY_PREFIX = "lock:"
+FENCING_KEY_PREFIX = "lock:fencing:"
+SINGLE_FLIGHT_RESULT_PREFIX = "singleflight:result:"
+
+# Удалить/продлить ключ, только если он всё ещё принадлежит нам
+_RELEASE_SCRIPT = """
+if redis.call('get', KEYS[1]) == ARGV[1] then
+    return redis.call('del', KEYS[1])
+end
+return 0
+"""
+_EXTEND_SCRIPT = """
+if redis.call('get', KEYS[1]) == ARGV[1] then
+    return redis.call('pexpire', KEYS[1], ARGV[2])
+end
+return 0
+"""
+
+
+def release_if_equals(key: str, value: str, client: Redis | None = None) -> bool:
+    """Удалить ключ, только если в нём записано value (compare-and-delete)."""
+    client = client or get_redis_client()
+    return bool(client.eval(_RELEASE_SCRIPT, 1, key, value))
+
+
+class LockLost(RuntimeError):
+    """Аренда блокировки истекла или перехвачена другим процессом."""
+
+
+class LockBusy(RuntimeError):
+    """Операция уже выполняется другим процессом, результат дождаться не удалось."""
+
+
+class LeaseLock:
+    """Блокировка с арендой. Значение ключа — fencing-токен владельца:
+    каждый новый захват получает больший токен, поэтому «опоздавший» владелец
+    не пройдёт проверку is_owned() и не сможет записать результат.
+    """
+
+    def __init__(self, name: str, ttl_seconds: int, client: Redis | None = None):
+        self.name = name
+        self.key = f"{LOCK_KEY_PREFIX}{name}"
+        self.ttl_ms = int(ttl_seconds * 1000)
+        self.client = client or get_redis_client()
+        self.token: str | None = None
+
+    def acquire(self) -> bool:
+        """Попытаться захватить блокировку (без ожидания)."""
+        token = str(self.client.incr(f"{FENCING_KEY_PREFIX}{self.name}"))
+        if self.client.set(self.key, token, nx=True, px=self.ttl_ms):
+            self.token = token
+            return True
+        return False
+
+    def extend(self) -> bool:
+        """Продлить аренду, если блокировка всё ещё наша."""
+        if self.token is None:
+            return False
+        return bool(self.client.eval(_EXTEND_SCRIPT, 1, self.key, self.token, self.ttl_ms))
+
+    @contextmanager
+    def heartbeat(self) -> Iterator["LeaseLock"]:
+        """Продлевать аренду из фонового потока каждую треть TTL, пока выполняется блок with.
+            Операция может идти дольше TTL: блокировка не истечёт, пока процесс жив.
+            Если продлить не удалось (аренда уже потеряна), поток останавливается с записью в лог.
+        """
+        stop = threading.Event()
+
+        def beat() -> None:
+            while not stop.wait(self.ttl_ms / 3000):
+                try:
+                    extended = self.extend()
+                except Exception:
+                    logger.exception("Не получилось продлить блокировку %s", self.name)
+                    continue
+                if not extended:
+                    logger.warning("Блокировка %s потеряна, продление остановлено", self.name)
+                    return
+
+        thread = threading.Thread(target=beat, name=f"lease-heartbeat-{self.name}", daemon=True)
+        thread.start()
+        try:
+            yield self
+        finally:
+            stop.set()
+            thread.join()
+
+    def release(self) -> bool:
+        """Освободить блокировку, если она всё ещё наша."""
+        if self.token is None:
+            return False
+        released = bool(self.client.eval(_RELEASE_SCRIPT, 1, self.key, self.token))
+        self.token = None
+        return released
+
+    def is_owned(self) -> bool:
+        """Проверить, что блокировка принадлежит нам (fencing-проверка)."""
+        return self.token is not None and self.client.get(self.key) == self.token
+
+    def holder_token(self) -> str | None:
+        """Токен текущего владельца (или None, если блокировка свободна)."""
+        return self.client.get(self.key)
+
+    def __enter__(self) -> "LeaseLock":
+        if not self.acquire():
+            raise LockBusy(f"Блокировка {self.name!r} уже захвачена")
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.release()
+
+
+def single_flight(
+    name: str,
+    func: Callable[[], Any],
+    ttl_seconds: int,
+    wait_timeout: float,
+    result_ttl: int = 60,
+    poll_interval: float = 0.2,
+) -> Any:
+    """Выполнить func не более чем в одном экземпляре на весь кластер.
+        Если операция уже идёт, дождаться её результата (результат должен сериализоваться в JSON).
+        Если владелец пропал без результата — выполнить операцию самостоятельно.
+        Пока func выполняется, аренда ttl_seconds продлевается (LeaseLock.heartbeat), поэтому ttl_seconds
+        ограничивает только время до освобождения блокировки упавшим владельцем, а не время работы func.
+        По истечении wait_timeout бросает LockBusy.
+    """
+    client = get_redis_client()
+    lock = LeaseLock(name, ttl_seconds, client=client)
+    deadline = time.monotonic() + wait_timeout
+
+    while True:
+        if lock.acquire():
+            try:
+                with lock.heartbeat():
+                    result = func()
+                client.set(
+                    f"{SINGLE_FLIGHT_RESULT_PREFIX}{name}:{lock.token}",
+                    json.dumps(result, ensure_ascii=False),
+                    ex=result_ttl,
+                )
+                return result
+            finally:
+                lock.release()
+
+        holder = lock.holder_token()
+        logger.info("single_flight %s: уже выполняется (token=%s), ждём результат", name, holder)
+
+        while holder is not None:
+            raw = client.get(f"{SINGLE_FLIGHT_RESULT_PREFIX}{name}:{holder}")
+            if raw is not None:
+                return json.loads(raw)
+            if time.monotonic() >= deadline:
+                raise LockBusy(f"Операция {name!r} уже выполняется")
+            time.sleep(poll_interval)
+            current = lock.holder_token()
+            if current != holder:
+                # Владелец закончил: результат мог появиться между проверками
+                raw = client.get(f"{SINGLE_FLIGHT_RESULT_PREFIX}{name}:{holder}")
+                if raw is not None:
+                    return json.loads(raw)
+                holder = current
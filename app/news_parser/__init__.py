@@ -1,19 +1,27 @@
 from __future__ import annotations
 
+import json
 import logging
-from typing import Any
-
-from app.schemas import NewsItem
-from app.news_parser import habr, rbc
+import time
+from typing import Any, Callable
+
+from app.batch import NewsBatch, validate_urls
+from app.config import settings
+from app.redis_client import get_redis_client
+from app.schemas import NEWS_SOURCE_MAX_LENGTH, NEWS_TITLE_MAX_LENGTH, Source
+from app.news_parser import telegram
 from app.utils import generate_news_id, normalize_published_at
 
 logger = logging.getLogger(__name__)
 
 NEWS_SOURCES = ["habr", "rbc"]
 
+# Redis key для CRUD источников
+SOURCES_KEY = "sources:list"
+
 
-def normalize_raw_news(source_name: str, raw_item: dict[str, Any]) -> NewsItem:
-    """Привести сырую новость к формату NewsItem"""
+def _raw_fields(source_name: str, raw_item: dict[str, Any]) -> dict[str, Any]:
+    """Поля новости из «сырого» словаря (до проверки схемой NewsItem)."""
     raw_title = raw_item.get("title", "")
     title = str(raw_title).strip()
 
@@ -32,27 +40,155 @@ def normalize_raw_news(source_name: str, raw_item: dict[str, Any]) -> NewsItem:
     raw_published_at = raw_item.get("published_at") or raw_item.get("date")
     published_at = normalize_published_at(raw_published_at)
 
-    news_id = generate_news_id(source=source, url=url)
-
-    return NewsItem(
-        id=news_id,
-        title=title,
-        url=url,
-        summary=summary,
-        source=source,
-        published_at=published_at,
-        keywords=[],
-    )
+    raw_text = raw_item.get("raw_text") or raw_item.get("text") or None
 
+    news_id = generate_news_id(source=source, url=url)
 
-def collect_from_all_sources() -> list[NewsItem]:
-    """Собрать и нормализовать новости из всех источников"""
-    collected_news: list[NewsItem] = []
+    return {
+        "id": news_id,
+        "title": title,
+        "url": url,
+        "summary": summary,
+        "source": source,
+        "published_at": published_at,
+        "raw_text": str(raw_text) if raw_text is not None else None,
+    }
+
+
+def load_tg_sources() -> list[Source]:
+    """Загрузить активные Telegram-источники (type="tg") из Redis."""
+    client = get_redis_client()
+    raw = client.get(SOURCES_KEY)
+    if not raw:
+        return []
+
+    try:
+        data = json.loads(raw)
+    except json.JSONDecodeError:
+        return []
+
+    sources: list[Source] = []
+    for x in data if isinstance(data, list) else []:
+        try:
+            source = Source(**x)
+        except (TypeError, ValueError):
+            continue
+        if source.type == "tg" and source.enabled:
+            sources.append(source)
+    return sources
+
+
+def fetch_with_breaker(source_name: str, fetch: Callable[[float], Any]) -> Any | None:
+    """Выполнить загрузку источника fetch(timeout) через circuit breaker.
+        Пока breaker открыт, источник пропускается без сетевого запроса (результат None).
+        Ошибка загрузки или ответ медленнее settings.breaker_slow_seconds считаются сбоем.
+    """
+    from app.circuit_breaker import CircuitBreaker
+
+    breaker = CircuitBreaker(source_name)
+    if not breaker.allow_request():
+        logger.info("Источник %s пропущен: circuit breaker открыт", source_name)
+        return None
+
+    start = time.monotonic()
+    try:
+        result = fetch(settings.fetch_timeout)
+    except Exception as exc:
+        breaker.record_failure(f"ошибка загрузки: {exc}")
+        logger.warning("Ошибка при загрузке новостей из источника=%s: %s", source_name, exc)
+        return None
+
+    elapsed = time.monotonic() - start
+    if elapsed > settings.breaker_slow_seconds:
+        breaker.record_failure(f"медленный ответ {elapsed:.1f}s")
+    else:
+        breaker.record_success()
+
+    return result
+
+
+def fetch_site_raw(
+    source_name: str,
+    fetch_items: Callable[..., list[dict]],
+    limit: int = 20,
+) -> list[dict]:
+    """Загрузить и распарсить страницу источника через circuit breaker.
+        fetch_items(limit=, timeout=) возвращает «сырые» новости или бросает исключение.
+    """
+    raw_items = fetch_with_breaker(source_name, lambda timeout: fetch_items(limit=limit, timeout=timeout))
+    return raw_items or []
+
+
+def normalize_raw_batch(source_name: str, raw_items: list[dict[str, Any]]) -> NewsBatch:
+    """Нормализовать «сырые» новости источника в пачку NewsBatch без создания NewsItem.
+        Ограничения схемы NewsItem проверяются здесь же (URL — одним вызовом на всю пачку),
+        некорректные новости пропускаются с записью в лог.
+    """
+    rows: list[dict[str, Any]] = []
+    for raw_item in raw_items:
+        try:
+            fields = _raw_fields(source_name, raw_item)
+        except Exception:
+            logger.exception(
+                "Не получилось нормализовать новость (source=%s) raw_item=%r",
+                source_name,
+                raw_item,
+            )
+            continue
+        if not (
+            1 <= len(fields["title"]) <= NEWS_TITLE_MAX_LENGTH
+            and 1 <= len(fields["source"]) <= NEWS_SOURCE_MAX_LENGTH
+        ):
+            logger.warning("Некорректный заголовок или источник новости (source=%s): %r", source_name, raw_item)
+            continue
+        rows.append(fields)
 
-    sources: list[tuple[str, Any]] = [
-        ("habr", habr.fetch_habr_news_raw),
-        ("rbc", rbc.fetch_rbc_news_raw),
-    ]
+    urls, invalid = validate_urls([fields["url"] for fields in rows])
+    batch = NewsBatch()
+    for index, (fields, url) in enumerate(zip(rows, urls)):
+        if index in invalid:
+            logger.warning("Неверный URL в новости (source=%s): %r", source_name, fields["url"])
+            continue
+        fields["url"] = url
+        batch.append(**fields)
+    return batch
+
+
+def collect_from_all_sources(include_tg: bool = True) -> tuple[NewsBatch, dict[str, int]]:
+    """Собрать и нормализовать новости из всех источников.
+        Возвращает новости и high-water mark прочитанных Telegram-каналов: вызывающий фиксирует их
+        (telegram.commit_tg_marks) после сохранения новостей. include_tg=False — без Telegram-источников.
+    """
+    # requests и BeautifulSoup нужны только при реальном сборе, а не при импорте пакета
+    from app.news_parser import habr, rbc
+
+    collected_news = NewsBatch()
+    sources: list[tuple[str, Any]] = []
+
+    if settings.parse_pool_enabled:
+        # Разбор HTML и нормализация выполняются в пуле процессов, здесь — только загрузка
+        from app.news_parser.pool import collect_sites_in_pool
+
+        collected_news.extend(
+            collect_sites_in_pool([("habr", habr.fetch_habr_html), ("rbc", rbc.fetch_rbc_html)])
+        )
+    else:
+        sources.extend(
+            [
+                ("habr", lambda: fetch_site_raw("habr", habr.fetch_habr_items)),
+                ("rbc", lambda: fetch_site_raw("rbc", rbc.fetch_rbc_items)),
+            ]
+        )
+
+    tg_marks: dict[str, int] = {}
+    tg_sources = load_tg_sources() if include_tg else []
+    if tg_sources:
+        def fetch_tg() -> list[dict[str, Any]]:
+            raw_items, marks = telegram.fetch_tg_sources_raw(tg_sources)
+            tg_marks.update(marks)
+            return raw_items
+
+        sources.append(("telegram", fetch_tg))
 
     for source_name, fetch_func in sources:
         try:
@@ -61,17 +197,27 @@ def collect_from_all_sources() -> list[NewsItem]:
             logger.exception("Ошибка при парсинге новостей из источника=%s", source_name)
             continue
 
-        for raw_item in raw_items:
-            try:
-                news_item = normalize_raw_news(source_name=source_name, raw_item=raw_item)
-            except Exception:
-                logger.exception(
-                    "Не получилось нормализовать новость (source=%s) raw_item=%r",
-                    source_name,
-                    raw_item,
-                )
-                continue
+        collected_news.extend(normalize_raw_batch(source_name, raw_items))
 
-            collected_news.append(news_item)
+    return collected_news, tg_marks
 
-    return collected_news
\ No newline at end of file
+
+def collect_from_all_sources_coalesced(include_tg: bool = True) -> tuple[NewsBatch, dict[str, int]]:
+    """Собрать новости из всех источников в режиме single-flight:
+        если сбор уже идёт (API, beat, другой воркер), дождаться его результата вместо повторного парсинга.
+        Результат — как у collect_from_all_sources; если сбор начат без Telegram (include_tg=False),
+        ожидающие получают его результат без Telegram-новостей, они будут прочитаны следующим сбором.
+    """
+    from app.locks import single_flight
+
+    def collect() -> dict[str, Any]:
+        batch, tg_marks = collect_from_all_sources(include_tg)
+        return {"batch": batch.to_columns(), "tg_marks": tg_marks}
+
+    result = single_flight(
+        "collect",
+        collect,
+        ttl_seconds=settings.collect_lock_ttl,
+        wait_timeout=settings.collect_wait_timeout,
+    )
+    return NewsBatch.from_columns(result["batch"]), result["tg_marks"]
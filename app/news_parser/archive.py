@@ -0,0 +1,181 @@
+""" Архив загруженных страниц источников (settings.archive_enabled).
+Каждая страница, загруженная парсерами сайтов, сжимается отдельным кадром zstd (без zstandard — zlib)
+и дописывается в файл-сегмент на локальном диске:
+
+    <archive_dir>/<ГГГГ-ММ-ДД>/<источник>-<pid>-<номер>.seg
+    <archive_dir>/<ГГГГ-ММ-ДД>/index.jsonl
+
+Строка индекса описывает одну страницу: время, источник, URL, сегмент, смещение и длину кадра.
+Каталоги дней старше settings.archive_retention_days удаляются при первой записи процесса за новый день.
+Каждый процесс пишет в свои сегменты, а строка индекса дописывается одной записью в режиме append,
+поэтому воркеры и пул разбора не мешают друг другу. По архиву app.news_parser.replay
+повторяет разбор, нормализацию и сопоставление без обращения к сети.
+"""
+import json
+import logging
+import os
+import shutil
+import threading
+import zlib
+from datetime import date, datetime, timedelta, timezone
+from pathlib import Path
+from typing import Any, Iterator
+
+from app.config import settings
+
+try:
+    import zstandard
+except ImportError:  # zstd необязателен: без него используется zlib
+    zstandard = None
+
+logger = logging.getLogger(__name__)
+
+ARCHIVE_INDEX_NAME = "index.jsonl"
+ARCHIVE_SEGMENT_SUFFIX = ".seg"
+
+CODEC_ZSTD = "zstd"
+CODEC_ZLIB = "zlib"
+
+_write_lock = threading.Lock()
+# Текущий сегмент процесса для каждого (день, источник): номер сегмента
+_segments: dict[tuple[str, str], int] = {}
+# День, за который процесс уже удалил устаревшие каталоги архива
+_pruned_day: date | None = None
+
+
+def archive_root() -> Path:
+    return Path(settings.archive_dir)
+
+
+def day_dir(day: date) -> Path:
+    return archive_root() / day.isoformat()
+
+
+def _compress(body: bytes) -> tuple[str, bytes]:
+    if zstandard is not None:
+        return CODEC_ZSTD, zstandard.ZstdCompressor(level=settings.archive_compress_level).compress(body)
+    return CODEC_ZLIB, zlib.compress(body, 6)
+
+
+def _decompress(codec: str, frame: bytes) -> bytes:
+    if codec == CODEC_ZSTD:
+        if zstandard is None:
+            raise RuntimeError("Страница сжата zstd, а пакет zstandard не установлен")
+        return zstandard.ZstdDecompressor().decompress(frame)
+    return zlib.decompress(frame)
+
+
+def prune_archive(today: date) -> list[str]:
+    """Удалить каталоги дней старше settings.archive_retention_days (0 — хранить всё).
+        Возвращает имена удалённых каталогов. Каталоги с именем не в формате ГГГГ-ММ-ДД не трогаются.
+    """
+    if settings.archive_retention_days <= 0 or not archive_root().is_dir():
+        return []
+
+    oldest = today - timedelta(days=settings.archive_retention_days)
+    removed: list[str] = []
+    for path in archive_root().iterdir():
+        try:
+            day = date.fromisoformat(path.name)
+        except ValueError:
+            continue
+        if day < oldest and path.is_dir():
+            shutil.rmtree(path, ignore_errors=True)
+            removed.append(path.name)
+
+    for key in [key for key in _segments if key[0] in removed]:
+        del _segments[key]
+    if removed:
+        logger.info(
+            "Архив: удалены дни %s (хранение %s дн.)", ", ".join(sorted(removed)), settings.archive_retention_days
+        )
+    return removed
+
+
+def _segment_path(directory: Path, source_name: str) -> Path:
+    """Сегмент процесса для источника; новый, когда текущий превысил settings.archive_segment_max_bytes."""
+    key = (directory.name, source_name)
+    number = _segments.get(key, 0)
+    while True:
+        path = directory / f"{source_name}-{os.getpid()}-{number}{ARCHIVE_SEGMENT_SUFFIX}"
+        if not path.exists() or path.stat().st_size < settings.archive_segment_max_bytes:
+            _segments[key] = number
+            return path
+        number += 1
+
+
+def archive_page(source_name: str, url: str, body: bytes, encoding: str | None = None) -> None:
+    """Сохранить загруженную страницу в архив. Ошибки записи только логируются: сбор не прерывается."""
+    if not settings.archive_enabled or not body:
+        return
+
+    global _pruned_day
+
+    fetched_at = datetime.now(timezone.utc)
+    try:
+        codec, frame = _compress(body)
+        directory = day_dir(fetched_at.date())
+        with _write_lock:
+            if _pruned_day != fetched_at.date():
+                _pruned_day = fetched_at.date()
+                prune_archive(_pruned_day)
+            directory.mkdir(parents=True, exist_ok=True)
+            segment = _segment_path(directory, source_name)
+            with segment.open("ab") as f:
+                offset = f.tell()
+                f.write(frame)
+
+            entry = {
+                "ts": fetched_at.isoformat(),
+                "source": source_name,
+                "url": url,
+                "segment": segment.name,
+                "offset": offset,
+                "length": len(frame),
+                "size": len(body),
+                "codec": codec,
+                "encoding": encoding or "utf-8",
+            }
+            with (directory / ARCHIVE_INDEX_NAME).open("a", encoding="utf-8") as f:
+                f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+    except OSError:
+        logger.exception("Не получилось сохранить страницу %s в архив", url)
+        return
+
+    logger.debug("Архив: %s, %s -> %s байт (%s)", url, len(body), len(frame), segment.name)
+
+
+def iter_days(since: date, until: date) -> Iterator[date]:
+    day = since
+    while day <= until:
+        yield day
+        day += timedelta(days=1)
+
+
+def iter_entries(since: date, until: date, source_name: str | None = None) -> Iterator[dict[str, Any]]:
+    """Строки индекса за дни since..until включительно (в порядке записи), с полем "day"."""
+    for day in iter_days(since, until):
+        index_path = day_dir(day) / ARCHIVE_INDEX_NAME
+        if not index_path.exists():
+            continue
+        with index_path.open(encoding="utf-8") as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except json.JSONDecodeError:
+                    # Строка, недописанная при аварийной остановке процесса
+                    logger.warning("Архив: повреждённая строка индекса в %s", index_path)
+                    continue
+                if source_name and entry.get("source") != source_name:
+                    continue
+                entry["day"] = day.isoformat()
+                yield entry
+
+
+def read_page(entry: dict[str, Any], root: Path | None = None) -> str:
+    """Прочитать и распаковать страницу по строке индекса."""
+    path = (root or archive_root()) / entry["day"] / entry["segment"]
+    with path.open("rb") as f:
+        f.seek(entry["offset"])
+        frame = f.read(entry["length"])
+    return _decompress(entry["codec"], frame).decode(entry.get("encoding") or "utf-8", errors="replace")
@@ -0,0 +1,169 @@
+""" Догоняющий сбор после простоя: страницы 2..N ленты источника.
+Страницы загружаются параллельно окнами по settings.backfill_concurrency запросов
+и обрабатываются по порядку; обход останавливается на первой странице, где все URL уже встречались
+(или страница пуста/не загрузилась), — дальше лежат только более старые новости.
+Встречавшиеся URL отмечает каждый сбор: задача collect_news и публикация по расписанию.
+
+Страницы идут через отдельный circuit breaker (backfill:<источник>): медленные старые страницы
+не открывают breaker основного сбора.
+
+В режиме по умолчанию (без outbox и непрерывной публикации) найденные новости откладываются
+в backfill:backlog: публикатор берёт их в кандидаты вместе со свежими. Каждая новость ждёт
+не дольше settings.backfill_backlog_ttl с момента, когда её нашли, и удаляется из backlog при публикации.
+"""
+import json
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from functools import partial
+from typing import Any, Callable
+
+from app.batch import NewsBatch
+from app.config import settings
+from app.keys import NEWS_URL_SEEN_KEY
+from app.redis_client import get_redis_client
+
+logger = logging.getLogger(__name__)
+
+# Сколько новостей брать со страницы: страница ленты разбирается целиком
+BACKFILL_PAGE_LIMIT = 100
+
+# У RBC лента подгружается скриптом и постраничных URL нет, поэтому догоняющий сбор только для Habr
+PAGINATED_SOURCES = ("habr",)
+
+
+def paginated_sources() -> dict[str, Callable[..., list[dict]]]:
+    """Источники с постраничной лентой (PAGINATED_SOURCES): имя -> fetch_items(limit=, timeout=, page=)."""
+    from app.news_parser import habr
+
+    return {"habr": habr.fetch_habr_items}
+
+
+# Hash id новости -> JSON новости, найденной догоняющим сбором и ожидающей публикации
+BACKFILL_BACKLOG_KEY = "backfill:backlog"
+# Sorted set id новости -> время, когда её нашли (для удаления по settings.backfill_backlog_ttl)
+BACKFILL_BACKLOG_ADDED_KEY = "backfill:backlog:added"
+
+# Префикс имени circuit breaker догоняющего сбора
+BACKFILL_BREAKER_PREFIX = "backfill:"
+
+
+def mark_urls_as_seen(urls: list[str]) -> None:
+    """Добавить URL в множество встречавшихся."""
+    if not urls:
+        return
+    get_redis_client().sadd(NEWS_URL_SEEN_KEY, *urls)
+
+
+def unseen_urls(urls: list[str]) -> list[str]:
+    """URL, которых ещё нет в множестве встречавшихся."""
+    if not urls:
+        return []
+    flags = get_redis_client().smismember(NEWS_URL_SEEN_KEY, urls)
+    return [url for url, seen in zip(urls, flags) if not seen]
+
+
+def backfill_source_raw(
+    source_name: str,
+    max_pages: int | None = None,
+    concurrency: int | None = None,
+) -> list[dict[str, Any]]:
+    """Загрузить «сырые» новости со страниц 2..max_pages источника, пока попадаются новые URL."""
+    from app.news_parser import fetch_site_raw
+
+    fetch_items = paginated_sources().get(source_name)
+    if fetch_items is None:
+        raise ValueError(f"Источник {source_name!r} не поддерживает постраничный сбор")
+
+    max_pages = max_pages or settings.backfill_max_pages
+    concurrency = max(1, concurrency or settings.backfill_concurrency)
+
+    breaker_name = f"{BACKFILL_BREAKER_PREFIX}{source_name}"
+    collected: list[dict[str, Any]] = []
+    page = 2
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        while page <= max_pages:
+            window = list(range(page, min(page + concurrency, max_pages + 1)))
+            # Через fetch_site_raw со своим breaker: пока он открыт, страницы не запрашиваются,
+            # а сбои старых страниц не открывают breaker основного сбора
+            results = executor.map(
+                lambda p: fetch_site_raw(breaker_name, partial(fetch_items, page=p), limit=BACKFILL_PAGE_LIMIT),
+                window,
+            )
+
+            for current_page, raw_items in zip(window, results):
+                fresh = set(unseen_urls([str(x.get("url")) for x in raw_items if x.get("url")]))
+                logger.info(
+                    "Backfill %s: страница %s, новостей=%s, новых=%s",
+                    source_name,
+                    current_page,
+                    len(raw_items),
+                    len(fresh),
+                )
+                if not fresh:
+                    return collected
+                collected.extend(x for x in raw_items if x.get("url") in fresh)
+
+            page += concurrency
+
+    return collected
+
+
+def store_backfill_backlog(batch: NewsBatch) -> None:
+    """Отложить новости догоняющего сбора для публикатора (режим по умолчанию).
+        Время ожидания считается от первого добавления: повторно найденная новость его не продлевает.
+    """
+    if not batch:
+        return
+    pipe = get_redis_client().pipeline(transaction=True)
+    pipe.hset(
+        BACKFILL_BACKLOG_KEY,
+        mapping={row.id: json.dumps(row.to_record(), ensure_ascii=False) for row in batch},
+    )
+    pipe.zadd(BACKFILL_BACKLOG_ADDED_KEY, {row.id: time.time() for row in batch}, nx=True)
+    pipe.execute()
+
+
+def remove_from_backlog(pipe, news_id: str) -> None:
+    """Убрать новость из backlog (в транзакции pipe, записывающей публикацию)."""
+    pipe.hdel(BACKFILL_BACKLOG_KEY, news_id)
+    pipe.zrem(BACKFILL_BACKLOG_ADDED_KEY, news_id)
+
+
+def prune_backfill_backlog() -> int:
+    """Удалить из backlog новости, ждущие дольше settings.backfill_backlog_ttl. Возвращает их число."""
+    client = get_redis_client()
+    expired_before = time.time() - settings.backfill_backlog_ttl
+    expired = client.zrangebyscore(BACKFILL_BACKLOG_ADDED_KEY, "-inf", expired_before)
+    if not expired:
+        return 0
+    pipe = client.pipeline(transaction=True)
+    pipe.hdel(BACKFILL_BACKLOG_KEY, *expired)
+    pipe.zrem(BACKFILL_BACKLOG_ADDED_KEY, *expired)
+    pipe.execute()
+    return len(expired)
+
+
+def load_backfill_backlog() -> NewsBatch:
+    """Отложенные новости догоняющего сбора (без совпавших слов: их заполняет публикатор).
+        Просроченные сначала удаляются (prune_backfill_backlog), опубликованные удаляет record_published.
+    """
+    prune_backfill_backlog()
+    batch = NewsBatch()
+    for raw in get_redis_client().hvals(BACKFILL_BACKLOG_KEY):
+        try:
+            record = json.loads(raw)
+            published_at = datetime.fromisoformat(record["published_at"]) if record.get("published_at") else None
+            batch.append(
+                record["id"],
+                record["title"],
+                record["url"],
+                record.get("summary"),
+                record["source"],
+                published_at,
+                record.get("raw_text"),
+            )
+        except (json.JSONDecodeError, KeyError, TypeError, ValueError):
+            logger.warning("Некорректная запись в %s: %r", BACKFILL_BACKLOG_KEY, raw)
+    return batch
@@ -2,11 +2,15 @@
 import logging
 
 import requests
-from bs4 import BeautifulSoup
+
+from app.config import settings
+from app.news_parser.streaming import LinkListExtractor, fetch_page, has_class, stream_list_items
 
 HABR_BASE_URL = "https://habr.com"
 HABR_NEWS_URL = f"{HABR_BASE_URL}/news/"
 HABR_ARTICLE_URL = f"{HABR_BASE_URL}/article/"
+# Страницы 2..N ленты новостей (для догоняющего сбора)
+HABR_NEWS_PAGE_URL = f"{HABR_NEWS_URL}page{{page}}/"
 
 HABR_CARD_SELECTOR = "article"
 HABR_TITLE_SELECTOR = "a"
@@ -24,6 +28,9 @@ def parser_habr_list_html(html: str, limit: int) -> list[dict]:
     """Распарсить HTML страницы новостей Habr.
         Извлекает заголовки и ссылки на новости.
     """
+    # BeautifulSoup нужен только без потокового режима (settings.fetch_streaming=False)
+    from bs4 import BeautifulSoup
+
     soup = BeautifulSoup(html, "html.parser")
     news_items: list[dict] = []
 
@@ -39,38 +46,86 @@ def parser_habr_list_html(html: str, limit: int) -> list[dict]:
         if relative_url is None:
             continue
 
-        if relative_url.startswith("http"):
-            full_url = relative_url
-        else:
-            full_url = f'https://habr.com{relative_url}'
-
         news_item = {
             'source': 'habr',
             'title': title_text,
-            'url': full_url,
+            'url': build_habr_url(relative_url),
         }
         news_items.append(news_item)
 
     return news_items
 
 
+def build_habr_url(relative_url: str) -> str:
+    if relative_url.startswith("http"):
+        return relative_url
+    return f"{HABR_BASE_URL}{relative_url}"
+
+
+class HabrListExtractor(LinkListExtractor):
+    """Потоковый аналог parser_habr_list_html: первая ссылка tm-title__link в каждом <article>."""
+
+    def __init__(self):
+        super().__init__()
+        self._article_depth = 0
+        self._article_done = False
+
+    def handle_starttag(self, tag: str, attrs: list[tuple[str, str | None]]) -> None:
+        if tag == HABR_CARD_SELECTOR:
+            if self._article_depth == 0:
+                self._article_done = False
+            self._article_depth += 1
+        super().handle_starttag(tag, attrs)
+
+    def handle_endtag(self, tag: str) -> None:
+        super().handle_endtag(tag)
+        if tag == HABR_CARD_SELECTOR and self._article_depth:
+            self._article_depth -= 1
+
+    def is_news_link(self, attrs: list[tuple[str, str | None]]) -> bool:
+        if not self._article_depth or self._article_done or not has_class(attrs, HABR_TITLE_LINK_SELECTOR):
+            return False
+        self._article_done = True
+        return True
+
+    def make_item(self, title: str, href: str) -> dict[str, str] | None:
+        return {
+            'source': 'habr',
+            'title': title,
+            'url': build_habr_url(href),
+        }
+
+
+def habr_page_url(page: int = 1) -> str:
+    return HABR_NEWS_URL if page <= 1 else HABR_NEWS_PAGE_URL.format(page=page)
+
+
+def fetch_habr_html(timeout: float = 10, page: int = 1) -> str:
+    """Загрузить HTML страницы новостей Habr (не больше settings.fetch_max_body_bytes).
+        Ошибки сети и HTTP-статусы пробрасываются как requests.RequestException.
+    """
+    return fetch_page(habr_page_url(page), DEFAULT_HEADERS, timeout, archive_source="habr")
+
+
+def fetch_habr_items(limit: int = 20, timeout: float = 10, page: int = 1) -> list[dict[str, str]]:
+    """Загрузить и распарсить новости Habr: потоком (settings.fetch_streaming) или целой страницей.
+        page > 1 — более старые страницы ленты.
+        Ошибки сети и HTTP-статусы пробрасываются как requests.RequestException.
+    """
+    if settings.fetch_streaming:
+        return stream_list_items(
+            habr_page_url(page), DEFAULT_HEADERS, HabrListExtractor(), limit, timeout, archive_source="habr"
+        )
+    return parser_habr_list_html(fetch_habr_html(timeout, page=page), limit=limit)
+
+
 def fetch_habr_news_raw(limit: int = 20) -> list[dict[str, str]]:
     """Загрузить и распарсить список новостей с Habr.
         Список "сырых" новостей в виде словарей.
         В случае ошибки возвращается пустой список.
     """
-    raw_items: list[dict[str, str]] = []
-
     try:
-        response = requests.get(HABR_NEWS_URL, headers=DEFAULT_HEADERS, timeout=10)
+        return fetch_habr_items(limit=limit, timeout=settings.fetch_timeout)
     except requests.RequestException as e:
         logger.warning(f'Ошибка при парсинге новостей с HABR {e}')
-        return raw_items
-
-    if response.status_code != 200:
-        logger.warning(f'При парсинге новостей с HABR - статус код: {response.status_code}')
-        return raw_items
-
-    raw_items = parser_habr_list_html(response.text, limit=limit)
-
-    return raw_items
\ No newline at end of file
+        return []
\ No newline at end of file
@@ -0,0 +1,28 @@
+""" HTTP-сессия для парсеров сайтов """
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from app.config import settings
+
+_session: requests.Session | None = None
+
+
+def get_session() -> requests.Session:
+    """Общая сессия requests: переиспользование соединений (keep-alive)
+    и повтор временных ошибок (502/503/504, обрыв соединения) с экспоненциальной паузой.
+    """
+    global _session
+    if _session is None:
+        retry = Retry(
+            total=settings.fetch_retries,
+            backoff_factor=settings.fetch_retry_backoff,
+            status_forcelist=(502, 503, 504),
+            allowed_methods=("GET",),
+            raise_on_status=False,
+        )
+        session = requests.Session()
+        session.mount("http://", HTTPAdapter(max_retries=retry))
+        session.mount("https://", HTTPAdapter(max_retries=retry))
+        _session = session
+    return _session
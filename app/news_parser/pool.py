@@ -0,0 +1,93 @@
+""" Разбор страниц источников в пуле процессов.
+Главный процесс только загружает HTML (через circuit breaker) и отправляет его в пул;
+BeautifulSoup-разбор и нормализация выполняются в дочерних процессах параллельно
+с загрузкой следующих источников. Результат возвращается компактной пачкой — колоночным JSON
+NewsBatch, который в главном процессе читается без создания моделей NewsItem.
+"""
+import json
+import logging
+import multiprocessing
+import os
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Callable
+
+from app.config import settings
+from app.batch import NewsBatch
+
+logger = logging.getLogger(__name__)
+
+_pool: ProcessPoolExecutor | None = None
+
+
+def default_pool_size() -> int:
+    """Размер пула по умолчанию: все ядра, кроме одного (оно остаётся загрузке и воркеру Celery)."""
+    return max(1, (os.cpu_count() or 2) - 1)
+
+
+def get_parse_pool() -> ProcessPoolExecutor:
+    """Общий пул процессов, создаётся при первом сборе и переиспользуется.
+        Процессы запускаются через spawn: форк воркера вместе с открытыми соединениями Redis небезопасен.
+    """
+    global _pool
+    if _pool is None:
+        size = settings.parse_pool_size or default_pool_size()
+        _pool = ProcessPoolExecutor(max_workers=size, mp_context=multiprocessing.get_context("spawn"))
+        logger.info("Пул разбора HTML: процессов=%s", size)
+    return _pool
+
+
+def site_parsers() -> dict[str, Callable[[str, int], list[dict]]]:
+    """Парсеры целой страницы источников: имя -> parse(html, limit)."""
+    from app.news_parser import habr, rbc
+
+    return {
+        "habr": habr.parser_habr_list_html,
+        "rbc": rbc.parse_rbc_list_html,
+    }
+
+
+def parse_batch(source_name: str, html: str, limit: int) -> bytes:
+    """Выполняется в дочернем процессе: разобрать HTML источника и нормализовать новости.
+        Возвращает колоночный JSON пачки NewsBatch.
+    """
+    from app.news_parser import normalize_raw_batch
+
+    raw_items = site_parsers()[source_name](html, limit)
+    return json.dumps(normalize_raw_batch(source_name, raw_items).to_columns(), ensure_ascii=False).encode("utf-8")
+
+
+def collect_sites_in_pool(
+    sites: list[tuple[str, Callable[..., str]]],
+    limit: int = 20,
+) -> NewsBatch:
+    """Загрузить страницы источников и разобрать их в пуле процессов.
+        sites — пары (источник, fetch_html(timeout=)). Ошибка одного источника не мешает остальным.
+    """
+    global _pool
+    from app.news_parser import fetch_with_breaker
+
+    pool = get_parse_pool()
+    futures: list[tuple[str, Future]] = []
+    for source_name, fetch_html in sites:
+        html = fetch_with_breaker(source_name, lambda timeout: fetch_html(timeout=timeout))
+        if html:
+            futures.append((source_name, pool.submit(parse_batch, source_name, html, limit)))
+
+    collected = NewsBatch()
+    for source_name, future in futures:
+        try:
+            batch = future.result()
+        except BrokenProcessPool:
+            # Дочерний процесс упал (например, OOM): следующий сбор создаст пул заново
+            logger.exception("Пул разбора HTML сломан, источник=%s пропущен", source_name)
+            _pool = None
+            continue
+        except Exception:
+            logger.exception("Ошибка при разборе страницы источника=%s в пуле процессов", source_name)
+            continue
+        items = NewsBatch.from_columns(json.loads(batch))
+        logger.info("Источник %s: разобрано в пуле новостей=%s (%s байт)", source_name, len(items), len(batch))
+        collected.extend(items)
+
+    return collected
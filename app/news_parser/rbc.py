@@ -2,7 +2,9 @@
 import logging
 
 import requests
-from bs4 import BeautifulSoup
+
+from app.config import settings
+from app.news_parser.streaming import LinkListExtractor, fetch_page, has_class, stream_list_items
 
 
 RBC_BASE_URL = "https://www.rbc.ru"
@@ -17,8 +19,17 @@ DEFAULT_HEADERS: dict[str, str] = {
 logger = logging.getLogger(__name__)
 
 
+def build_rbc_url(href: str) -> str:
+    if href.startswith("/"):
+        return f"{RBC_BASE_URL}{href}"
+    return href.strip()
+
+
 def parse_rbc_list_html(html: str, limit: int) -> list[dict[str, str]]:
     """Распарсить HTML страницы с новостями RBC."""
+    # BeautifulSoup нужен только без потокового режима (settings.fetch_streaming=False)
+    from bs4 import BeautifulSoup
+
     soup = BeautifulSoup(html, "html.parser")
     news_items: list[dict[str, str]] = []
 
@@ -31,16 +42,11 @@ def parse_rbc_list_html(html: str, limit: int) -> list[dict[str, str]]:
         if not title or not href:
             continue
 
-        if href.startswith("/"):
-            url = f"{RBC_BASE_URL}{href}"
-        else:
-            url = href.strip()
-
         news_items.append(
             {
                 "source": "rbc",
                 "title": title,
-                "url": url,
+                "url": build_rbc_url(href),
             }
         )
 
@@ -50,16 +56,47 @@ def parse_rbc_list_html(html: str, limit: int) -> list[dict[str, str]]:
     return news_items
 
 
+class RbcListExtractor(LinkListExtractor):
+    """Потоковый аналог parse_rbc_list_html: ссылки <a class="item__link">."""
+
+    def is_news_link(self, attrs: list[tuple[str, str | None]]) -> bool:
+        return has_class(attrs, "item__link")
+
+    def make_item(self, title: str, href: str) -> dict[str, str] | None:
+        if not title or not href:
+            return None
+        return {
+            "source": "rbc",
+            "title": title,
+            "url": build_rbc_url(href),
+        }
+
+
+def fetch_rbc_html(timeout: float = 10) -> str:
+    """Загрузить HTML страницы новостей RBC (не больше settings.fetch_max_body_bytes).
+        Ошибки сети и HTTP-статусы пробрасываются как requests.RequestException.
+    """
+    return fetch_page(RBC_NEWS_URL, DEFAULT_HEADERS, timeout, archive_source="rbc")
+
+
+def fetch_rbc_items(limit: int = 20, timeout: float = 10) -> list[dict[str, str]]:
+    """Загрузить и распарсить новости RBC: потоком (settings.fetch_streaming) или целой страницей.
+        Ошибки сети и HTTP-статусы пробрасываются как requests.RequestException.
+    """
+    if settings.fetch_streaming:
+        return stream_list_items(
+            RBC_NEWS_URL, DEFAULT_HEADERS, RbcListExtractor(), limit, timeout, archive_source="rbc"
+        )
+    return parse_rbc_list_html(fetch_rbc_html(timeout), limit=limit)
+
+
 def fetch_rbc_news_raw(limit: int = 20) -> list[dict[str, str]]:
     """Загрузить и распарсить список новостей с RBC.
         Список "сырых" новостей в виде словарей.
         В случае ошибки возвращается пустой список.
     """
     try:
-        response = requests.get(RBC_NEWS_URL, headers=DEFAULT_HEADERS, timeout=10)
-        response.raise_for_status()
+        return fetch_rbc_items(limit=limit, timeout=settings.fetch_timeout)
     except requests.RequestException as exc:
         logger.warning("Ошибка при запросе новостей RBC: %s", exc)
-        return []
-
-    return parse_rbc_list_html(response.text, limit=limit)
\ No newline at end of file
+        return []
\ No newline at end of file
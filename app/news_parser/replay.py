@@ -0,0 +1,176 @@
+""" Повторный разбор архива страниц (app.news_parser.archive) без обращения к сети.
+Страницы за диапазон дней делятся на пачки и разбираются в пуле процессов:
+разбор HTML текущими парсерами, нормализация и сопоставление с ключевыми словами.
+Так можно переобработать прошлые загрузки после исправления парсера или смены селекторов,
+а заодно использовать архив как реалистичный корпус для замера скорости разбора.
+
+    python -m app.news_parser.replay --since 2026-10-01 --until 2026-10-07
+    python -m app.news_parser.replay --source habr --keywords python,ai --output replay.ndjson
+"""
+import argparse
+import json
+import logging
+import multiprocessing
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date, datetime, timezone
+from pathlib import Path
+from typing import Any
+
+from app.batch import NewsBatch, news_json
+from app.config import settings
+from app.news_parser.archive import archive_root, iter_entries, read_page
+
+logger = logging.getLogger(__name__)
+
+# Сколько страниц отдавать дочернему процессу за раз
+REPLAY_PAGES_PER_TASK = 20
+# Предел новостей на страницу при повторном разборе: страница разбирается целиком
+REPLAY_PAGE_LIMIT = 1000
+
+
+def replay_pages(root: str, entries: list[dict[str, Any]], keywords: list[str], limit: int) -> tuple[int, bytes]:
+    """Выполняется в дочернем процессе: разобрать страницы из архива, нормализовать новости
+        и заполнить совпавшие ключевые слова. Возвращает (число ошибок, колоночный JSON пачки NewsBatch).
+    """
+    from app.news_parser import normalize_raw_batch
+    from app.news_parser.pool import site_parsers
+    from app.utils import match_keywords
+
+    parsers = site_parsers()
+    errors = 0
+    batch = NewsBatch()
+    for entry in entries:
+        parser = parsers.get(entry["source"])
+        if parser is None:
+            continue
+        try:
+            raw_items = parser(read_page(entry, Path(root)), limit)
+        except Exception:
+            logger.exception("Не получилось разобрать страницу %s из архива (%s)", entry["url"], entry["ts"])
+            errors += 1
+            continue
+        page = normalize_raw_batch(entry["source"], raw_items)
+        # Время загрузки страницы — верхняя граница времени публикации, если источник его не отдаёт
+        fetched_at = datetime.fromisoformat(entry["ts"])
+        page.published_at = [x or fetched_at for x in page.published_at]
+        page.keywords = [match_keywords(title, summary, keywords) for title, summary in zip(page.titles, page.summaries)]
+        batch.extend(page)
+    return errors, json.dumps(batch.to_columns(), ensure_ascii=False).encode("utf-8")
+
+
+def replay_archive(
+    since: date,
+    until: date,
+    source_name: str | None = None,
+    keywords: list[str] | None = None,
+    workers: int | None = None,
+    limit: int = REPLAY_PAGE_LIMIT,
+    dedupe: bool = True,
+) -> tuple[NewsBatch, dict[str, Any]]:
+    """Повторно разобрать архив за дни since..until включительно.
+        keywords — ключевые слова для сопоставления (по умолчанию объединение подписок каналов из Redis).
+        Возвращает новости (с dedupe — первое вхождение каждого id) и сводку прогона.
+    """
+    from app.news_parser.pool import default_pool_size
+
+    if keywords is None:
+        from app.routing import ChannelRouter
+
+        keywords = ChannelRouter.load().keywords
+
+    start = time.perf_counter()
+    entries = list(iter_entries(since, until, source_name))
+    tasks = [entries[i:i + REPLAY_PAGES_PER_TASK] for i in range(0, len(entries), REPLAY_PAGES_PER_TASK)]
+
+    items = NewsBatch()
+    errors = 0
+    if tasks:
+        size = min(len(tasks), workers or settings.parse_pool_size or default_pool_size())
+        root = str(archive_root())
+        with ProcessPoolExecutor(max_workers=size, mp_context=multiprocessing.get_context("spawn")) as pool:
+            futures = [pool.submit(replay_pages, root, task, keywords, limit) for task in tasks]
+            for future in futures:
+                task_errors, batch = future.result()
+                errors += task_errors
+                items.extend(NewsBatch.from_columns(json.loads(batch)))
+
+    parsed = len(items)
+    if dedupe:
+        first: dict[str, int] = {}
+        for index, news_id in enumerate(items.ids):
+            first.setdefault(news_id, index)
+        items = items.take(first.values())
+
+    elapsed = time.perf_counter() - start
+    summary = {
+        "pages": len(entries),
+        "page_bytes": sum(entry.get("size", 0) for entry in entries),
+        "errors": errors,
+        "parsed": parsed,
+        "unique": len(items),
+        "matched": sum(1 for keywords in items.keywords if keywords),
+        "elapsed_s": round(elapsed, 3),
+        "pages_per_s": round(len(entries) / elapsed, 1) if elapsed else None,
+    }
+    return items, summary
+
+
+def _parse_day(value: str) -> date:
+    return date.fromisoformat(value)
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Повторный разбор архива страниц источников")
+    today = datetime.now(timezone.utc).date()
+    parser.add_argument("--since", type=_parse_day, default=today, help="Первый день (ГГГГ-ММ-ДД), по умолчанию сегодня")
+    parser.add_argument("--until", type=_parse_day, default=today, help="Последний день включительно")
+    parser.add_argument("--source", default=None, help="Только этот источник (habr, rbc)")
+    parser.add_argument("--archive-dir", default=None, help=f"Каталог архива (по умолчанию {settings.archive_dir})")
+    parser.add_argument(
+        "--keywords",
+        default=None,
+        help="Ключевые слова через запятую; по умолчанию — подписки каналов из Redis",
+    )
+    parser.add_argument("--workers", type=int, default=None, help="Число процессов разбора")
+    parser.add_argument("--limit", type=int, default=REPLAY_PAGE_LIMIT, help="Максимум новостей со страницы")
+    parser.add_argument("--no-dedupe", action="store_true", help="Не схлопывать одну новость из разных загрузок")
+    parser.add_argument("--matched-only", action="store_true", help="Выводить только новости с совпадениями")
+    parser.add_argument("--output", metavar="PATH", help="Записать новости в NDJSON")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    if args.archive_dir:
+        settings.archive_dir = args.archive_dir
+
+    keywords = None
+    if args.keywords is not None:
+        from app.utils import prepare_keywords
+
+        keywords = prepare_keywords(args.keywords.split(","))
+
+    items, summary = replay_archive(
+        args.since,
+        args.until,
+        source_name=args.source,
+        keywords=keywords,
+        workers=args.workers,
+        limit=args.limit,
+        dedupe=not args.no_dedupe,
+    )
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            for item in items:
+                if args.matched_only and not item.keywords:
+                    continue
+                f.write(news_json(item) + "\n")
+
+    for name, value in summary.items():
+        print(f"{name:<12} {value}")
+    return 1 if summary["errors"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,156 @@
+""" Потоковая загрузка и разбор страниц-списков новостей.
+Ответ читается кусками и сразу подаётся в инкрементальный HTML-токенизер (html.parser.HTMLParser),
+без полного текста страницы и DOM в памяти. Загрузка прекращается, как только извлечено limit новостей,
+либо при достижении settings.fetch_max_body_bytes.
+С settings.archive_enabled прочитанная часть страницы сохраняется в архив (app.news_parser.archive).
+"""
+import codecs
+import logging
+import time
+from abc import ABC, abstractmethod
+from html.parser import HTMLParser
+
+import requests
+
+from app.config import settings
+from app.news_parser.archive import archive_page
+from app.news_parser.http import get_session
+
+logger = logging.getLogger(__name__)
+
+
+def has_class(attrs: list[tuple[str, str | None]], class_name: str) -> bool:
+    """Есть ли у тега CSS-класс class_name (как class_= в BeautifulSoup)."""
+    for name, value in attrs:
+        if name == "class" and value and class_name in value.split():
+            return True
+    return False
+
+
+class LinkListExtractor(HTMLParser, ABC):
+    """Базовый извлекатель ссылок-новостей из потока HTML.
+    Наследники решают, какая ссылка — новость (is_news_link), и превращают её в «сырую» новость (make_item).
+    Текст ссылки собирается как get_text(strip=True) в BeautifulSoup.
+    """
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.items: list[dict[str, str]] = []
+        self._href: str | None = None
+        self._text: list[str] = []
+        # Текущий текстовый узел: при потоковой подаче он может прийти несколькими кусками
+        self._node: list[str] = []
+
+    @abstractmethod
+    def is_news_link(self, attrs: list[tuple[str, str | None]]) -> bool:
+        """Является ли ссылка <a> с атрибутами attrs ссылкой на новость."""
+
+    @abstractmethod
+    def make_item(self, title: str, href: str) -> dict[str, str] | None:
+        """«Сырая» новость из текста и href ссылки; None — пропустить ссылку."""
+
+    def _flush_node(self) -> None:
+        text = "".join(self._node).strip()
+        if text:
+            self._text.append(text)
+        self._node = []
+
+    def handle_starttag(self, tag: str, attrs: list[tuple[str, str | None]]) -> None:
+        if self._href is not None:
+            self._flush_node()
+        elif tag == "a" and self.is_news_link(attrs):
+            self._href = dict(attrs).get("href") or ""
+            self._text = []
+            self._node = []
+
+    def handle_data(self, data: str) -> None:
+        if self._href is not None:
+            self._node.append(data)
+
+    def handle_endtag(self, tag: str) -> None:
+        if self._href is not None:
+            self._flush_node()
+        if tag == "a" and self._href is not None:
+            item = self.make_item("".join(self._text), self._href)
+            if item is not None:
+                self.items.append(item)
+            self._href = None
+            self._text = []
+
+
+def stream_list_items(
+    url: str,
+    headers: dict[str, str],
+    extractor: LinkListExtractor,
+    limit: int,
+    timeout: float,
+    archive_source: str | None = None,
+) -> list[dict[str, str]]:
+    """Загрузить страницу потоком и извлечь не больше limit новостей.
+        Соединение закрывается сразу после получения limit новостей.
+        timeout ограничивает всю загрузку, а не только ожидание отдельного куска.
+        archive_source — имя источника для архива; архивируются только прочитанные байты,
+        то есть начало страницы до limit-й новости.
+        Ошибки сети и HTTP-статусы пробрасываются как requests.RequestException.
+    """
+    deadline = time.monotonic() + timeout
+    received = 0
+    chunks: list[bytes] | None = [] if archive_source and settings.archive_enabled else None
+
+    with get_session().get(url, headers=headers, timeout=timeout, stream=True) as response:
+        response.raise_for_status()
+        decoder = codecs.getincrementaldecoder(response.encoding or "utf-8")(errors="replace")
+
+        for chunk in response.iter_content(chunk_size=settings.fetch_chunk_size):
+            received += len(chunk)
+            if chunks is not None:
+                chunks.append(chunk)
+            extractor.feed(decoder.decode(chunk))
+
+            if len(extractor.items) >= limit:
+                break
+            if received >= settings.fetch_max_body_bytes:
+                logger.warning("Страница %s больше %s байт, загрузка прервана", url, settings.fetch_max_body_bytes)
+                break
+            if time.monotonic() > deadline:
+                raise requests.Timeout(f"Загрузка {url} дольше {timeout}s")
+
+    extractor.close()
+    if chunks is not None:
+        archive_page(archive_source, url, b"".join(chunks), response.encoding)
+    logger.debug("Страница %s: прочитано %s байт, новостей=%s", url, received, len(extractor.items))
+    return extractor.items[:limit]
+
+
+def fetch_page(
+    url: str,
+    headers: dict[str, str],
+    timeout: float,
+    archive_source: str | None = None,
+) -> str:
+    """Загрузить страницу целиком (без потокового разбора), не больше settings.fetch_max_body_bytes.
+        Страница больше лимита обрезается: разбирается и архивируется только её начало.
+        timeout ограничивает всю загрузку, а не только ожидание отдельного куска.
+        Ошибки сети и HTTP-статусы пробрасываются как requests.RequestException.
+    """
+    deadline = time.monotonic() + timeout
+    received = 0
+    chunks: list[bytes] = []
+
+    with get_session().get(url, headers=headers, timeout=timeout, stream=True) as response:
+        response.raise_for_status()
+        for chunk in response.iter_content(chunk_size=settings.fetch_chunk_size):
+            chunk = chunk[: settings.fetch_max_body_bytes - received]
+            received += len(chunk)
+            chunks.append(chunk)
+
+            if received >= settings.fetch_max_body_bytes:
+                logger.warning("Страница %s больше %s байт, загрузка прервана", url, settings.fetch_max_body_bytes)
+                break
+            if time.monotonic() > deadline:
+                raise requests.Timeout(f"Загрузка {url} дольше {timeout}s")
+
+    body = b"".join(chunks)
+    if archive_source:
+        archive_page(archive_source, url, body, response.encoding)
+    return body.decode(response.encoding or "utf-8", errors="replace")
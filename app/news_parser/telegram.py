@@ -0,0 +1,168 @@
+""" Парсер Telegram-каналов (источники Source(type="tg")) """
+import asyncio
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any
+
+from app.config import settings
+from app.redis_client import get_redis_client
+from app.schemas import Source
+
+# Redis hash: канал -> id последнего обработанного сообщения (high-water mark)
+TG_MIN_ID_KEY = "tg:min_id"
+
+# Сдвинуть high-water mark канала только вперёд (повторная или запоздалая фиксация не откатывает его)
+_ADVANCE_MIN_ID_SCRIPT = """
+if tonumber(redis.call('HGET', KEYS[1], ARGV[1]) or '0') < tonumber(ARGV[2]) then
+    redis.call('HSET', KEYS[1], ARGV[1], ARGV[2])
+    return 1
+end
+return 0
+"""
+
+TG_TITLE_MAX_LENGTH = 300
+TG_BASE_URL = "https://t.me"
+
+logger = logging.getLogger(__name__)
+
+
+def normalize_channel(value: str) -> str:
+    """Привести адрес канала к виду, понятному Telethon: '@name', 'https://t.me/name' -> 'name'."""
+    channel = value.strip()
+    for prefix in ("https://t.me/", "http://t.me/", "t.me/", "@"):
+        if channel.startswith(prefix):
+            channel = channel[len(prefix):]
+    return channel.strip("/")
+
+
+def build_message_url(entity: Any, message_id: int) -> str:
+    """Ссылка на сообщение: публичный канал — t.me/<username>/<id>, приватный — t.me/c/<id>/<id>."""
+    username = getattr(entity, "username", None)
+    if username:
+        return f"{TG_BASE_URL}/{username}/{message_id}"
+    return f"{TG_BASE_URL}/c/{entity.id}/{message_id}"
+
+
+def message_to_raw(source_name: str, entity: Any, message: Any) -> dict[str, Any] | None:
+    """Преобразовать сообщение канала в «сырую» новость. Сообщения без текста пропускаются."""
+    text = (message.message or "").strip()
+    if not text:
+        return None
+
+    # Первая строка — заголовок, остальной текст — описание
+    first_line, _, rest = text.partition("\n")
+    title = first_line.strip()
+    if len(title) > TG_TITLE_MAX_LENGTH:
+        title = title[: TG_TITLE_MAX_LENGTH - 3].rstrip() + "..."
+
+    return {
+        "source": source_name,
+        "title": title,
+        "summary": rest.strip() or None,
+        "url": build_message_url(entity, message.id),
+        "published_at": message.date,
+        "raw_text": text,
+    }
+
+
+async def fetch_tg_news_raw(client: Any, source: Source) -> tuple[list[dict[str, Any]], int]:
+    """Загрузить новые сообщения канала (id > сохранённого min_id) пачками.
+        Возвращает «сырые» новости и новый high-water mark.
+        При первом запуске читаются только последние settings.tg_initial_messages сообщений.
+    """
+    redis_client = get_redis_client()
+    channel = normalize_channel(source.url)
+    min_id = int(redis_client.hget(TG_MIN_ID_KEY, channel) or 0)
+
+    entity = await client.get_entity(channel)
+    raw_items: list[dict[str, Any]] = []
+    max_id = min_id
+
+    if min_id == 0:
+        # История канала целиком не нужна: начинаем с последних сообщений
+        messages = [m async for m in client.iter_messages(entity, limit=settings.tg_initial_messages)]
+        messages.reverse()
+    else:
+        messages = []
+        while len(messages) < settings.tg_max_messages_per_poll:
+            batch = [
+                m
+                async for m in client.iter_messages(
+                    entity,
+                    min_id=max(min_id, messages[-1].id if messages else 0),
+                    reverse=True,
+                    limit=settings.tg_fetch_batch_size,
+                )
+            ]
+            messages.extend(batch)
+            if len(batch) < settings.tg_fetch_batch_size:
+                break
+
+    for message in messages:
+        max_id = max(max_id, message.id)
+        raw_item = message_to_raw(source.name, entity, message)
+        if raw_item is not None:
+            raw_items.append(raw_item)
+
+    return raw_items, max_id
+
+
+async def collect_from_tg_sources(sources: list[Source]) -> tuple[list[dict[str, Any]], dict[str, int]]:
+    """Собрать новые сообщения из всех Telegram-источников через одно подключение клиента.
+        Возвращает «сырые» новости и новые high-water mark загруженных каналов.
+        Здесь они не сохраняются: их фиксирует commit_tg_marks после того, как новости сохранены
+        или опубликованы, иначе упавший сбор или ручной GET /news/scrape терял бы сообщения.
+    """
+    from telethon.errors import FloodWaitError
+    from app.telegram.bot import get_telegram_reader_client
+
+    client = await get_telegram_reader_client()
+    collected: list[dict[str, Any]] = []
+    marks: dict[str, int] = {}
+    try:
+        for source in sources:
+            try:
+                raw_items, max_id = await fetch_tg_news_raw(client, source)
+            except FloodWaitError as exc:
+                logger.warning("Telegram flood wait %ss для канала %s, пропускаем", exc.seconds, source.url)
+                continue
+            except Exception:
+                logger.exception("Ошибка при чтении Telegram-канала %s", source.url)
+                continue
+
+            collected.extend(raw_items)
+            marks[normalize_channel(source.url)] = max_id
+            logger.info("Telegram-канал %s: новых сообщений=%s, до id=%s", source.url, len(raw_items), max_id)
+    finally:
+        await client.disconnect()
+
+    return collected, marks
+
+
+def fetch_tg_sources_raw(sources: list[Source]) -> tuple[list[dict[str, Any]], dict[str, int]]:
+    """Синхронная обёртка над collect_from_tg_sources.
+        Если в потоке уже работает event loop (вызов из async-кода), сбор выполняется в отдельном потоке.
+    """
+    if not sources:
+        return [], {}
+
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return asyncio.run(collect_from_tg_sources(sources))
+
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        return executor.submit(asyncio.run, collect_from_tg_sources(sources)).result()
+
+
+def commit_tg_marks(marks: dict[str, int]) -> None:
+    """Зафиксировать high-water mark каналов (канал -> id последнего сообщения) после того,
+        как собранные новости сохранены или опубликованы. Метка канала только растёт.
+    """
+    if not marks:
+        return
+
+    pipe = get_redis_client().pipeline(transaction=False)
+    for channel, max_id in marks.items():
+        pipe.eval(_ADVANCE_MIN_ID_SCRIPT, 1, TG_MIN_ID_KEY, channel, max_id)
+    pipe.execute()
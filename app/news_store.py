@@ -0,0 +1,178 @@
+"""Хранилище последних новостей в Redis.
+- news:item:<id> — hash с полями новости
+- news:by_published — sorted set id новостей по времени публикации
+- news:idx:source:<source> / news:idx:keyword:<keyword> — индексы (sorted set с тем же score)
+Обновляется инкрементально при каждом сборе и обрезается до settings.news_latest_limit.
+"""
+import json
+import logging
+from datetime import datetime, timezone
+
+from app.batch import NewsBatch, NewsRow
+from app.config import settings
+from app.redis_client import get_redis_client
+from app.schemas import NewsItem
+
+logger = logging.getLogger(__name__)
+
+NEWS_ITEM_KEY_PREFIX = "news:item:"
+NEWS_BY_PUBLISHED_KEY = "news:by_published"
+NEWS_SOURCE_INDEX_PREFIX = "news:idx:source:"
+NEWS_KEYWORD_INDEX_PREFIX = "news:idx:keyword:"
+NEWS_QUERY_TMP_PREFIX = "news:query:"
+
+
+def _source_index_key(source: str) -> str:
+    return f"{NEWS_SOURCE_INDEX_PREFIX}{source.strip().lower()}"
+
+
+def _keyword_index_key(keyword: str) -> str:
+    return f"{NEWS_KEYWORD_INDEX_PREFIX}{keyword.strip().lower()}"
+
+
+def _item_score(item: NewsItem | NewsRow) -> float:
+    """Score для сортировки: время публикации, либо время сбора, если даты нет."""
+    published_at = item.published_at or datetime.now(timezone.utc)
+    if published_at.tzinfo is None:
+        published_at = published_at.replace(tzinfo=timezone.utc)
+    return published_at.timestamp()
+
+
+def _to_hash(item: NewsItem | NewsRow) -> dict[str, str]:
+    return {
+        "id": item.id,
+        "title": item.title,
+        "url": str(item.url),
+        "summary": item.summary or "",
+        "source": item.source,
+        "published_at": item.published_at.isoformat() if item.published_at else "",
+        "raw_text": item.raw_text or "",
+        "keywords": json.dumps(item.keywords, ensure_ascii=False),
+    }
+
+
+def _from_hash(data: dict[str, str]) -> NewsItem:
+    return NewsItem(
+        id=data["id"],
+        title=data["title"],
+        url=data["url"],
+        summary=data.get("summary") or None,
+        source=data["source"],
+        published_at=data.get("published_at") or None,
+        raw_text=data.get("raw_text") or None,
+        keywords=json.loads(data.get("keywords") or "[]"),
+    )
+
+
+def save_news(items: NewsBatch | list[NewsItem]) -> int:
+    """Добавить/обновить новости в хранилище и обрезать его до лимита.
+        Возвращает количество новых (ранее не сохранённых) новостей.
+    """
+    if not items:
+        return 0
+
+    client = get_redis_client()
+
+    pipe = client.pipeline(transaction=False)
+    for item in items:
+        pipe.hget(f"{NEWS_ITEM_KEY_PREFIX}{item.id}", "keywords")
+    previous_keywords = pipe.execute()
+
+    added = 0
+    pipe = client.pipeline(transaction=True)
+    for item, old_keywords in zip(items, previous_keywords):
+        score = _item_score(item)
+        if old_keywords is None:
+            added += 1
+        else:
+            # Повторно собранная новость: убираем её из индексов больше не совпадающих ключевых слов
+            for keyword in set(json.loads(old_keywords)) - set(item.keywords):
+                pipe.zrem(_keyword_index_key(keyword), item.id)
+
+        pipe.hset(f"{NEWS_ITEM_KEY_PREFIX}{item.id}", mapping=_to_hash(item))
+        # nx=True: повторный сбор не сдвигает новость без даты наверх
+        pipe.zadd(NEWS_BY_PUBLISHED_KEY, {item.id: score}, nx=True)
+        pipe.zadd(_source_index_key(item.source), {item.id: score}, nx=True)
+        for keyword in item.keywords:
+            pipe.zadd(_keyword_index_key(keyword), {item.id: score}, nx=True)
+    pipe.execute()
+
+    trim_news(settings.news_latest_limit)
+    logger.info("news_store: сохранено=%s, новых=%s", len(items), added)
+    return added
+
+
+def trim_news(limit: int) -> int:
+    """Удалить самые старые новости сверх лимита (вместе с их индексами).
+        Поисковый индекс обрезается отдельно (app.search.trim_index, settings.search_index_limit).
+    """
+    client = get_redis_client()
+    excess = client.zcard(NEWS_BY_PUBLISHED_KEY) - limit
+    if excess <= 0:
+        return 0
+
+    old_ids = client.zrange(NEWS_BY_PUBLISHED_KEY, 0, excess - 1)
+
+    pipe = client.pipeline(transaction=False)
+    for news_id in old_ids:
+        pipe.hmget(f"{NEWS_ITEM_KEY_PREFIX}{news_id}", ["source", "keywords"])
+    meta = pipe.execute()
+
+    pipe = client.pipeline(transaction=True)
+    for news_id, (source, keywords) in zip(old_ids, meta):
+        pipe.zrem(NEWS_BY_PUBLISHED_KEY, news_id)
+        if source:
+            pipe.zrem(_source_index_key(source), news_id)
+        for keyword in json.loads(keywords or "[]"):
+            pipe.zrem(_keyword_index_key(keyword), news_id)
+        pipe.delete(f"{NEWS_ITEM_KEY_PREFIX}{news_id}")
+    pipe.execute()
+
+    return len(old_ids)
+
+
+def query_news(
+    source: str | None = None,
+    keyword: str | None = None,
+    offset: int = 0,
+    limit: int = 20,
+) -> list[NewsItem]:
+    """Получить страницу новостей (новые сверху) с фильтром по источнику и/или ключевому слову."""
+    client = get_redis_client()
+
+    index_keys: list[str] = []
+    if source:
+        index_keys.append(_source_index_key(source))
+    if keyword:
+        index_keys.append(_keyword_index_key(keyword))
+
+    if not index_keys:
+        index_key = NEWS_BY_PUBLISHED_KEY
+    elif len(index_keys) == 1:
+        index_key = index_keys[0]
+    else:
+        # Пересечение двух индексов кэшируем ненадолго: постраничные запросы его переиспользуют
+        index_key = f"{NEWS_QUERY_TMP_PREFIX}{source.lower()}:{keyword.lower()}"
+        if not client.exists(index_key):
+            pipe = client.pipeline(transaction=True)
+            pipe.zinterstore(index_key, index_keys, aggregate="MAX")
+            pipe.expire(index_key, 30)
+            pipe.execute()
+
+    news_ids = client.zrevrange(index_key, offset, offset + limit - 1)
+    if not news_ids:
+        return []
+
+    pipe = client.pipeline(transaction=False)
+    for news_id in news_ids:
+        pipe.hgetall(f"{NEWS_ITEM_KEY_PREFIX}{news_id}")
+
+    result: list[NewsItem] = []
+    for data in pipe.execute():
+        if not data:
+            continue
+        try:
+            result.append(_from_hash(data))
+        except (KeyError, TypeError, ValueError):
+            continue
+    return result
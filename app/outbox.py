@@ -0,0 +1,154 @@
+"""Очередь публикаций (outbox) на Redis Streams.
+Сбор новостей добавляет кандидатов в стрим, публикаторы читают их через consumer group.
+Запись подтверждается (XACK) только после успешной отправки вместе с записью в историю,
+поэтому падение посреди пачки не приводит к повторам, а несколько реплик не публикуют одно и то же.
+"""
+import json
+import logging
+import os
+import socket
+
+from redis import Redis
+from redis.exceptions import ResponseError
+
+from app.config import settings
+from app.redis_client import get_redis_client
+from app.schemas import NewsItem
+
+logger = logging.getLogger(__name__)
+
+OUTBOX_STREAM_KEY = "publish:outbox"
+OUTBOX_GROUP = "publishers"
+# Пары "канал|URL", которые уже стоят в очереди (чтобы повторный сбор не добавлял их снова)
+OUTBOX_QUEUED_URLS_KEY = "publish:outbox:queued_urls"
+OUTBOX_MAXLEN = 10000
+
+# Добавление пачки записей канала одним атомарным вызовом:
+# SADD "канал|URL" -> XADD только для новых пар, затем обрезка стрима до ARGV[1] записей
+# с удалением вытесненных пар из OUTBOX_QUEUED_URLS_KEY (иначе вытесненный URL не попал бы в очередь снова).
+# KEYS: стрим, множество пар; ARGV: maxlen, канал, затем пары URL, JSON новости
+_ENQUEUE_SCRIPT = """
+local channel = ARGV[2]
+local added = 0
+for i = 3, #ARGV, 2 do
+    if redis.call('SADD', KEYS[2], channel .. '|' .. ARGV[i]) == 1 then
+        redis.call('XADD', KEYS[1], '*', 'channel', channel, 'url', ARGV[i], 'item', ARGV[i + 1])
+        added = added + 1
+    end
+end
+
+local excess = redis.call('XLEN', KEYS[1]) - tonumber(ARGV[1])
+if excess > 0 then
+    for _, entry in ipairs(redis.call('XRANGE', KEYS[1], '-', '+', 'COUNT', excess)) do
+        local fields = {}
+        for j = 1, #entry[2], 2 do
+            fields[entry[2][j]] = entry[2][j + 1]
+        end
+        if fields['channel'] and fields['url'] then
+            redis.call('SREM', KEYS[2], fields['channel'] .. '|' .. fields['url'])
+        end
+        redis.call('XDEL', KEYS[1], entry[1])
+    end
+end
+return added
+"""
+
+
+def default_consumer_name() -> str:
+    """Имя потребителя в consumer group: хост + pid процесса."""
+    return f"{socket.gethostname()}-{os.getpid()}"
+
+
+def ensure_outbox_group(client: Redis) -> None:
+    """Создать стрим и consumer group, если их еще нет."""
+    try:
+        client.xgroup_create(OUTBOX_STREAM_KEY, OUTBOX_GROUP, id="0", mkstream=True)
+    except ResponseError as exc:
+        if "BUSYGROUP" not in str(exc):
+            raise
+
+
+def _queued_member(channel_id: str, url: str) -> str:
+    return f"{channel_id}|{url}"
+
+
+def enqueue_news(items: list[NewsItem], channel_id: str) -> int:
+    """Добавить новости для канала в outbox. Уже стоящие в очереди URL пропускаются.
+        Пачка добавляется одним Lua-скриптом: отметка URL и запись в стрим не расходятся при падении,
+        а записи, вытесненные обрезкой стрима до OUTBOX_MAXLEN, снимают свои отметки.
+        Возвращает количество добавленных записей.
+    """
+    args: list[str] = []
+    for item in items:
+        url = str(item.url) if item.url else ""
+        if url:
+            args.extend((url, item.model_dump_json()))
+    if not args:
+        return 0
+
+    client = get_redis_client()
+    ensure_outbox_group(client)
+
+    added = client.eval(_ENQUEUE_SCRIPT, 2, OUTBOX_STREAM_KEY, OUTBOX_QUEUED_URLS_KEY, OUTBOX_MAXLEN, channel_id, *args)
+
+    logger.info("Outbox: канал=%s, добавлено записей=%s", channel_id, added)
+    return added
+
+
+def _parse_entries(client: Redis, entries: list) -> list[tuple[str, str, NewsItem]]:
+    """Преобразовать записи стрима в тройки (entry_id, канал, NewsItem).
+        Некорректные записи подтверждаются и удаляются, чтобы не забираться повторно.
+    """
+    result: list[tuple[str, str, NewsItem]] = []
+    for entry_id, fields in entries:
+        if not fields:
+            continue
+        try:
+            result.append((entry_id, fields["channel"], NewsItem(**json.loads(fields["item"]))))
+        except (KeyError, json.JSONDecodeError, TypeError, ValueError):
+            logger.warning("Outbox: некорректная запись %s, удаляем", entry_id)
+            client.xack(OUTBOX_STREAM_KEY, OUTBOX_GROUP, entry_id)
+            client.xdel(OUTBOX_STREAM_KEY, entry_id)
+    return result
+
+
+def read_outbox(consumer: str, count: int) -> list[tuple[str, str, NewsItem]]:
+    """Прочитать записи для публикации.
+        Сначала забираем «зависшие» записи упавших потребителей (XAUTOCLAIM),
+        затем — новые записи группы.
+    """
+    if count <= 0:
+        return []
+
+    client = get_redis_client()
+    ensure_outbox_group(client)
+
+    claimed = client.xautoclaim(
+        OUTBOX_STREAM_KEY,
+        OUTBOX_GROUP,
+        consumer,
+        min_idle_time=settings.outbox_claim_idle_ms,
+        start_id="0-0",
+        count=count,
+    )
+    entries = _parse_entries(client, claimed[1])
+
+    if len(entries) < count:
+        response = client.xreadgroup(
+            OUTBOX_GROUP,
+            consumer,
+            {OUTBOX_STREAM_KEY: ">"},
+            count=count - len(entries),
+        )
+        for _stream, stream_entries in response or []:
+            entries.extend(_parse_entries(client, stream_entries))
+
+    return entries
+
+
+def ack_outbox_entry(pipe, entry_id: str, channel_id: str, url: str) -> None:
+    """Добавить в пайплайн подтверждение записи и снятие URL из очереди канала."""
+    pipe.xack(OUTBOX_STREAM_KEY, OUTBOX_GROUP, entry_id)
+    pipe.xdel(OUTBOX_STREAM_KEY, entry_id)
+    if url:
+        pipe.srem(OUTBOX_QUEUED_URLS_KEY, _queued_member(channel_id, url))
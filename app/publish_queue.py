@@ -0,0 +1,138 @@
+"""Приоритетная очередь публикаций для непрерывного режима (settings.continuous_publish_enabled).
+Новости после фильтрации и дедупликации попадают в Redis sorted set, где score — приоритет:
+время публикации (свежее — выше) плюс бонус за каждое совпавшее ключевое слово.
+Публикатор (app.telegram.continuous) забирает новость с наибольшим приоритетом (BZPOPMAX)
+и публикует с постоянной скоростью, поэтому новость уходит в канал через секунды после сбора.
+"""
+import json
+import logging
+import statistics
+import time
+from datetime import timezone
+
+from app.config import settings
+from app.redis_client import get_redis_client
+from app.schemas import NewsItem
+
+logger = logging.getLogger(__name__)
+
+# Sorted set "канал|id новости" -> приоритет
+PUBLISH_QUEUE_KEY = "publish:queue"
+# Hash "канал|id новости" -> JSON {"item": ..., "queued_at": ...}
+PUBLISH_QUEUE_ITEMS_KEY = "publish:queue:items"
+# Последние задержки «обнаружение -> публикация», секунды (Redis list)
+PUBLISH_QUEUE_LATENCY_KEY = "publish:queue:latency"
+PUBLISH_QUEUE_LATENCY_SAMPLES = 500
+
+
+def _member(channel_id: str, news_id: str) -> str:
+    return f"{channel_id}|{news_id}"
+
+
+def priority(item: NewsItem, now: float | None = None) -> float:
+    """Приоритет новости в секундах: время публикации (или обнаружения)
+        + settings.publish_queue_keyword_boost за каждое совпавшее ключевое слово.
+    """
+    if item.published_at is not None:
+        published_at = item.published_at
+        if published_at.tzinfo is None:
+            published_at = published_at.replace(tzinfo=timezone.utc)
+        ts = min(published_at.timestamp(), now or time.time())
+    else:
+        ts = now or time.time()
+    return ts + len(item.keywords) * settings.publish_queue_keyword_boost
+
+
+def enqueue_priority(items: list[NewsItem], channel_id: str) -> int:
+    """Поставить новости канала в очередь (уже стоящие не дублируются).
+        Очередь обрезается до settings.publish_queue_max_size новостей с наибольшим приоритетом.
+        Возвращает количество добавленных новостей.
+    """
+    if not items:
+        return 0
+
+    client = get_redis_client()
+    now = time.time()
+
+    pipe = client.pipeline(transaction=False)
+    for item in items:
+        member = _member(channel_id, item.id)
+        pipe.zadd(PUBLISH_QUEUE_KEY, {member: priority(item, now)}, nx=True)
+        pipe.hsetnx(
+            PUBLISH_QUEUE_ITEMS_KEY,
+            member,
+            json.dumps({"item": item.model_dump(mode="json"), "queued_at": now}, ensure_ascii=False),
+        )
+    added = sum(pipe.execute()[::2])
+
+    # Самые «низкие» новости вытесняются, если очередь переполнена
+    overflow = client.zrange(PUBLISH_QUEUE_KEY, 0, -(settings.publish_queue_max_size + 1))
+    if overflow:
+        pipe = client.pipeline(transaction=True)
+        pipe.zrem(PUBLISH_QUEUE_KEY, *overflow)
+        pipe.hdel(PUBLISH_QUEUE_ITEMS_KEY, *overflow)
+        pipe.execute()
+
+    logger.info("Очередь публикаций: канал=%s, добавлено=%s, вытеснено=%s", channel_id, added, len(overflow))
+    return added
+
+
+def pop_next(timeout: int) -> tuple[str, NewsItem, float, float] | None:
+    """Забрать новость с наибольшим приоритетом, ожидая до timeout секунд.
+        Возвращает (канал, новость, приоритет, время постановки в очередь) или None.
+    """
+    client = get_redis_client()
+    popped = client.bzpopmax(PUBLISH_QUEUE_KEY, timeout=timeout)
+    if not popped:
+        return None
+
+    _key, member, score = popped
+    pipe = client.pipeline(transaction=True)
+    pipe.hget(PUBLISH_QUEUE_ITEMS_KEY, member)
+    pipe.hdel(PUBLISH_QUEUE_ITEMS_KEY, member)
+    raw, _ = pipe.execute()
+
+    try:
+        data = json.loads(raw)
+        item = NewsItem(**data["item"])
+    except (TypeError, KeyError, ValueError):
+        logger.warning("Очередь публикаций: некорректная запись %s, пропускаем", member)
+        return None
+
+    channel_id = member.rsplit("|", 1)[0]
+    return channel_id, item, float(score), float(data.get("queued_at") or time.time())
+
+
+def requeue(channel_id: str, item: NewsItem, score: float, queued_at: float) -> None:
+    """Вернуть новость в очередь (например, после ошибки отправки)."""
+    client = get_redis_client()
+    member = _member(channel_id, item.id)
+    pipe = client.pipeline(transaction=True)
+    pipe.zadd(PUBLISH_QUEUE_KEY, {member: score})
+    pipe.hset(
+        PUBLISH_QUEUE_ITEMS_KEY,
+        member,
+        json.dumps({"item": item.model_dump(mode="json"), "queued_at": queued_at}, ensure_ascii=False),
+    )
+    pipe.execute()
+
+
+def record_latency(seconds: float) -> None:
+    client = get_redis_client()
+    pipe = client.pipeline(transaction=False)
+    pipe.lpush(PUBLISH_QUEUE_LATENCY_KEY, round(seconds, 3))
+    pipe.ltrim(PUBLISH_QUEUE_LATENCY_KEY, 0, PUBLISH_QUEUE_LATENCY_SAMPLES - 1)
+    pipe.execute()
+
+
+def queue_stats() -> dict:
+    """Размер очереди и медианная задержка «обнаружение -> публикация» (для /health)."""
+    client = get_redis_client()
+    pipe = client.pipeline(transaction=False)
+    pipe.zcard(PUBLISH_QUEUE_KEY)
+    pipe.lrange(PUBLISH_QUEUE_LATENCY_KEY, 0, -1)
+    size, latencies = pipe.execute()
+    return {
+        "size": size,
+        "median_latency_s": round(statistics.median(float(x) for x in latencies), 1) if latencies else None,
+    }
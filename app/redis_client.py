@@ -3,22 +3,67 @@
 Настройки подключения берутся из конфигурации приложения.
 """
 
+from functools import lru_cache
+
 from redis import Redis
 from redis.exceptions import RedisError
 
 from app.config import settings
 
+# Версии коллекций: увеличиваются при каждом изменении данных
+DATA_VERSION_KEY_PREFIX = "data:version:"
+
+# Схема REDIS_URL для Redis в памяти процесса (fakeredis) — для нагрузочных тестов без сервера
+FAKE_REDIS_SCHEME = "fakeredis://"
+
+
+@lru_cache(maxsize=1)
+def _fake_redis_server():
+    import fakeredis
+
+    return fakeredis.FakeServer()
+
 
 def get_redis_client() -> Redis:
     """Создать и вернуть клиент Redis.
     Параметр decode_responses=True используется для
     декодирования ответов в строки (str), а не bytes.
     """
+    if settings.redis_url.startswith(FAKE_REDIS_SCHEME):
+        import fakeredis
+
+        return fakeredis.FakeRedis(server=_fake_redis_server(), decode_responses=True)
+
     client = Redis.from_url(settings.redis_url, decode_responses=True)
 
     return client
 
 
+def get_binary_redis_client() -> Redis:
+    """Клиент Redis без декодирования ответов — для бинарных значений (сжатые пачки данных)."""
+    if settings.redis_url.startswith(FAKE_REDIS_SCHEME):
+        import fakeredis
+
+        return fakeredis.FakeRedis(server=_fake_redis_server())
+
+    return Redis.from_url(settings.redis_url)
+
+
+def data_version_key(collection: str) -> str:
+    """Ключ счётчика версии коллекции (для ETag в API)."""
+    return f"{DATA_VERSION_KEY_PREFIX}{collection}"
+
+
+def bump_data_version(client, collection: str) -> None:
+    """Увеличить версию коллекции. client может быть пайплайном — тогда в той же транзакции, что и запись."""
+    client.incr(data_version_key(collection))
+
+
+def get_data_version(collection: str) -> int:
+    """Текущая версия коллекции (0, если коллекция ещё не менялась)."""
+    return int(get_redis_client().get(data_version_key(collection)) or 0)
+
+
 def ping_redis() -> bool:
     """Проверить доступность Redis"""
     try:
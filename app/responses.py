@@ -0,0 +1,121 @@
+"""Быстрые JSON-ответы для списковых эндпоинтов.
+- сериализация через pydantic TypeAdapter.dump_json (без jsonable_encoder FastAPI)
+- сжатие gzip/zstd для больших тел ответа
+- сильные ETag на основе версии данных в Redis: неизменившаяся коллекция отвечает 304
+  на If-None-Match, не читая данные и не создавая модели
+- у сжатых представлений свой ETag (суффикс -gzip/-zstd); If-None-Match сравнивается слабо
+  (RFC 9110): без префикса W/ и без суффикса кодировки, то есть по версии данных
+"""
+import gzip
+import hashlib
+from functools import lru_cache
+from typing import Any, Callable
+
+from fastapi import Request, Response
+from pydantic import TypeAdapter
+
+from app.config import settings
+from app.redis_client import get_data_version
+
+try:
+    import zstandard
+except ImportError:  # zstd необязателен: без него используется только gzip
+    zstandard = None
+
+
+@lru_cache(maxsize=None)
+def _adapter(tp: Any) -> TypeAdapter:
+    return TypeAdapter(tp)
+
+
+def _accepted_encodings(request: Request) -> set[str]:
+    result: set[str] = set()
+    for part in request.headers.get("accept-encoding", "").split(","):
+        name, _, params = part.strip().partition(";")
+        if name and params.replace(" ", "") not in ("q=0", "q=0.0"):
+            result.add(name.lower())
+    return result
+
+
+# Суффиксы ETag сжатых представлений: у каждого представления ответа свой сильный ETag
+ETAG_ENCODING_SUFFIXES = ("gzip", "zstd")
+
+
+def _encoded_etag(etag: str, encoding: str) -> str:
+    return f'{etag[:-1]}-{encoding}"'
+
+
+def _opaque_tag(tag: str) -> str:
+    """Тег для слабого сравнения: без W/ и без суффикса кодировки сжатого представления."""
+    tag = tag.strip().removeprefix("W/")
+    for encoding in ETAG_ENCODING_SUFFIXES:
+        suffix = f'-{encoding}"'
+        if tag.endswith(suffix):
+            return tag[: -len(suffix)] + '"'
+    return tag
+
+
+def _matching_etag(request: Request, etag: str) -> str | None:
+    """Тег из If-None-Match, совпавший с etag (для ответа 304), или None."""
+    header = request.headers.get("if-none-match")
+    if not header:
+        return None
+    if header.strip() == "*":
+        return etag
+    expected = _opaque_tag(etag)
+    for tag in header.split(","):
+        if _opaque_tag(tag) == expected:
+            return tag.strip()
+    return None
+
+
+def _not_modified(etag: str) -> Response:
+    return Response(status_code=304, headers={"ETag": etag, "Vary": "Accept-Encoding", "Cache-Control": "no-cache"})
+
+
+def json_response(
+    request: Request,
+    content: Any,
+    response_type: Any,
+    etag: str | None = None,
+    status_code: int = 200,
+) -> Response:
+    """Сериализовать content по типу response_type и сжать тело, если клиент это поддерживает."""
+    body = _adapter(response_type).dump_json(content)
+
+    if etag is None:
+        etag = '"' + hashlib.blake2b(body, digest_size=16).hexdigest() + '"'
+    matched = _matching_etag(request, etag)
+    if matched is not None:
+        return _not_modified(matched)
+
+    headers = {"ETag": etag, "Vary": "Accept-Encoding", "Cache-Control": "no-cache"}
+    if len(body) >= settings.response_compress_min_bytes:
+        encodings = _accepted_encodings(request)
+        if zstandard is not None and "zstd" in encodings:
+            body = zstandard.ZstdCompressor(level=3).compress(body)
+            headers["Content-Encoding"] = "zstd"
+        elif "gzip" in encodings:
+            body = gzip.compress(body, compresslevel=5)
+            headers["Content-Encoding"] = "gzip"
+        if "Content-Encoding" in headers:
+            headers["ETag"] = _encoded_etag(etag, headers["Content-Encoding"])
+
+    return Response(content=body, status_code=status_code, media_type="application/json", headers=headers)
+
+
+def versioned_json_response(
+    request: Request,
+    collection: str,
+    build: Callable[[], Any],
+    response_type: Any,
+) -> Response:
+    """Ответ с ETag по версии коллекции в Redis.
+        Если клиент прислал актуальный ETag — 304 без вызова build().
+    """
+    etag = f'"{collection}-{get_data_version(collection)}"'
+    matched = _matching_etag(request, etag)
+    if matched is not None:
+        return _not_modified(matched)
+
+    return json_response(request, build(), response_type, etag=etag)
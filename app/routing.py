@@ -0,0 +1,119 @@
+"""Маршрутизация новостей по Telegram-каналам.
+Каждый канал подписан на свой список ключевых слов. Новость сопоставляется один раз
+с объединением всех подписок, а каналы находятся через инвертированный индекс keyword -> каналы,
+поэтому стоимость растёт с числом совпадений, а не с числом каналов.
+"""
+import json
+import logging
+
+from app.batch import NewsBatch
+from app.config import settings
+from app.redis_client import get_redis_client
+from app.schemas import Channel
+from app.utils import prepare_keywords, match_keywords
+
+logger = logging.getLogger(__name__)
+
+# Redis key для CRUD каналов
+CHANNELS_KEY = "channels:list"
+
+
+def load_channels() -> list[Channel]:
+    """Загрузить активные каналы из Redis.
+        Если каналы не настроены, используется канал из настроек с глобальными ключевыми словами.
+    """
+    client = get_redis_client()
+    raw = client.get(CHANNELS_KEY)
+
+    channels: list[Channel] = []
+    if raw:
+        try:
+            data = json.loads(raw)
+        except json.JSONDecodeError:
+            data = []
+        for x in data if isinstance(data, list) else []:
+            try:
+                channel = Channel(**x)
+            except (TypeError, ValueError):
+                continue
+            if channel.enabled:
+                channels.append(channel)
+
+    if not channels and settings.telegram_channel_id:
+        channels.append(
+            Channel(id=0, channel_id=settings.telegram_channel_id, keywords=settings.keywords_list)
+        )
+    return channels
+
+
+class ChannelRouter:
+    """Инвертированный индекс подписок keyword -> каналы.
+    Каналы без ключевых слов получают все новости.
+    """
+
+    def __init__(self, channels: list[Channel], strict: bool | None = None):
+        self.strict = settings.strict_filtering if strict is None else strict
+        self.channel_ids: list[str] = []
+        self.wildcard_channels: list[str] = []
+        self.index: dict[str, list[str]] = {}
+
+        for channel in channels:
+            if not channel.enabled or not channel.channel_id or channel.channel_id in self.channel_ids:
+                continue
+            self.channel_ids.append(channel.channel_id)
+
+            words = prepare_keywords(channel.keywords)
+            if not words:
+                self.wildcard_channels.append(channel.channel_id)
+            for word in words:
+                self.index.setdefault(word, []).append(channel.channel_id)
+
+        self.keywords: list[str] = list(self.index)
+
+    @classmethod
+    def load(cls) -> "ChannelRouter":
+        """Построить маршрутизатор по каналам из Redis."""
+        return cls(load_channels())
+
+    def match_text(self, title: str, summary: str | None) -> list[str]:
+        """Найти ключевые слова из объединения всех подписок, встретившиеся в заголовке или описании."""
+        if not self.keywords:
+            return []
+        return match_keywords(title, summary, self.keywords)
+
+    def _route(self, keywords: list[str]) -> dict[str, list[str]]:
+        routes: dict[str, list[str]] = {channel_id: list(keywords) for channel_id in self.wildcard_channels}
+
+        for keyword in keywords:
+            for channel_id in self.index.get(keyword, ()):
+                routes.setdefault(channel_id, []).append(keyword)
+
+        # Нестрогий режим: новость без совпадений всё равно уходит во все каналы
+        if not self.strict:
+            for channel_id in self.channel_ids:
+                routes.setdefault(channel_id, [])
+
+        return routes
+
+    def fan_out(self, batch: NewsBatch) -> dict[str, NewsBatch]:
+        """Разложить пачку новостей по каналам (с ключевыми словами конкретного канала).
+            Ожидает, что колонка keywords уже заполнена через NewsBatch.match().
+        """
+        indices: dict[str, list[int]] = {}
+        keywords: dict[str, list[list[str]]] = {}
+        for index, item_keywords in enumerate(batch.keywords):
+            for channel_id, matched in self._route(item_keywords).items():
+                indices.setdefault(channel_id, []).append(index)
+                keywords.setdefault(channel_id, []).append(matched)
+
+        result = {
+            channel_id: batch.take(channel_indices, keywords[channel_id])
+            for channel_id, channel_indices in indices.items()
+        }
+        logger.info(
+            "Маршрутизация: новостей=%s, каналов=%s, доставок=%s",
+            len(batch),
+            len(result),
+            sum(len(x) for x in result.values()),
+        )
+        return result
@@ -3,11 +3,17 @@
 - PublishedNews: сгенерированный/опубликованный пост по новости
 - Source: источник новостей
 - Keywords: ключевое слово для фильтрации
+- Channel: Telegram-канал для публикаций и его подписка на ключевые слова
+- PublishStats: статистика публикаций за диапазон дней (GET /stats)
 """
-from datetime import datetime
-from pydantic import BaseModel, Field, AnyHttpUrl
+from datetime import date, datetime
+from pydantic import BaseModel, Field, AnyHttpUrl, TypeAdapter
 from typing import Literal
 
+# Ограничения полей NewsItem (проверяются и при нормализации пачки NewsBatch, без создания моделей)
+NEWS_TITLE_MAX_LENGTH = 300
+NEWS_SOURCE_MAX_LENGTH = 100
+
 
 class NewsItem(BaseModel):
     id: str = Field(
@@ -18,7 +24,7 @@ class NewsItem(BaseModel):
     title: str = Field(
         ...,
         min_length=1,
-        max_length=300,
+        max_length=NEWS_TITLE_MAX_LENGTH,
         description="Заголовок новости",
         examples=[
             "Intel подписала предварительное соглашение о приобретении стартапа SambaNova Systems, который разрабатывает чипы для вычислений искусственного интеллекта"
@@ -37,7 +43,7 @@ class NewsItem(BaseModel):
     source: str = Field(
         ...,
         min_length=1,
-        max_length=100,
+        max_length=NEWS_SOURCE_MAX_LENGTH,
         description="Имя источника",
         examples=["habr"],
     )
@@ -81,6 +87,33 @@ class PublishedNews(BaseModel):
     )
 
 
+
+class DayStats(BaseModel):
+    day: date = Field(..., description="День (UTC)", examples=["2025-01-01"])
+    total: int = Field(..., description="Всего публикаций", examples=[12])
+    by_source: dict[str, int] = Field(default_factory=dict, description="Публикации по источникам", examples=[{"habr": 8}])
+    by_keyword: dict[str, int] = Field(
+        default_factory=dict,
+        description="Публикации по совпавшим ключевым словам",
+        examples=[{"python": 5}],
+    )
+    by_channel: dict[str, int] = Field(
+        default_factory=dict,
+        description="Публикации по каналам",
+        examples=[{"@my_telegram_channel": 12}],
+    )
+
+
+class PublishStats(BaseModel):
+    since: date = Field(..., description="Первый день диапазона (UTC)")
+    until: date = Field(..., description="Последний день диапазона, включительно")
+    total: int = Field(..., description="Всего публикаций за диапазон")
+    by_source: dict[str, int] = Field(default_factory=dict, description="Публикации по источникам")
+    by_keyword: dict[str, int] = Field(default_factory=dict, description="Публикации по совпавшим ключевым словам")
+    by_channel: dict[str, int] = Field(default_factory=dict, description="Публикации по каналам")
+    days: list[DayStats] = Field(default_factory=list, description="Разбивка по дням (дни без публикаций опущены)")
+
+
 class Keywords(BaseModel):
     id: int = Field(
         ...,
@@ -94,6 +127,13 @@ class Keywords(BaseModel):
         description="Ключевое слово новости",
         examples=["python", "fastapi"],
     )
+    weight: float = Field(
+        default=1.0,
+        ge=0,
+        le=1000,
+        description="Вес слова при ранжировании кандидатов на публикацию",
+        examples=[1.0, 2.5],
+    )
 
 
 class Source(BaseModel):
@@ -125,4 +165,33 @@ class Source(BaseModel):
         default=True,
         description="Флаг активности источника.",
         examples=[True],
-    )
\ No newline at end of file
+    )
+
+
+class Channel(BaseModel):
+    id: int = Field(
+        ...,
+        description="Идентификатор канала в сервисе.",
+        examples=[1],
+    )
+    channel_id: str = Field(
+        ...,
+        min_length=1,
+        max_length=100,
+        description="ID/username Telegram-канала для публикаций.",
+        examples=["@my_telegram_channel", "-1000173864598"],
+    )
+    keywords: list[str] = Field(
+        default_factory=list,
+        description="Ключевые слова подписки канала (пустой список — все новости).",
+        examples=[["python", "fastapi"]],
+    )
+    enabled: bool = Field(
+        default=True,
+        description="Флаг активности канала.",
+        examples=[True],
+    )
+
+
+# Сериализация пачки новостей в JSON-байты и обратно одним вызовом (пул разбора, claim-check)
+NEWS_BATCH_ADAPTER = TypeAdapter(list[NewsItem])
@@ -0,0 +1,160 @@
+"""Ранжирование кандидатов на публикацию по весам ключевых слов и свежести.
+Совпадения новостей с ключевыми словами собираются за один проход в разреженную матрицу
+(пары строка-новость / столбец-слово), оценка — произведение этой матрицы на вектор весов
+(np.bincount), умноженное на экспоненциальное затухание по возрасту новости.
+Лучшие limit новостей выбираются частичной сортировкой (np.partition) с тем же порядком при равных
+оценках, что и у запасного пути без numpy.
+"""
+import json
+import logging
+import math
+from datetime import datetime, timezone
+
+from app.batch import NewsBatch
+from app.config import settings
+from app.keys import KEYWORDS_KEY
+from app.redis_client import get_redis_client
+from app.schemas import NewsItem
+
+try:
+    import numpy as np
+except ImportError:  # numpy необязателен: без него оценка считается в цикле, отбор — через heapq
+    np = None
+
+logger = logging.getLogger(__name__)
+
+
+def load_keyword_weights() -> dict[str, float]:
+    """Веса ключевых слов из справочника (CRUD /api/keywords/): слово в нижнем регистре -> вес."""
+    raw = get_redis_client().get(KEYWORDS_KEY)
+    if not raw:
+        return {}
+    try:
+        data = json.loads(raw)
+    except json.JSONDecodeError:
+        return {}
+
+    weights: dict[str, float] = {}
+    for x in data if isinstance(data, list) else []:
+        if not isinstance(x, dict) or not x.get("word"):
+            continue
+        try:
+            weights[str(x["word"]).strip().lower()] = float(x.get("weight", 1.0))
+        except (TypeError, ValueError):
+            continue
+    return weights
+
+
+class RelevanceScorer:
+    """Оценка новостей: (scoring_base_score + сумма весов совпавших слов) * затухание по возрасту.
+    Слова без веса в справочнике получают settings.scoring_default_weight.
+    """
+
+    def __init__(self, weights: dict[str, float] | None = None, half_life_hours: float | None = None):
+        self.weights = load_keyword_weights() if weights is None else weights
+        self.half_life_hours = settings.scoring_half_life_hours if half_life_hours is None else half_life_hours
+        # Словарь столбцов матрицы: слово -> индекс; расширяется словами, которых нет в справочнике
+        self.vocabulary: dict[str, int] = {word: i for i, word in enumerate(self.weights)}
+        self._weight_list: list[float] = list(self.weights.values())
+
+    def _column(self, word: str) -> int:
+        index = self.vocabulary.get(word)
+        if index is None:
+            index = len(self._weight_list)
+            self.vocabulary[word] = index
+            self._weight_list.append(settings.scoring_default_weight)
+        return index
+
+    def match_matrix(self, items: NewsBatch | list[NewsItem]) -> tuple[list[int], list[int]]:
+        """Разреженная матрица совпадений новость x слово в виде пар (строки, столбцы)."""
+        keywords = items.keywords if isinstance(items, NewsBatch) else [item.keywords for item in items]
+        rows: list[int] = []
+        cols: list[int] = []
+        for row, item_keywords in enumerate(keywords):
+            for word in dict.fromkeys(item_keywords):
+                rows.append(row)
+                cols.append(self._column(word.strip().lower()))
+        return rows, cols
+
+    def _ages_hours(self, items: NewsBatch | list[NewsItem], now: datetime) -> list[float]:
+        column = items.published_at if isinstance(items, NewsBatch) else [item.published_at for item in items]
+        ages: list[float] = []
+        for published_at in column:
+            if published_at is None:
+                ages.append(0.0)
+                continue
+            if published_at.tzinfo is None:
+                published_at = published_at.replace(tzinfo=timezone.utc)
+            ages.append(max(0.0, (now - published_at).total_seconds() / 3600))
+        return ages
+
+    def score(self, items: NewsBatch | list[NewsItem], now: datetime | None = None) -> list[float]:
+        """Оценки новостей (в порядке items)."""
+        if not items:
+            return []
+        now = now or datetime.now(timezone.utc)
+        rows, cols = self.match_matrix(items)
+        ages = self._ages_hours(items, now)
+        decay_rate = math.log(2) / self.half_life_hours if self.half_life_hours > 0 else 0.0
+
+        if np is not None:
+            weights = np.asarray(self._weight_list, dtype=np.float64)
+            relevance = np.bincount(
+                np.asarray(rows, dtype=np.intp),
+                weights=weights[np.asarray(cols, dtype=np.intp)] if cols else None,
+                minlength=len(items),
+            )
+            scores = (settings.scoring_base_score + relevance) * np.exp(-decay_rate * np.asarray(ages))
+            return scores.tolist()
+
+        relevance = [0.0] * len(items)
+        for row, col in zip(rows, cols):
+            relevance[row] += self._weight_list[col]
+        return [
+            (settings.scoring_base_score + rel) * math.exp(-decay_rate * age)
+            for rel, age in zip(relevance, ages)
+        ]
+
+    def top_k(
+        self,
+        items: NewsBatch | list[NewsItem],
+        k: int,
+        now: datetime | None = None,
+    ) -> NewsBatch | list[NewsItem]:
+        """k новостей с наибольшей оценкой, по убыванию оценки (при равенстве — в исходном порядке)."""
+        if k <= 0 or not items:
+            return _take(items, [])
+        scores = self.score(items, now)
+        if k >= len(items):
+            return _take(items, sorted(range(len(items)), key=lambda i: (-scores[i], i)))
+
+        if np is not None:
+            values = np.asarray(scores)
+            # np.argpartition выбрал бы из равных оценок на границе k произвольные новости:
+            # берём всех строго лучше k-й оценки и первые по порядку из равных ей, как heapq ниже
+            kth = np.partition(values, len(values) - k)[len(values) - k]
+            better = np.flatnonzero(values > kth)
+            top = np.concatenate((better, np.flatnonzero(values == kth)[: k - len(better)]))
+            order = top[np.lexsort((top, -values[top]))].tolist()
+        else:
+            import heapq
+
+            order = heapq.nsmallest(k, range(len(items)), key=lambda i: (-scores[i], i))
+        return _take(items, order)
+
+
+def _take(items: NewsBatch | list[NewsItem], order: list[int]) -> NewsBatch | list[NewsItem]:
+    if isinstance(items, NewsBatch):
+        return items.take(order)
+    return [items[i] for i in order]
+
+
+def rank_news(
+    items: NewsBatch | list[NewsItem],
+    limit: int,
+    scorer: RelevanceScorer | None = None,
+) -> NewsBatch | list[NewsItem]:
+    """Выбрать limit самых релевантных новостей (или первые limit, если ранжирование выключено)."""
+    if not settings.scoring_enabled:
+        return items[:limit]
+    return (scorer or RelevanceScorer()).top_k(items, limit)
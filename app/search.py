@@ -0,0 +1,250 @@
+"""Полнотекстовый поиск по собранным новостям (инвертированный индекс в Redis, ранжирование BM25).
+- search:v2:doc_ids — hash news_id -> внутренний номер документа
+- search:v2:docs — hash номер -> JSON новости
+- search:v2:doc_terms — hash номер -> JSON {"length", "terms"} (для удаления документа из индекса)
+- search:v2:term:<term> — sorted set номеров документов (постинг-лист термина), score — вклад tf в BM25
+- search:v2:stats — hash с числом документов и суммарной длиной
+- search:v2:doc_order — sorted set news_id, score — номер документа (порядок индексации, для обрезки)
+Индекс пополняется инкрементально при каждом сборе новостей и хранится независимо от app.news_store:
+самые старые документы сверх settings.search_index_limit удаляются после индексации (trim_index),
+поэтому поиск охватывает больше истории, чем окно GET /news (settings.news_latest_limit).
+
+Вклад tf (с нормировкой по длине документа) считается при индексации, поэтому постинг-лист упорядочен
+по нему: запрос читает по каждому термину не больше settings.search_postings_per_term лучших документов
+(ZREVRANGE), и стоимость поиска не растёт с частотой термина. Средняя длина документа берётся на момент
+индексации — небольшое приближение к BM25.
+"""
+import heapq
+import json
+import logging
+import math
+import re
+
+from app.batch import NewsBatch, NewsRow, news_json
+from app.config import settings
+from app.redis_client import get_redis_client
+from app.schemas import NewsItem
+
+logger = logging.getLogger(__name__)
+
+# v2: постинг-листы — sorted set (в первой версии — hash); старые ключи search:* можно удалить
+SEARCH_DOC_IDS_KEY = "search:v2:doc_ids"
+SEARCH_DOCS_KEY = "search:v2:docs"
+SEARCH_DOC_TERMS_KEY = "search:v2:doc_terms"
+SEARCH_NEXT_DOC_KEY = "search:v2:next_doc"
+SEARCH_STATS_KEY = "search:v2:stats"
+SEARCH_TERM_KEY_PREFIX = "search:v2:term:"
+SEARCH_DOC_ORDER_KEY = "search:v2:doc_order"
+
+# Параметры BM25
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+TOKEN_RE = re.compile(r"[0-9a-zа-яё]+")
+
+STOP_WORDS = frozenset(
+    """
+    a an and are as at be by for from has have in is it its of on or that the this to was were will with
+    и в во не что он на я с со как а то все она так его но да ты к у же вы за бы по только ее мне было
+    вот от меня еще нет о из ему теперь когда даже ну вдруг ли если уже или ни быть был него до вас
+    нибудь опять уж вам ведь там потом себя ничего ей может они тут где есть надо ней для мы тебя их
+    чем была сам чтоб без будто чего раз тоже себе под будет ж тогда кто этот того потому этого какой
+    совсем ним здесь этом один почти мой тем чтобы нее сейчас были куда зачем всех никогда можно при
+    наконец два об другой хоть после над больше тот через эти нас про всего них какая много разве
+    три эту моя впрочем хорошо свою этой перед иногда лучше чуть том нельзя такой им более всегда
+    конечно всю между это
+    """.split()
+)
+
+# Упрощённый стемминг: отрезаем типичные окончания (самые длинные — первыми)
+RU_ENDINGS = sorted(
+    """
+    ами ями ыми ими ого его ому ему ем им ым ой ей ий ый ая яя ое ее ую юю ах ях ов ев ом ам ям
+    ия ья ие ье ии ьи а я о е и ы у ю ь
+    """.split(),
+    key=len,
+    reverse=True,
+)
+EN_ENDINGS = ("ing", "ed", "es", "s")
+MIN_STEM_LENGTH = 3
+
+
+def _stem(token: str) -> str:
+    """Привести токен к упрощённой основе (русские и английские окончания)."""
+    endings = EN_ENDINGS if token.isascii() else RU_ENDINGS
+    for ending in endings:
+        if token.endswith(ending) and len(token) - len(ending) >= MIN_STEM_LENGTH:
+            return token[: -len(ending)]
+    return token
+
+
+def tokenize(text: str | None) -> list[str]:
+    """Разбить текст на термины: нижний регистр, ё -> е, без стоп-слов, упрощённый стемминг."""
+    if not text:
+        return []
+    tokens = TOKEN_RE.findall(text.lower().replace("ё", "е"))
+    return [_stem(token) for token in tokens if len(token) > 1 and token not in STOP_WORDS]
+
+
+def _document_terms(item: NewsItem | NewsRow) -> list[str]:
+    return tokenize(item.title) + tokenize(item.summary) + tokenize(item.raw_text)
+
+
+def _tf_weight(tf: int, length: int, avg_length: float) -> float:
+    """Вклад частоты термина в BM25 (без idf) с нормировкой по длине документа."""
+    norm = BM25_K1 * (1 - BM25_B + BM25_B * length / avg_length)
+    return tf * (BM25_K1 + 1) / (tf + norm)
+
+
+def index_news(items: NewsBatch | list[NewsItem]) -> int:
+    """Добавить новости в поисковый индекс. Уже проиндексированные новости пропускаются.
+        Возвращает количество добавленных документов.
+    """
+    if not items:
+        return 0
+
+    client = get_redis_client()
+
+    # Резервируем номера документов одним запросом; HSETNX закрепляет номер только за новой новостью,
+    # поэтому параллельные сборы не проиндексируют одну новость дважды
+    last_doc = client.incrby(SEARCH_NEXT_DOC_KEY, len(items))
+    first_doc = last_doc - len(items) + 1
+
+    pipe = client.pipeline(transaction=False)
+    for doc, item in enumerate(items, start=first_doc):
+        pipe.hsetnx(SEARCH_DOC_IDS_KEY, item.id, doc)
+    reserved = pipe.execute()
+
+    new_docs = [
+        (doc, item, _document_terms(item))
+        for (doc, item), is_new in zip(enumerate(items, start=first_doc), reserved)
+        if is_new
+    ]
+    if not new_docs:
+        return 0
+
+    # Порядок индексации — для trim_index (в том числе документов без терминов)
+    client.zadd(SEARCH_DOC_ORDER_KEY, {item.id: doc for doc, item, _terms in new_docs})
+
+    # Средняя длина — с учётом новой пачки, чтобы первый сбор нормировался по самому себе
+    stats = client.hgetall(SEARCH_STATS_KEY)
+    docs = int(stats.get("docs", 0)) + sum(1 for _, _, terms in new_docs if terms)
+    total = int(stats.get("total_length", 0)) + sum(len(terms) for _, _, terms in new_docs)
+    avg_length = total / docs if docs else 1.0
+
+    added = 0
+    total_length = 0
+    pipe = client.pipeline(transaction=True)
+    for doc, item, terms in new_docs:
+        if not terms:
+            continue
+
+        frequencies: dict[str, int] = {}
+        for term in terms:
+            frequencies[term] = frequencies.get(term, 0) + 1
+
+        length = len(terms)
+        for term, tf in frequencies.items():
+            pipe.zadd(f"{SEARCH_TERM_KEY_PREFIX}{term}", {doc: _tf_weight(tf, length, avg_length)})
+
+        pipe.hset(SEARCH_DOCS_KEY, doc, news_json(item))
+        pipe.hset(SEARCH_DOC_TERMS_KEY, doc, json.dumps({"length": length, "terms": list(frequencies)}))
+        total_length += length
+        added += 1
+
+    pipe.hincrby(SEARCH_STATS_KEY, "docs", added)
+    pipe.hincrby(SEARCH_STATS_KEY, "total_length", total_length)
+    pipe.execute()
+
+    trim_index(settings.search_index_limit)
+    logger.info("search: проиндексировано документов=%s", added)
+    return added
+
+
+def trim_index(limit: int) -> int:
+    """Удалить из индекса самые старые (по порядку индексации) документы сверх лимита."""
+    client = get_redis_client()
+    excess = client.zcard(SEARCH_DOC_ORDER_KEY) - limit
+    if excess <= 0:
+        return 0
+
+    oldest = client.zrange(SEARCH_DOC_ORDER_KEY, 0, excess - 1, withscores=True)
+    docs = [str(int(doc)) for _news_id, doc in oldest]
+    terms = client.hmget(SEARCH_DOC_TERMS_KEY, docs)
+
+    pipe = client.pipeline(transaction=True)
+    remove_from_index(pipe, [(news_id, doc, doc_terms) for (news_id, _), doc, doc_terms in zip(oldest, docs, terms)])
+    pipe.zrem(SEARCH_DOC_ORDER_KEY, *[news_id for news_id, _doc in oldest])
+    pipe.execute()
+
+    logger.info("search: удалено старых документов=%s", len(oldest))
+    return len(oldest)
+
+
+def remove_from_index(pipe, entries: list[tuple[str, str, str | None]]) -> None:
+    """Удалить документы (news_id, номер, JSON терминов) из индекса в транзакции pipe."""
+    removed = 0
+    removed_length = 0
+    for news_id, doc, doc_terms in entries:
+        pipe.hdel(SEARCH_DOC_IDS_KEY, news_id)
+        pipe.hdel(SEARCH_DOCS_KEY, doc)
+        pipe.hdel(SEARCH_DOC_TERMS_KEY, doc)
+        if not doc_terms:
+            # Документ без терминов не учитывался в статистике
+            continue
+        data = json.loads(doc_terms)
+        for term in data["terms"]:
+            pipe.zrem(f"{SEARCH_TERM_KEY_PREFIX}{term}", doc)
+        removed += 1
+        removed_length += int(data["length"])
+
+    if removed:
+        pipe.hincrby(SEARCH_STATS_KEY, "docs", -removed)
+        pipe.hincrby(SEARCH_STATS_KEY, "total_length", -removed_length)
+
+
+def search_news(query: str, offset: int = 0, limit: int = 20) -> list[NewsItem]:
+    """Найти новости по запросу и вернуть страницу результатов, отсортированных по BM25."""
+    terms = list(dict.fromkeys(tokenize(query)))
+    if not terms:
+        return []
+
+    client = get_redis_client()
+    total_docs = int(client.hget(SEARCH_STATS_KEY, "docs") or 0)
+    if total_docs <= 0:
+        return []
+
+    # По каждому термину — число документов (idf) и лучшие документы постинг-листа
+    depth = max(settings.search_postings_per_term, offset + limit)
+    pipe = client.pipeline(transaction=False)
+    for term in terms:
+        key = f"{SEARCH_TERM_KEY_PREFIX}{term}"
+        pipe.zcard(key)
+        pipe.zrevrange(key, 0, depth - 1, withscores=True)
+    results = pipe.execute()
+
+    scores: dict[str, float] = {}
+    for df, postings in zip(results[::2], results[1::2]):
+        if not df:
+            continue
+        idf = math.log(1 + (total_docs - df + 0.5) / (df + 0.5))
+        for doc, weight in postings:
+            scores[doc] = scores.get(doc, 0.0) + idf * weight
+
+    if not scores:
+        return []
+
+    top = heapq.nlargest(offset + limit, scores.items(), key=lambda pair: pair[1])[offset:]
+    if not top:
+        return []
+
+    raw_docs = client.hmget(SEARCH_DOCS_KEY, [doc for doc, _score in top])
+    result: list[NewsItem] = []
+    for raw in raw_docs:
+        if not raw:
+            continue
+        try:
+            result.append(NewsItem.model_validate_json(raw))
+        except ValueError:
+            continue
+    return result
@@ -0,0 +1,179 @@
+"""Статистика публикаций: счётчики по дням, обновляемые при записи.
+Каждая публикация в той же транзакции, что и запись истории (record_published),
+увеличивает счётчики в hash дня stats:published:<ГГГГ-ММ-ДД>:
+
+    total             — всего публикаций за день
+    source:<имя>      — по источнику
+    keyword:<слово>   — по совпавшему ключевому слову
+    channel:<канал>   — по каналу
+
+Поэтому GET /stats читает по одному hash на день диапазона и не зависит от длины истории.
+Счётчики за прошлое (до появления статистики) строятся один раз из истории:
+
+    python -m app.stats rebuild
+"""
+import argparse
+import json
+import logging
+import sys
+from collections import Counter
+from datetime import date, datetime, timedelta
+from typing import Any
+
+from redis.exceptions import WatchError
+
+from app.keys import PUBLISHED_POSTS_KEY
+from app.redis_client import get_redis_client
+
+logger = logging.getLogger(__name__)
+
+STATS_DAY_KEY_PREFIX = "stats:published:"
+
+STATS_TOTAL_FIELD = "total"
+# Измерения счётчиков: префикс поля hash -> ключ в ответе
+STATS_DIMENSIONS = {"source": "by_source", "keyword": "by_keyword", "channel": "by_channel"}
+
+# Сколько записей истории читать за один LRANGE при пересчёте
+STATS_REBUILD_CHUNK = 5000
+# Сколько раз повторить пересчёт, если история изменилась во время чтения (WATCH)
+STATS_REBUILD_RETRIES = 5
+
+
+def stats_day_key(day: date | str) -> str:
+    value = day.isoformat() if isinstance(day, date) else day
+    return f"{STATS_DAY_KEY_PREFIX}{value}"
+
+
+def _post_fields(post: dict[str, Any]) -> list[str]:
+    """Поля hash дня, которые увеличивает одна публикация."""
+    fields = [STATS_TOTAL_FIELD]
+    if post.get("source"):
+        fields.append(f"source:{post['source']}")
+    for keyword in dict.fromkeys(post.get("keywords") or []):
+        fields.append(f"keyword:{keyword}")
+    if post.get("channel_id"):
+        fields.append(f"channel:{post['channel_id']}")
+    return fields
+
+
+def _post_day(post: dict[str, Any]) -> str:
+    # published_at записывается в ISO-формате UTC: первые 10 символов — дата
+    return str(post.get("published_at") or "")[:10]
+
+
+def record_post_stats(pipe, post: dict[str, Any]) -> None:
+    """Увеличить счётчики дня публикации. pipe — пайплайн транзакции записи истории."""
+    key = stats_day_key(_post_day(post))
+    for field in _post_fields(post):
+        pipe.hincrby(key, field, 1)
+
+
+def _empty_counters() -> dict[str, Any]:
+    return {STATS_TOTAL_FIELD: 0, **{name: {} for name in STATS_DIMENSIONS.values()}}
+
+
+def _fold(counters: dict[str, Any], raw: dict[str, str]) -> None:
+    """Добавить поля hash дня к сводке."""
+    for field, value in raw.items():
+        count = int(value)
+        if field == STATS_TOTAL_FIELD:
+            counters[STATS_TOTAL_FIELD] += count
+            continue
+        dimension, _, name = field.partition(":")
+        target = STATS_DIMENSIONS.get(dimension)
+        if target is not None:
+            counters[target][name] = counters[target].get(name, 0) + count
+
+
+def _sorted_counters(counters: dict[str, Any]) -> dict[str, Any]:
+    for name in STATS_DIMENSIONS.values():
+        counters[name] = dict(sorted(counters[name].items(), key=lambda x: (-x[1], x[0])))
+    return counters
+
+
+def get_stats(since: date, until: date) -> dict[str, Any]:
+    """Сводка публикаций за дни since..until включительно и разбивка по дням.
+        Один HGETALL на день диапазона одним пайплайном.
+    """
+    days = [since + timedelta(days=i) for i in range((until - since).days + 1)]
+    pipe = get_redis_client().pipeline(transaction=False)
+    for day in days:
+        pipe.hgetall(stats_day_key(day))
+
+    summary = _empty_counters()
+    per_day: list[dict[str, Any]] = []
+    for day, raw in zip(days, pipe.execute()):
+        if not raw:
+            continue
+        counters = _empty_counters()
+        _fold(counters, raw)
+        _fold(summary, raw)
+        per_day.append({"day": day, **_sorted_counters(counters)})
+
+    return {"since": since, "until": until, **_sorted_counters(summary), "days": per_day}
+
+
+def rebuild_stats() -> dict[str, int]:
+    """Пересчитать счётчики всех дней по истории публикаций (posts:published).
+        Старые hash дней заменяются одной транзакцией; если история изменилась во время чтения,
+        пересчёт повторяется. Возвращает число учтённых публикаций и дней.
+    """
+    client = get_redis_client()
+
+    for _ in range(STATS_REBUILD_RETRIES):
+        with client.pipeline(transaction=True) as pipe:
+            try:
+                pipe.watch(PUBLISHED_POSTS_KEY)
+                counters: dict[str, Counter] = {}
+                posts = 0
+                length = pipe.llen(PUBLISHED_POSTS_KEY)
+                for start in range(0, length, STATS_REBUILD_CHUNK):
+                    for raw in pipe.lrange(PUBLISHED_POSTS_KEY, start, start + STATS_REBUILD_CHUNK - 1):
+                        try:
+                            post = json.loads(raw)
+                        except json.JSONDecodeError:
+                            continue
+                        if not isinstance(post, dict) or not _post_day(post):
+                            continue
+                        day = _post_day(post)
+                        counters.setdefault(day, Counter()).update(_post_fields(post))
+                        posts += 1
+
+                old_keys = list(pipe.scan_iter(match=f"{STATS_DAY_KEY_PREFIX}*", count=1000))
+
+                pipe.multi()
+                if old_keys:
+                    pipe.delete(*old_keys)
+                for day, day_counters in counters.items():
+                    pipe.hset(stats_day_key(day), mapping=dict(day_counters))
+                pipe.execute()
+            except WatchError:
+                continue
+
+        logger.info("Статистика пересчитана: публикаций=%s, дней=%s", posts, len(counters))
+        return {"posts": posts, "days": len(counters)}
+
+    raise RuntimeError("История публикаций менялась во время пересчёта статистики, попробуйте позже")
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Статистика публикаций")
+    commands = parser.add_subparsers(dest="command", required=True)
+    commands.add_parser("rebuild", help="Пересчитать счётчики по всей истории публикаций")
+    show = commands.add_parser("show", help="Показать сводку за диапазон дней")
+    today = datetime.utcnow().date()
+    show.add_argument("--since", type=date.fromisoformat, default=today - timedelta(days=6))
+    show.add_argument("--until", type=date.fromisoformat, default=today)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    if args.command == "rebuild":
+        result = rebuild_stats()
+    else:
+        result = get_stats(args.since, args.until)
+    print(json.dumps(result, ensure_ascii=False, indent=2, default=str))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,112 @@
+"""Задержки очередей Celery: ожидание в очереди отдельно от выполнения.
+При отправке задачи (before_task_publish) в заголовки сообщения пишется время постановки,
+воркер при старте задачи (task_prerun) считает ожидание, после завершения (task_postrun) — время выполнения.
+Последние замеры хранятся по очередям в Redis lists и отдаются в GET /health (task_queues).
+
+Время постановки берётся по часам отправителя (API, beat), поэтому часы машин должны быть синхронизированы.
+Модуль не импортирует Celery при загрузке: API читает статистику, не загружая Celery.
+"""
+import logging
+import time
+
+from app.config import settings
+from app.redis_client import get_redis_client
+
+logger = logging.getLogger(__name__)
+
+# Последние задержки задач очереди, секунды (Redis list): ожидание в очереди и выполнение
+TASK_WAIT_KEY_PREFIX = "tasks:latency:wait:"
+TASK_RUN_KEY_PREFIX = "tasks:latency:run:"
+
+# Заголовок сообщения со временем постановки задачи в очередь (unix time)
+ENQUEUED_AT_HEADER = "enqueued_at"
+
+# Очередь по умолчанию: задачи без маршрута и сообщения, поставленные до разделения очередей
+CELERY_DEFAULT_QUEUE = "newsbot"
+
+# Время старта выполняемых задач воркера: id задачи -> (очередь, perf_counter)
+_started: dict[str, tuple[str, float]] = {}
+
+
+def task_queues() -> list[str]:
+    """Очереди, которые слушает воркер, в порядке приоритета."""
+    return [settings.celery_interactive_queue, settings.celery_bulk_queue, CELERY_DEFAULT_QUEUE]
+
+
+def _record(key: str, value: float) -> None:
+    try:
+        pipe = get_redis_client().pipeline(transaction=False)
+        pipe.lpush(key, round(value, 3))
+        pipe.ltrim(key, 0, settings.task_latency_samples - 1)
+        pipe.execute()
+    except Exception:
+        # Метрики не должны ронять задачу
+        logger.exception("Не получилось записать задержку задачи в %s", key)
+
+
+def _task_queue(task) -> str:
+    delivery_info = getattr(task.request, "delivery_info", None) or {}
+    return delivery_info.get("routing_key") or task.app.conf.task_default_queue
+
+
+def on_before_task_publish(headers=None, **kwargs) -> None:
+    if headers is not None:
+        headers[ENQUEUED_AT_HEADER] = time.time()
+
+
+def on_task_prerun(task_id=None, task=None, **kwargs) -> None:
+    if task is None or task.request.is_eager:
+        return
+    queue = _task_queue(task)
+    _started[task_id] = (queue, time.perf_counter())
+
+    enqueued_at = getattr(task.request, ENQUEUED_AT_HEADER, None)
+    if enqueued_at is not None:
+        _record(f"{TASK_WAIT_KEY_PREFIX}{queue}", max(time.time() - float(enqueued_at), 0.0))
+
+
+def on_task_postrun(task_id=None, **kwargs) -> None:
+    started = _started.pop(task_id, None)
+    if started is not None:
+        queue, started_at = started
+        _record(f"{TASK_RUN_KEY_PREFIX}{queue}", time.perf_counter() - started_at)
+
+
+def connect_signals() -> None:
+    """Подключить обработчики сигналов Celery (вызывается из app.tasks)."""
+    from celery.signals import before_task_publish, task_postrun, task_prerun
+
+    before_task_publish.connect(on_before_task_publish, weak=False)
+    task_prerun.connect(on_task_prerun, weak=False)
+    task_postrun.connect(on_task_postrun, weak=False)
+
+
+def _summary(raw: list[str]) -> dict:
+    values = sorted(float(x) for x in raw)
+    if not values:
+        return {"samples": 0, "p50_s": None, "p95_s": None, "max_s": None}
+    return {
+        "samples": len(values),
+        "p50_s": round(values[len(values) // 2], 3),
+        "p95_s": round(values[min(int(len(values) * 0.95), len(values) - 1)], 3),
+        "max_s": round(values[-1], 3),
+    }
+
+
+def queue_latency_stats() -> dict[str, dict]:
+    """По каждой очереди: число задач в очереди (брокер — тот же Redis),
+        ожидание «постановка -> старт» и время выполнения по последним замерам.
+    """
+    queues = task_queues()
+    pipe = get_redis_client().pipeline(transaction=False)
+    for queue in queues:
+        pipe.llen(queue)
+        pipe.lrange(f"{TASK_WAIT_KEY_PREFIX}{queue}", 0, -1)
+        pipe.lrange(f"{TASK_RUN_KEY_PREFIX}{queue}", 0, -1)
+    results = pipe.execute()
+
+    stats: dict[str, dict] = {}
+    for i, queue in enumerate(queues):
+        pending, wait, run = results[3 * i:3 * i + 3]
+        stats[queue] = {"pending": pending, "wait": _summary(wait), "run": _summary(run)}
+    return stats
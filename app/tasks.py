@@ -1,21 +1,25 @@
 """Задачи Celery"""
 import time
-import json
 import logging
+from typing import TYPE_CHECKING
 
 from celery import Celery
+from kombu import Queue
 
 from app.config import settings
-from app.news_parser import collect_from_all_sources
+from app.keys import NEWS_URL_SEEN_KEY, PUBLISH_TRIGGER_KEY
 from app.redis_client import get_redis_client
-from app.utils import prepare_keywords, match_keywords
+from app.task_metrics import CELERY_DEFAULT_QUEUE, connect_signals, task_queues
 
+# Модули сбора, хранилища и публикации импортируются внутри задач:
+# процессу beat они не нужны, а воркер загружает их при первом запуске задачи
+if TYPE_CHECKING:
+    from app.batch import NewsBatch
+    from app.routing import ChannelRouter
 
-NEWS_LATEST_KEY = "new:latest"
-NEWS_URL_SEEN_KEY = "new:urls_seen"
-NEWS_LATEST_IDS_KEY = "new:latest_ids"
-PUBLISHED_POSTS_KEY = "posts:published"
-NEWS_LATEST_LIMIT = 100
+
+PUBLISH_LOCK_NAME = "publish"
+BACKFILL_LOCK_PREFIX = "backfill:"
 
 
 logger = logging.getLogger(__name__)
@@ -36,17 +40,42 @@ celery_app.conf.update(
     result_serializer="json",
     broker_connect_retry_on_startup=True, # Повторные попытки подключения к брокеру при старте
     result_expires=3600, # Время хранения результатов задач (в секундах)
-    task_default_queue="newsbot", # Очередь по умолчанию
+    task_default_queue=CELERY_DEFAULT_QUEUE, # Очередь по умолчанию
+    # Очереди воркера из настроек (interactive, bulk, по умолчанию): запуск без -Q слушает их в этом порядке
+    task_queues=[Queue(name) for name in task_queues()],
+    # Плановые и массовые задачи — в bulk-очередь; ручные запуски явно отправляются в interactive
+    task_routes={
+        "app.tasks.ping": {"queue": settings.celery_interactive_queue},
+        "app.tasks.collect_news": {"queue": settings.celery_bulk_queue},
+        "app.tasks.backfill_news": {"queue": settings.celery_bulk_queue},
+        "app.tasks.publish_news": {"queue": settings.celery_bulk_queue},
+        "app.tasks.publish_outbox": {"queue": settings.celery_bulk_queue},
+    },
+    # Воркер забирает задачи из очередей строго по порядку (interactive первой), а не по кругу
+    broker_transport_options={"queue_order_strategy": "priority"},
+    worker_prefetch_multiplier=1, # Не резервировать плановые задачи впрок, пока ждёт ручной запуск
 )
 
+# Время ожидания в очереди и выполнения задач по очередям (GET /health)
+connect_signals()
+
 """Расписание Celery Beat"""
-celery_app.conf.beat_schedule = {
-    "publish-news-every-30-min": {
-        "task": "app.tasks.publish_news",
-        "schedule": 30 * 60, # каждые 30 минут
-        "args": (5,), # по пять новостей
+if settings.continuous_publish_enabled:
+    # Непрерывный режим: частый сбор наполняет очередь, публикует отдельный процесс app.telegram.continuous
+    celery_app.conf.beat_schedule = {
+        "collect-news-continuous": {
+            "task": "app.tasks.collect_news",
+            "schedule": settings.continuous_collect_interval,
+        }
+    }
+else:
+    celery_app.conf.beat_schedule = {
+        "publish-news-every-30-min": {
+            "task": "app.tasks.publish_news",
+            "schedule": 30 * 60, # каждые 30 минут
+            "args": (5,), # по пять новостей
+        }
     }
-}
 
 
 @celery_app.task(name="app.tasks.ping")
@@ -56,71 +85,125 @@ def ping() -> str:
 
 
 @celery_app.task(name="app.tasks.collect_news")
-def collect_news() -> list[dict]:
-    """Собрать новости из всех источников и применить фильтрацию по ключевым словам."""
-    keywords = prepare_keywords(settings.keywords_list)
-    logger.info(f"collect news: keywords {keywords}")
-
-    # Если keywords пустой
-    if not keywords and settings.strict_filtering:
+def collect_news() -> dict | list[dict]:
+    """Собрать новости из всех источников и применить фильтрацию по ключевым словам
+    (объединение подписок всех каналов).
+    С settings.claim_check_enabled возвращает ссылку на пачку в Redis (см. app.claim_check),
+    иначе — список новостей.
+    """
+    from app.batch import NewsBatch
+    from app.news_parser import collect_from_all_sources_coalesced
+    from app.news_parser.telegram import commit_tg_marks
+    from app.routing import ChannelRouter
+
+    router = ChannelRouter.load()
+    logger.info(f"collect news: keywords {router.keywords}")
+
+    # Если keywords пустой и нет каналов, подписанных на все новости
+    if not router.keywords and not router.wildcard_channels and settings.strict_filtering:
         logger.info("collect_news: строгий режим включён, ключевые слова отсутствуют — возврат пустого списка")
-        return []
+        return _collect_result(NewsBatch())
 
     start_ts = time.time()
-    items = collect_from_all_sources()
+    items, tg_marks = collect_from_all_sources_coalesced()
     logger.info("collect_news: collected=%s", len(items))
 
-    result: list[dict] = []
-    for item in items:
-        matched = match_keywords(item.title, item.summary, keywords) if keywords else []
-
-        # Если совпадений нет
-        if not matched and settings.strict_filtering:
-            continue
-
-        payload = item.model_dump(mode="json")
-        payload["keywords"] = matched
-        result.append(payload)
+    result = process_collected_news(items, router)
+    # Telegram-каналы считаются прочитанными только после того, как новости сохранены
+    commit_tg_marks(tg_marks)
 
     elapsed = time.time() - start_ts
     logger.info("collect_news: done in %.2fs, returned=%s", elapsed, len(result))
-    return result
+    return _collect_result(result)
 
 
-def load_latest_from_redis() -> list[dict]:
-    """Загрузить последние новости из Redis (JSON list)."""
-    client = get_redis_client()
-    raw_value = client.get(NEWS_LATEST_KEY)
-    if not raw_value:
-        return []
+def _collect_result(batch: "NewsBatch") -> dict | list[dict]:
+    """Результат задачи сбора: ссылка claim-check или список новостей."""
+    if settings.claim_check_enabled:
+        from app.claim_check import store_news_batch
 
-    try:
-        data = json.loads(raw_value)
-    except json.JSONDecodeError:
-        logger.warning("load_latest_from_redis: invalid JSON")
-        return []
+        return store_news_batch(batch)
+    return batch.to_records()
 
-    if not isinstance(data,list):
-        logger.warning("load_latest_from_redis: expected list, got %s", type(data).__name__)
-        return []
 
-    return [item for item in data if isinstance(item, dict)]
+def process_collected_news(batch: "NewsBatch", router: "ChannelRouter") -> "NewsBatch":
+    """Общий путь обработки собранных новостей (обычный и догоняющий сбор):
+        ключевые слова, хранилище и поиск, outbox, отметка URL как встречавшихся.
+        Возвращает новости, прошедшие фильтр.
+    """
+    from app.news_parser.backfill import mark_urls_as_seen
+    from app.news_store import save_news
+    from app.search import index_news
 
+    batch.match(router)
 
-def save_latest_to_redis(items: list[dict]):
-    """Сохранить последние новости в Redis (JSON list)."""
-    client = get_redis_client()
-    payload = json.dumps(items, ensure_ascii=False)
-    client.set(NEWS_LATEST_KEY, payload)
+    # Хранилище последних новостей (для GET /news) и поисковый индекс обновляются при каждом сборе
+    # Сначала индекс: обрезка хранилища в save_news удаляет вытесненные новости и из индекса
+    index_news(batch)
+    save_news(batch)
 
+    # Если совпадений нет, новость отбрасывается
+    if settings.strict_filtering and not router.wildcard_channels:
+        result = batch.take(i for i, keywords in enumerate(batch.keywords) if keywords)
+    else:
+        result = batch
 
-def mark_urls_as_seen(urls: list[str]):
-    """Добавить URL в Redis."""
-    if not urls:
-        return
+    # Кандидаты на публикацию уходят в outbox (Redis Stream), отдельно для каждого канала
+    if settings.publish_outbox_enabled:
+        from app.outbox import enqueue_news
+        from app.telegram.publisher import filter_not_published
 
-    client = get_redis_client()
-    client.sadd(NEWS_URL_SEEN_KEY, *urls)
+        for channel_id, channel_batch in router.fan_out(batch).items():
+            enqueue_news(filter_not_published(channel_batch, channel_id).to_items(), channel_id)
+
+    # Непрерывный режим: новые для канала новости — в приоритетную очередь
+    if settings.continuous_publish_enabled:
+        from app.publish_queue import enqueue_priority
+        from app.telegram.publisher import filter_not_published
+
+        for channel_id, channel_batch in router.fan_out(batch).items():
+            enqueue_priority(filter_not_published(channel_batch, channel_id).to_items(), channel_id)
+
+    # По встречавшимся URL догоняющий сбор понимает, где остановиться
+    mark_urls_as_seen(batch.urls)
+    return result
+
+
+@celery_app.task(name="app.tasks.backfill_news")
+def backfill_news(source: str = "habr", max_pages: int | None = None) -> int:
+    """Догоняющий сбор после простоя: страницы 2..max_pages ленты источника,
+        пока на странице есть ещё не встречавшиеся новости.
+        Возвращает количество новых новостей, прошедших фильтр.
+    """
+    from app.locks import LeaseLock
+    from app.news_parser import normalize_raw_batch
+    from app.news_parser.backfill import backfill_source_raw, store_backfill_backlog
+    from app.routing import ChannelRouter
+
+    lock = LeaseLock(f"{BACKFILL_LOCK_PREFIX}{source}", settings.collect_lock_ttl)
+    if not lock.acquire():
+        logger.info("backfill_news: сбор %s уже выполняется", source)
+        return 0
+
+    try:
+        start_ts = time.time()
+        raw_items = backfill_source_raw(source, max_pages=max_pages)
+
+        items = normalize_raw_batch(source, raw_items)
+        result = process_collected_news(items, ChannelRouter.load())
+        if not settings.publish_outbox_enabled and not settings.continuous_publish_enabled:
+            # Публикация по расписанию собирает только первую страницу: найденное ждёт её в backlog
+            store_backfill_backlog(result)
+        logger.info(
+            "backfill_news: source=%s, новых=%s, прошло фильтр=%s, за %.2fs",
+            source,
+            len(items),
+            len(result),
+            time.time() - start_ts,
+        )
+        return len(result)
+    finally:
+        lock.release()
 
 
 def filter_new_items_by_urls_seen(items: list[dict]) -> list[dict]:
@@ -141,49 +224,33 @@ def filter_new_items_by_urls_seen(items: list[dict]) -> list[dict]:
     return news_items
 
 
-def merge_and_trim_latest(new_items: list[dict], existing_items: list[dict]) -> list[dict]:
-    """Склеить новые+старые, убрать дубли по URL и обрезать до лимита."""
-    merged: list[dict] =[]
-    seen_urls: set[str] = set()
-
-    for item in new_items + existing_items:
-        url = item.get("url")
-        if not url:
-            continue
-
-        if url in seen_urls:
-            continue
-
-        seen_urls.add(url)
-        merged.append(item)
-
-        if len(merged) >= NEWS_LATEST_LIMIT:
-            break
-
-    return merged
-
-
-def save_latest_ids_to_redis(items: list[dict]) -> None:
-    """Сохранить id новостей в Redis list."""
-    client = get_redis_client()
-    ids: list[str] = []
-
-    for item in items:
-        news_id = item.get("id")
-        if news_id:
-            ids.append(str(news_id))
+@celery_app.task(name="app.tasks.publish_news", bind=True)
+def publish_news(self, limit: int = 5) -> int:
+    """Собрать свежие новости и опубликовать их в Telegram канал.
+        Одновременно выполняется только одна публикация: повторный запуск объединяется с текущим.
+    """
+    # Asyncio внутри celery-таски
+    import asyncio
+    from app.locks import LeaseLock, release_if_equals
+    from app.telegram.publisher import publish_latest_news
 
-    if not ids:
-        return
+    lock = LeaseLock(PUBLISH_LOCK_NAME, settings.publish_lock_ttl)
+    if not lock.acquire():
+        logger.info("publish_news: публикация уже выполняется, запуск объединён с текущим")
+        return 0
 
-    client.rpush(NEWS_LATEST_IDS_KEY, *ids)
+    try:
+        return asyncio.run(publish_latest_news(limit=limit, lock=lock))
+    finally:
+        lock.release()
+        if self.request.id:
+            release_if_equals(PUBLISH_TRIGGER_KEY, self.request.id)
 
 
-@celery_app.task(name="app.tasks.publish_news")
-def publish_news(limit: int = 5) -> int:
-    """Собрать свежие новости и опубликовать их в Telegram канал."""
-    # Asyncio внутри celery-таски
+@celery_app.task(name="app.tasks.publish_outbox")
+def publish_outbox(limit: int = 5) -> int:
+    """Опубликовать новости из outbox без повторного сбора (для дополнительных реплик публикатора)."""
     import asyncio
-    from app.telegram.publisher import publish_latest_news
+    from app.telegram.publisher import publish_from_outbox
 
-    return asyncio.run(publish_latest_news(limit=limit))
\ No newline at end of file
+    return asyncio.run(publish_from_outbox(limit=limit))
@@ -10,6 +10,8 @@ logger = logging.getLogger(__name__)
 
 SESSION_DIR = Path("data") / "telegram"
 SESSION_NAME = "bot_session"
+# Пользовательская сессия для чтения каналов-источников (боты не могут читать историю каналов)
+READER_SESSION_NAME = "reader_session"
 
 
 def ensure_session_dir() -> None:
@@ -38,8 +40,36 @@ async def get_telegram_client() -> TelegramClient:
         raise
 
 
+
+def _reader_client() -> TelegramClient:
+    ensure_session_dir()
+    return TelegramClient(
+        session=str(SESSION_DIR / READER_SESSION_NAME),
+        api_id=settings.telegram_api_id,
+        api_hash=settings.telegram_api_hash,
+    )
+
+
+async def get_telegram_reader_client() -> TelegramClient:
+    """Подключить пользовательский клиент для чтения Telegram-каналов.
+    Сессия должна быть авторизована заранее: python -m app.telegram.bot --login
+    """
+    client = _reader_client()
+    await client.connect()
+
+    if not await client.is_user_authorized():
+        await client.disconnect()
+        raise RuntimeError(
+            "Сессия чтения Telegram не авторизована, выполните: python -m app.telegram.bot --login"
+        )
+
+    logger.info("Telegram reader client connected session=%s", READER_SESSION_NAME)
+    return client
+
+
 if __name__ == "__main__":
     import asyncio
+    import sys
 
     async def main() -> None:
         client = await get_telegram_client()
@@ -47,4 +77,12 @@ if __name__ == "__main__":
         print(f"Подключился как id={me.id}, username={me.username}")
         await client.disconnect()
 
-    asyncio.run(main())
\ No newline at end of file
+    async def login() -> None:
+        # Интерактивный вход по номеру телефона (один раз, сессия сохраняется в data/telegram)
+        client = _reader_client()
+        await client.start()
+        me = await client.get_me()
+        print(f"Сессия чтения авторизована: id={me.id}, username={me.username}")
+        await client.disconnect()
+
+    asyncio.run(login() if "--login" in sys.argv else main())
\ No newline at end of file
@@ -0,0 +1,111 @@
+"""Непрерывная публикация из приоритетной очереди (settings.continuous_publish_enabled).
+Процесс держит одно подключение к Telegram и публикует по одной новости
+не чаще, чем раз в settings.continuous_publish_interval секунд. Пустую очередь ждёт через BZPOPMAX,
+поэтому новость, попавшая в очередь при сборе, уходит в канал почти сразу.
+Одновременно очередь разбирает только один процесс (блокировка publish:continuous),
+остальные реплики ждут в резерве.
+
+    python -m app.telegram.continuous
+"""
+import asyncio
+import logging
+import time
+
+from app.config import settings
+from app.locks import LeaseLock, LockLost
+from app.publish_queue import pop_next, record_latency, requeue
+from app.redis_client import get_redis_client
+from app.telegram.publisher import format_news_message, published_urls_key, record_published
+
+logger = logging.getLogger(__name__)
+
+CONTINUOUS_LOCK_NAME = "publish:continuous"
+# Пауза после ошибки отправки, секунды
+CONTINUOUS_ERROR_BACKOFF = 30
+
+
+def _lock_ttl() -> int:
+    # Аренда переживает самое долгое ожидание в цикле: BZPOPMAX + пауза между сообщениями
+    return int(settings.continuous_publish_interval * 2 + settings.continuous_poll_timeout + 30)
+
+
+async def sleep_holding_lock(lock: LeaseLock, seconds: float) -> None:
+    """Подождать seconds, продлевая аренду: пауза (например, Telegram FloodWait на минуты) бывает дольше TTL.
+        Блокировка не отпускается: другая реплика с тем же ботом упёрлась бы в тот же FloodWait.
+        Спим отрезками не длиннее трети TTL; если продлить не удалось — LockLost.
+    """
+    step = _lock_ttl() / 3
+    deadline = time.monotonic() + seconds
+    while (remaining := deadline - time.monotonic()) > 0:
+        await asyncio.sleep(min(step, remaining))
+        if not lock.extend():
+            raise LockLost(f"Блокировка {lock.name!r} потеряна")
+
+
+async def publish_next(client, lock: LeaseLock) -> bool:
+    """Опубликовать одну новость из очереди. True, если сообщение отправлено."""
+    popped = await asyncio.to_thread(pop_next, settings.continuous_poll_timeout)
+    if popped is None:
+        return False
+
+    channel_id, item, score, queued_at = popped
+    redis_client = get_redis_client()
+    if item.url and redis_client.sismember(published_urls_key(channel_id), str(item.url)):
+        return False
+
+    if not lock.extend():
+        requeue(channel_id, item, score, queued_at)
+        raise LockLost(f"Блокировка {lock.name!r} потеряна")
+
+    from telethon.errors import FloodWaitError
+
+    try:
+        await client.send_message(channel_id, format_news_message(item), parse_mode="html")
+    except FloodWaitError as exc:
+        requeue(channel_id, item, score, queued_at)
+        logger.warning("Telegram flood wait %ss, пауза публикации", exc.seconds)
+        await sleep_holding_lock(lock, exc.seconds)
+        return False
+    except Exception:
+        requeue(channel_id, item, score, queued_at)
+        logger.exception("Ошибка отправки в канал %s, новость возвращена в очередь", channel_id)
+        await asyncio.sleep(CONTINUOUS_ERROR_BACKOFF)
+        return False
+
+    record_published(redis_client, item, channel_id, fence=lock)
+    latency = time.time() - queued_at
+    record_latency(latency)
+    logger.info("Опубликовано в %s через %.1fs после обнаружения: %s", channel_id, latency, item.title)
+    return True
+
+
+async def run_continuous_publisher() -> None:
+    """Основной цикл: захватить блокировку и публиковать из очереди с постоянной скоростью."""
+    from app.telegram.bot import get_telegram_client
+
+    while True:
+        lock = LeaseLock(CONTINUOUS_LOCK_NAME, _lock_ttl())
+        if not lock.acquire():
+            await asyncio.sleep(settings.continuous_poll_timeout)
+            continue
+
+        logger.info("Непрерывная публикация: интервал %ss", settings.continuous_publish_interval)
+        client = await get_telegram_client()
+        try:
+            while True:
+                if not lock.extend():
+                    raise LockLost(f"Блокировка {lock.name!r} потеряна")
+                if await publish_next(client, lock):
+                    await asyncio.sleep(settings.continuous_publish_interval)
+        except LockLost:
+            logger.warning("Непрерывная публикация: блокировка потеряна, переход в резерв")
+        finally:
+            await client.disconnect()
+            lock.release()
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    if not settings.continuous_publish_enabled:
+        raise SystemExit("CONTINUOUS_PUBLISH_ENABLED=false: непрерывная публикация выключена")
+    asyncio.run(run_continuous_publisher())
@@ -12,17 +12,31 @@ import json
 from datetime import datetime
 
 from app.config import settings
-from app.news_parser import collect_from_all_sources
-from app.redis_client import get_redis_client
+from app.locks import LeaseLock, LockLost
+from app.news_parser import collect_from_all_sources_coalesced
+from app.news_parser.backfill import load_backfill_backlog, mark_urls_as_seen, remove_from_backlog
+from app.news_parser.telegram import commit_tg_marks
+from app.news_store import save_news
+from app.search import index_news
+from app.batch import NewsBatch, NewsRow
+from app.outbox import ack_outbox_entry, default_consumer_name, enqueue_news, read_outbox
+from app.redis_client import bump_data_version, get_redis_client
+from app.routing import ChannelRouter
 from app.schemas import NewsItem
-from app.telegram.bot import get_telegram_client
-from app.tasks import PUBLISHED_POSTS_KEY
-from app.utils import prepare_keywords, match_keywords
+from app.stats import record_post_stats
+from app.keys import PUBLISHED_POSTS_KEY
 
 logger = logging.getLogger(__name__)
 
 TITLE_MAX_LENGTH = 200
 SUMMARY_MAX_LENGTH = 700
+DIGEST_SUMMARY_MAX_LENGTH = 300
+
+# Ограничение Telegram на длину одного текстового сообщения
+TELEGRAM_MESSAGE_MAX_LENGTH = 4096
+
+SOURCE_DISPLAY_NAMES = {"habr": "Habr", "rbc": "РБК"}
+DIGEST_OTHER_GROUP = "Другое"
 
 # Сколько новостей отправлять за один запуск
 PUBLISH_LIMIT = 5
@@ -47,13 +61,17 @@ def truncate_text(text: str, max_len: int) -> str:
     return text[: max_len - 3].rstrip() + "..."
 
 
-def format_news_message(item: NewsItem) -> str:
+def display_source_name(value: str | None) -> str:
+    """Человекочитаемое имя источника (habr -> Habr)."""
+    source = normalize_text(value)
+    return SOURCE_DISPLAY_NAMES.get(source.lower(), source)
+
+
+def format_news_message(item: NewsItem | NewsRow) -> str:
     """Сформировать HTML-сообщение для Telegram."""
     title = truncate_text(normalize_text(item.title), TITLE_MAX_LENGTH)
 
-    source = normalize_text(item.source)
-    source_map = {"habr": "Habr", "rbc": "РБК"}
-    source = source_map.get(source.lower(), source)
+    source = display_source_name(item.source)
 
     summary = normalize_text(item.summary)
     if summary:
@@ -86,105 +104,306 @@ def format_news_message(item: NewsItem) -> str:
     return "\n\n".join(parts)
 
 
-def filter_not_published(items: list[NewsItem]) -> list[NewsItem]:
-    """Оставить только новости, которые еще не публиковались (по URL)."""
-    client = get_redis_client()
-    result: list[NewsItem] = []
+def format_digest_entry(item: NewsItem | NewsRow, layout: str = "compact") -> str:
+    """Сформировать HTML-строку одной новости внутри дайджеста."""
+    title_html = html.escape(truncate_text(normalize_text(item.title), TITLE_MAX_LENGTH))
+    url_html = html.escape(str(item.url) if item.url else "")
 
-    skipped = 0
+    if url_html:
+        entry = f'• <a href="{url_html}">{title_html}</a>'
+    else:
+        entry = f"• {title_html}"
+
+    if layout != "full":
+        return entry
+
+    summary = normalize_text(item.summary)
+    if summary:
+        entry += "\n" + html.escape(truncate_text(summary, DIGEST_SUMMARY_MAX_LENGTH))
+
+    if item.keywords:
+        entry += f"\n🏷️ {html.escape(', '.join(item.keywords[:5]))}"
+
+    return entry
+
+
+def group_digest_items(items: list[NewsItem], group_by: str = "source") -> list[tuple[str, list[NewsItem]]]:
+    """Сгруппировать новости для дайджеста (по источнику, ключевому слову или без группировки).
+        Порядок групп и новостей внутри групп сохраняется.
+    """
+    if group_by == "none":
+        return [("", list(items))]
+
+    groups: dict[str, list[NewsItem]] = {}
     for item in items:
-        url = str(item.url) if item.url else ""
-        if not url:
-            continue
+        if group_by == "keyword":
+            name = item.keywords[0] if item.keywords else DIGEST_OTHER_GROUP
+        else:
+            name = display_source_name(item.source) or DIGEST_OTHER_GROUP
+        groups.setdefault(name, []).append(item)
+
+    return list(groups.items())
+
+
+def build_digest_messages(
+    items: list[NewsItem],
+    group_by: str = "source",
+    layout: str = "compact",
+    title: str = "",
+    max_length: int = TELEGRAM_MESSAGE_MAX_LENGTH,
+) -> list[tuple[str, list[NewsItem]]]:
+    """Упаковать новости в минимальное число сообщений-дайджестов.
+        Возвращает пары (HTML-сообщение, новости в этом сообщении).
+        Группа, не поместившаяся в сообщение, продолжается в следующем с повтором заголовка группы.
+    """
+    header = f"<b>{html.escape(title)}</b>" if title else ""
+
+    messages: list[tuple[str, list[NewsItem]]] = []
+    parts: list[str] = [header] if header else []
+    length = len(header)
+    packed: list[NewsItem] = []
+
+    def flush() -> None:
+        nonlocal parts, length, packed
+        if packed:
+            messages.append(("\n".join(parts).strip(), packed))
+        parts = [header] if header else []
+        length = len(header)
+        packed = []
+
+    for group_name, group_items in group_digest_items(items, group_by):
+        group_header = f"\n<b>{html.escape(group_name)}</b>" if group_name else ""
+        group_opened = False
+
+        for item in group_items:
+            entry = format_digest_entry(item, layout)
+            pending = [entry] if group_opened or not group_header else [group_header, entry]
+            extra = sum(len(part) + 1 for part in pending)
+
+            if packed and length + extra > max_length:
+                flush()
+                pending = [group_header, entry] if group_header else [entry]
+                extra = sum(len(part) + 1 for part in pending)
+
+            if length + extra > max_length:
+                logger.warning("Новость не помещается в сообщение-дайджест, пропускаем: %s", item.url)
+                continue
+
+            parts.extend(pending)
+            length += extra
+            packed.append(item)
+            group_opened = True
+
+    flush()
+    return messages
+
+
+def published_urls_key(channel_id: str | None = None) -> str:
+    """Redis SET опубликованных URL канала.
+        Для канала из настроек сохраняется прежний ключ, чтобы не потерять накопленную историю.
+    """
+    if not channel_id or channel_id == settings.telegram_channel_id:
+        return PUBLISHED_URLS_KEY
+    return f"{PUBLISHED_URLS_KEY}:{channel_id}"
 
-        if client.sismember(PUBLISHED_URLS_KEY, url):
-            skipped += 1
-            continue
 
-        result.append(item)
+def filter_not_published(
+    items: NewsBatch | list[NewsItem],
+    channel_id: str | None = None,
+) -> NewsBatch | list[NewsItem]:
+    """Оставить только новости, которые еще не публиковались в канале (по URL).
+        Проверка всей пачки — один запрос SMISMEMBER; для NewsBatch результат — тоже NewsBatch.
+    """
+    urls = items.urls if isinstance(items, NewsBatch) else [str(item.url) if item.url else "" for item in items]
+    keep = [i for i, url in enumerate(urls) if url]
 
-    logger.info("Дедупликация: пропущено уже опубликованных=%s", skipped)
-    return result
+    skipped = 0
+    if keep:
+        flags = get_redis_client().smismember(published_urls_key(channel_id), [urls[i] for i in keep])
+        skipped = sum(flags)
+        keep = [i for i, published in zip(keep, flags) if not published]
+
+    logger.info("Дедупликация: канал=%s, пропущено уже опубликованных=%s", channel_id, skipped)
+    if isinstance(items, NewsBatch):
+        return items.take(keep)
+    return [items[i] for i in keep]
 
 
-def mark_published(urls: list[str]) -> None:
-    """Пометить URL как опубликованные (добавить в Redis SET)."""
+def mark_published(urls: list[str], channel_id: str | None = None) -> None:
+    """Пометить URL как опубликованные в канале (добавить в Redis SET)."""
     if not urls:
         return
     client = get_redis_client()
-    client.sadd(PUBLISHED_URLS_KEY, *urls)
+    client.sadd(published_urls_key(channel_id), *urls)
+
+
+def record_published(
+    redis_client,
+    item: NewsItem | NewsRow,
+    channel_id: str,
+    entry_id: str | None = None,
+    fence: LeaseLock | None = None,
+) -> None:
+    """Атомарно записать публикацию: история, счётчики статистики, множество опубликованных URL канала,
+        удаление из backlog догоняющего сбора и (для outbox) подтверждение записи стрима —
+        одной транзакцией MULTI/EXEC.
+        Если передан fence, запись проходит только пока блокировка принадлежит нам (WATCH на ключ блокировки).
+    """
+    url = str(item.url) if item.url else ""
+    # История публикаций (для /api/posts)
+    published_post = {
+        "news_id": item.id,
+        "published_at": datetime.utcnow().isoformat(),
+        "channel_id": channel_id,
+        "title": item.title,
+        "url": url,
+        "source": item.source,
+        "keywords": item.keywords,
+    }
+
+    with redis_client.pipeline(transaction=True) as pipe:
+        if fence is not None:
+            pipe.watch(fence.key)
+            if pipe.get(fence.key) != fence.token:
+                raise LockLost(f"Блокировка {fence.name!r} потеряна, запись истории отменена")
+            pipe.multi()
+
+        pipe.rpush(PUBLISHED_POSTS_KEY, json.dumps(published_post, ensure_ascii=False))
+        bump_data_version(pipe, PUBLISHED_POSTS_KEY)
+        # Счётчики для GET /stats — в той же транзакции, что и история
+        record_post_stats(pipe, published_post)
+        if url:
+            pipe.sadd(published_urls_key(channel_id), url)
+        remove_from_backlog(pipe, item.id)
+        if entry_id:
+            ack_outbox_entry(pipe, entry_id, channel_id, url)
+        pipe.execute()
+
+
+def collect_candidates() -> tuple[dict[str, NewsBatch], dict[str, int]]:
+    """Собрать новости, сопоставить с подписками каналов и убрать уже опубликованные.
+        Возвращает новости для публикации по каналам и high-water mark Telegram-каналов,
+        которые фиксируются после публикации (app.news_parser.telegram.commit_tg_marks).
+    """
+    batch, tg_marks = collect_from_all_sources_coalesced()
+    # Новости, найденные догоняющим сбором на следующих страницах ленты
+    backlog = load_backfill_backlog()
+    logger.info("Собрано новостей: %s, из догоняющего сбора: %s", len(batch), len(backlog))
+    if not batch and not backlog:
+        return {}, tg_marks
+
+    # Вся пачка сопоставляется один раз с объединением ключевых слов всех каналов
+    router = ChannelRouter.load()
+    batch.match(router)
+
+    # Хранилище последних новостей (для GET /news) и поисковый индекс обновляются при каждом сборе
+    # Сначала индекс: обрезка хранилища в save_news удаляет вытесненные новости и из индекса
+    index_news(batch)
+    save_news(batch)
+    # По встречавшимся URL догоняющий сбор понимает, где остановиться
+    mark_urls_as_seen(batch.urls)
+
+    if backlog:
+        known = set(batch.ids)
+        backlog = backlog.take(i for i, news_id in enumerate(backlog.ids) if news_id not in known)
+        backlog.match(router)
+        batch.extend(backlog)
+
+    candidates: dict[str, NewsBatch] = {}
+    for channel_id, channel_batch in router.fan_out(batch).items():
+        #Дедупликация по URL (Redis), отдельно для каждого канала
+        fresh = filter_not_published(channel_batch, channel_id)
+        if fresh:
+            candidates[channel_id] = fresh
+
+    if not candidates:
+        logger.info("Новых (не опубликованных) новостей нет")
+    return candidates, tg_marks
 
 
-async def publish_latest_news(limit: int = PUBLISH_LIMIT) -> int:
-    """Собрать и опубликовать свежие новости в Telegram.
+def build_batches(items: NewsBatch | list[NewsItem], limit: int) -> list[tuple[str, list[NewsItem]]]:
+    """Разбить новости на сообщения согласно режиму публикации (single/digest).
+        Для NewsBatch сообщения формируются прямо из колонок пачки, без создания NewsItem.
+    """
+    if settings.publish_mode == "digest":
+        return build_digest_messages(
+            items[: settings.digest_max_items],
+            group_by=settings.digest_group_by,
+            layout=settings.digest_layout,
+            title=settings.digest_title,
+        )
+    return [(format_news_message(item), [item]) for item in items[:limit]]
+
+
+async def send_batches(
+    client,
+    channel_id: str,
+    batches: list[tuple[str, list[NewsItem]]],
+    entry_ids: dict[str, str] | None = None,
+    lock: LeaseLock | None = None,
+) -> int:
+    """Отправить сообщения в канал через уже подключённый Telegram-клиент.
+        Каждая новость фиксируется в Redis сразу после успешной отправки своего сообщения,
+        поэтому падение посреди пачки не вызывает повторов.
+        Перед каждой отправкой аренда lock продлевается; если она потеряна — публикация прерывается.
         Сколько сообщений отправлено.
     """
-    items = collect_from_all_sources()
-    logger.info("Собрано новостей: %s", len(items))
-    if not items:
-        return 0
+    entry_ids = entry_ids or {}
+    redis_client = get_redis_client()
 
-    keywords = prepare_keywords(settings.keywords_list)
+    sent = 0
+    for message, batch_items in batches:
+        if lock is not None and not lock.extend():
+            raise LockLost(f"Блокировка {lock.name!r} потеряна, публикация прервана")
 
-    filtered: list[NewsItem] = []
-    for item in items:
-        matched = match_keywords(item.title, item.summary, keywords) if keywords else []
+        await client.send_message(
+            channel_id,
+            message,
+            parse_mode="html",
+        )
+        sent += 1
 
-        # Строгая фильтрация: если ключевых слов нет в новости, то пропускаем
-        if settings.strict_filtering and keywords and not matched:
-            continue
+        #Помечаем как опубликованные только то, что реально отправили
+        for item in batch_items:
+            record_published(redis_client, item, channel_id, entry_ids.get(item.id), fence=lock)
 
-        item.keywords = matched
-        filtered.append(item)
+    logger.info("Канал %s: отправлено сообщений: %s", channel_id, sent)
+    return sent
 
-    logger.info("После фильтрации по ключевым словам: %s", len(filtered))
-    if not filtered:
-        return 0
 
-    #Дедупликация по URL (Redis)
-    filtered = filter_not_published(filtered)
-    if not filtered:
-        logger.info("Новых (не опубликованных) новостей нет")
+async def publish_to_channels(
+    candidates: dict[str, NewsBatch | list[NewsItem]],
+    limit: int,
+    entry_ids: dict[tuple[str, str], str] | None = None,
+    lock: LeaseLock | None = None,
+) -> int:
+    """Опубликовать новости по каналам через одно подключение к Telegram.
+        entry_ids — записи outbox по паре (канал, id новости).
+        Сколько сообщений отправлено.
+    """
+    if not candidates:
         return 0
 
-    to_send = filtered[:limit]
+    # Telethon загружается только когда действительно нужно отправлять сообщения
+    from app.telegram.bot import get_telegram_client
+    # Ранжирование тянет numpy — тоже только перед отправкой
+    from app.scoring import RelevanceScorer, rank_news
 
+    entry_ids = entry_ids or {}
+    # Публикуются самые релевантные новости, а не первые по порядку источников
+    scorer = RelevanceScorer() if settings.scoring_enabled else None
+    count = settings.digest_max_items if settings.publish_mode == "digest" else limit
     client = await get_telegram_client()
-    redis_client = get_redis_client()
-    sent_urls: list[str] = []
     try:
         sent = 0
-        for item in to_send:
-            message = format_news_message(item)
-            await client.send_message(
-                settings.telegram_channel_id,
-                message,
-                parse_mode="html",
-            )
-            # История публикаций (для /api/posts)
-            published_post = {
-                "news_id": item.id,
-                "published_at": datetime.utcnow().isoformat(),
-                "channel_id": settings.telegram_channel_id,
-                "title": item.title,
-                "url": str(item.url),
-                "source": item.source,
-                "keywords": item.keywords,
+        for channel_id, items in candidates.items():
+            items = rank_news(items, count, scorer)
+            channel_entries = {
+                news_id: entry_id
+                for (entry_channel, news_id), entry_id in entry_ids.items()
+                if entry_channel == channel_id
             }
-
-            redis_client.rpush(
-                PUBLISHED_POSTS_KEY,
-                json.dumps(published_post, ensure_ascii=False),
-            )
-
-            sent += 1
-
-            url = str(item.url) if item.url else ""
-            if url:
-                sent_urls.append(url)
-
-        #Помечаем как опубликованные только то, что реально отправили
-        mark_published(sent_urls)
+            sent += await send_batches(client, channel_id, build_batches(items, limit), channel_entries, lock)
 
         logger.info("Отправлено сообщений: %s", sent)
         return sent
@@ -192,6 +411,55 @@ async def publish_latest_news(limit: int = PUBLISH_LIMIT) -> int:
         await client.disconnect()
 
 
+async def publish_from_outbox(limit: int = PUBLISH_LIMIT, consumer: str | None = None) -> int:
+    """Опубликовать новости из outbox (Redis Stream) через consumer group.
+        Сколько сообщений отправлено.
+    """
+    consumer = consumer or default_consumer_name()
+    count = settings.digest_max_items if settings.publish_mode == "digest" else limit
+    entries = read_outbox(consumer, count)
+    if not entries:
+        logger.info("Outbox пуст")
+        return 0
+
+    redis_client = get_redis_client()
+    entry_ids: dict[tuple[str, str], str] = {}
+    candidates: dict[str, list[NewsItem]] = {}
+    for entry_id, channel_id, item in entries:
+        url = str(item.url) if item.url else ""
+        # Запись могла быть отправлена другим потребителем — просто подтверждаем её
+        if url and redis_client.sismember(published_urls_key(channel_id), url):
+            pipe = redis_client.pipeline(transaction=True)
+            ack_outbox_entry(pipe, entry_id, channel_id, url)
+            pipe.execute()
+            continue
+        entry_ids[(channel_id, item.id)] = entry_id
+        candidates.setdefault(channel_id, []).append(item)
+
+    return await publish_to_channels(candidates, count, entry_ids)
+
+
+async def publish_latest_news(limit: int = PUBLISH_LIMIT, lock: LeaseLock | None = None) -> int:
+    """Собрать и опубликовать свежие новости во все подписанные Telegram-каналы.
+        limit — максимум новостей на канал за один запуск.
+        lock — удерживаемая блокировка публикации (fencing для записи истории).
+        Сколько сообщений отправлено.
+    """
+    candidates, tg_marks = collect_candidates()
+
+    if settings.publish_outbox_enabled:
+        for channel_id, batch in candidates.items():
+            enqueue_news(batch.to_items(), channel_id)
+        # Новости уже в outbox: Telegram-каналы можно считать прочитанными
+        commit_tg_marks(tg_marks)
+        return await publish_from_outbox(limit)
+
+    sent = await publish_to_channels(candidates, limit, lock=lock)
+    # Если публикация упала, метки не сдвигаются и сообщения каналов будут прочитаны повторно
+    commit_tg_marks(tg_marks)
+    return sent
+
+
 if __name__ == "__main__":
     logging.basicConfig(level=logging.INFO)
     count = asyncio.run(publish_latest_news())
@@ -1,4 +1,4 @@
 """Точка входа для запуска Celery-worker"""
 from app.tasks import celery_app
 
-#  celery -A celery_worker.celery_app worker -l INFO -P solo (Команда для запуска)
\ No newline at end of file
+#  celery -A celery_worker.celery_app worker -l INFO -P solo (Команда для запуска; очереди — из настроек)
\ No newline at end of file
@@ -1,6 +1,5 @@
 """Наша точка входа"""
 from fastapi import FastAPI
-import uvicorn
 from app.config import settings
 from app.api import api_router
 
@@ -24,4 +23,7 @@ app.include_router(api_router)
 
 
 if __name__ == '__main__':
+    # uvicorn нужен только при запуске файла напрямую: при uvicorn main:app он уже загружен
+    import uvicorn
+
     uvicorn.run("main:app", host="127.0.0.1", port=8000)
\ No newline at end of file
@@ -0,0 +1,16 @@
+"""Общие фикстуры тестов: Redis в памяти процесса (fakeredis) вместо сервера."""
+import pytest
+
+from app.config import settings
+from app.redis_client import FAKE_REDIS_SCHEME, get_redis_client
+
+
+@pytest.fixture(autouse=True)
+def redis_client(monkeypatch):
+    """Каждый тест работает с пустым fakeredis."""
+    monkeypatch.setattr(settings, "redis_url", FAKE_REDIS_SCHEME)
+    client = get_redis_client()
+    client.flushall()
+    yield client
+    client.flushall()
+
@@ -0,0 +1,11 @@
+"""Вспомогательные функции тестов."""
+from app.schemas import NewsItem
+
+
+def make_news(number: int, source: str = "habr", title: str | None = None) -> NewsItem:
+    return NewsItem(
+        id=f"news-{number}",
+        title=title or f"Python news {number}",
+        url=f"https://example.com/news/{number}/",
+        source=source,
+    )
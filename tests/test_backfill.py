@@ -0,0 +1,48 @@
+from app.batch import NewsBatch
+from app.news_parser.backfill import (
+    BACKFILL_BACKLOG_ADDED_KEY,
+    BACKFILL_BACKLOG_KEY,
+    load_backfill_backlog,
+    store_backfill_backlog,
+)
+from app.telegram.publisher import record_published
+
+from tests.helpers import make_news
+
+
+def backlog_batch(*numbers: int) -> NewsBatch:
+    batch = NewsBatch()
+    for number in numbers:
+        item = make_news(number)
+        batch.append(item.id, item.title, str(item.url), None, item.source, None, None)
+    return batch
+
+
+def test_entries_expire_individually(redis_client):
+    store_backfill_backlog(backlog_batch(1, 2))
+    redis_client.zadd(BACKFILL_BACKLOG_ADDED_KEY, {"news-1": 0}, xx=True)
+
+    # Новая находка не продлевает ожидание старых записей
+    store_backfill_backlog(backlog_batch(3))
+
+    assert sorted(load_backfill_backlog().ids) == ["news-2", "news-3"]
+    assert redis_client.hlen(BACKFILL_BACKLOG_KEY) == 2
+    assert redis_client.ttl(BACKFILL_BACKLOG_KEY) == -1
+
+
+def test_refound_entry_keeps_first_discovery_time(redis_client):
+    store_backfill_backlog(backlog_batch(1))
+    added_at = redis_client.zscore(BACKFILL_BACKLOG_ADDED_KEY, "news-1")
+
+    store_backfill_backlog(backlog_batch(1))
+
+    assert redis_client.zscore(BACKFILL_BACKLOG_ADDED_KEY, "news-1") == added_at
+
+
+def test_published_entry_leaves_backlog(redis_client):
+    store_backfill_backlog(backlog_batch(1, 2))
+
+    record_published(redis_client, make_news(1), "@main")
+
+    assert load_backfill_backlog().ids == ["news-2"]
+    assert redis_client.zrange(BACKFILL_BACKLOG_ADDED_KEY, 0, -1) == ["news-2"]
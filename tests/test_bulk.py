@@ -0,0 +1,124 @@
+import pytest
+from fastapi.testclient import TestClient
+
+from app.bulk import BulkImportRejected, bulk_import, keyword_dedupe_key, source_dedupe_key
+from app.config import settings
+from app.keys import KEYWORDS_KEY
+from app.lists import load_list
+from app.news_parser import SOURCES_KEY
+from app.schemas import Keywords, Source
+
+
+def import_keywords(body: str, fmt: str = "csv", mode: str = "append", dry_run: bool = False) -> dict:
+    return bulk_import(KEYWORDS_KEY, body.encode(), fmt, Keywords, keyword_dedupe_key, mode, dry_run)
+
+
+@pytest.fixture
+def api():
+    from main import app
+
+    return TestClient(app)
+
+
+def test_csv_import_reports_errors_and_duplicates_by_file_row():
+    report = import_keywords("word,weight\npython,2\nPython,1\nai,-5\nrust,\n")
+
+    assert report["imported"] == 2
+    assert report["duplicate_rows"] == [3]
+    assert [error["row"] for error in report["errors"]] == [4]
+    assert "weight" in report["errors"][0]["error"]
+    assert [(x["id"], x["word"], x["weight"]) for x in load_list(KEYWORDS_KEY)] == [
+        (1, "python", 2.0),
+        (2, "rust", 1.0),
+    ]
+
+
+def test_append_skips_existing_and_continues_ids():
+    import_keywords("word\npython\n")
+
+    report = import_keywords('{"word": "PYTHON"}\n{"word": "go"}\n', fmt="ndjson")
+
+    assert report["duplicates"] == 1
+    assert [(x["id"], x["word"]) for x in load_list(KEYWORDS_KEY)] == [(1, "python"), (2, "go")]
+
+
+def test_sources_dedupe_by_type_and_url():
+    body = "type,name,url\nsite,Habr,https://habr.com/\ntg,Habr TG,https://habr.com/\nsite,Copy,HTTPS://HABR.COM/\n"
+
+    report = bulk_import(SOURCES_KEY, body.encode(), "csv", Source, source_dedupe_key)
+
+    assert report["imported"] == 2
+    assert report["duplicate_rows"] == [4]
+
+
+def test_replace_with_invalid_rows_keeps_existing_list():
+    import_keywords("word\npython\nai\n")
+
+    # CSV, по ошибке отправленный как NDJSON: все строки — ошибки разбора
+    with pytest.raises(BulkImportRejected) as exc_info:
+        import_keywords("word\nrust\n", fmt="ndjson", mode="replace")
+
+    assert exc_info.value.report["error_count"] == 2
+    assert [x["word"] for x in load_list(KEYWORDS_KEY)] == ["python", "ai"]
+
+
+def test_replace_with_empty_upload_is_rejected():
+    import_keywords("word\npython\n")
+
+    with pytest.raises(BulkImportRejected):
+        import_keywords("word\n\n", mode="replace")
+
+    assert [x["word"] for x in load_list(KEYWORDS_KEY)] == ["python"]
+
+
+def test_replace_swaps_whole_list():
+    import_keywords("word\npython\nai\n")
+
+    report = import_keywords("word\nrust\ngo\n", mode="replace")
+
+    assert report["imported"] == 2
+    assert [(x["id"], x["word"]) for x in load_list(KEYWORDS_KEY)] == [(1, "rust"), (2, "go")]
+
+
+def test_dry_run_does_not_write():
+    report = import_keywords("word\npython\n", dry_run=True)
+
+    assert report["imported"] == 1
+    assert load_list(KEYWORDS_KEY) == []
+
+
+def test_api_replace_rejection_returns_report(api):
+    api.post("/api/keywords/import?format=csv", content="word\npython\n")
+
+    response = api.post("/api/keywords/import?format=ndjson&mode=replace", content="word\nrust\n")
+
+    assert response.status_code == 422
+    assert response.json()["detail"]["error_count"] == 2
+    assert [x["word"] for x in api.get("/api/keywords/").json()] == ["python"]
+
+
+def test_api_rejects_oversized_upload(api, monkeypatch):
+    monkeypatch.setattr(settings, "bulk_import_max_bytes", 64)
+
+    declared = api.post("/api/keywords/import?format=ndjson", content='{"word": "x"}\n' * 10)
+
+    def chunks():
+        for _ in range(10):
+            yield b'{"word": "x"}\n'
+
+    streamed = api.post("/api/keywords/import?format=ndjson", content=chunks())
+
+    assert declared.status_code == 413
+    assert streamed.status_code == 413
+    assert load_list(KEYWORDS_KEY) == []
+
+
+def test_api_csv_export_round_trip(api):
+    api.post("/api/keywords/import?format=csv", content="word,weight\npython,2.5\nai,1\n")
+
+    exported = api.get("/api/keywords/export?format=csv")
+    assert exported.status_code == 200
+
+    response = api.post("/api/keywords/import?format=csv&mode=replace", content=exported.content)
+    assert response.json()["imported"] == 2
+    assert [(x["word"], x["weight"]) for x in api.get("/api/keywords/").json()] == [("python", 2.5), ("ai", 1.0)]
@@ -0,0 +1,98 @@
+import pytest
+
+from app.circuit_breaker import (
+    STATE_CLOSED,
+    STATE_HALF_OPEN,
+    STATE_OPEN,
+    CircuitBreaker,
+    breaker_states,
+    probe_ttl,
+)
+from app.config import settings
+
+
+@pytest.fixture(autouse=True)
+def breaker_settings(monkeypatch):
+    monkeypatch.setattr(settings, "breaker_failure_threshold", 3)
+    monkeypatch.setattr(settings, "breaker_open_seconds", 60)
+    monkeypatch.setattr(settings, "breaker_max_open_seconds", 1800)
+
+
+def open_breaker(name: str = "habr") -> CircuitBreaker:
+    breaker = CircuitBreaker(name)
+    for _ in range(settings.breaker_failure_threshold):
+        breaker.record_failure("timeout")
+    return breaker
+
+
+def expire_pause(breaker: CircuitBreaker) -> None:
+    breaker.client.hset(breaker.key, "open_until", 0)
+
+
+def test_opens_after_threshold_failures(redis_client):
+    breaker = CircuitBreaker("habr")
+    breaker.record_failure("timeout")
+    breaker.record_failure("timeout")
+    assert breaker.allow_request()
+
+    breaker.record_failure("timeout")
+    assert redis_client.hget(breaker.key, "state") == STATE_OPEN
+    assert not breaker.allow_request()
+
+
+def test_half_open_allows_a_single_probe(redis_client):
+    breaker = open_breaker()
+    expire_pause(breaker)
+
+    assert breaker.allow_request()
+    assert redis_client.hget(breaker.key, "state") == STATE_HALF_OPEN
+    # Пока проба идёт, другие воркеры источник не запрашивают
+    assert not CircuitBreaker("habr").allow_request()
+    assert 0 < redis_client.ttl(breaker.probe_key) <= probe_ttl()
+
+
+def test_successful_probe_closes_breaker(redis_client):
+    breaker = open_breaker()
+    expire_pause(breaker)
+    assert breaker.allow_request()
+
+    breaker.record_success()
+
+    assert redis_client.hgetall(breaker.key)["state"] == STATE_CLOSED
+    assert redis_client.exists(breaker.probe_key) == 0
+    assert CircuitBreaker("habr").allow_request()
+
+
+def test_failed_probe_reopens_with_doubled_pause(redis_client):
+    breaker = open_breaker()
+    expire_pause(breaker)
+    assert breaker.allow_request()
+
+    breaker.record_failure("timeout")
+
+    state = redis_client.hgetall(breaker.key)
+    assert state["state"] == STATE_OPEN
+    assert state["open_count"] == "2"
+    assert breaker_states()["habr"]["retry_in"] > settings.breaker_open_seconds
+
+
+def test_late_failure_does_not_extend_open_breaker(redis_client):
+    breaker = open_breaker()
+    before = redis_client.hgetall(breaker.key)
+
+    # Запрос, начатый до открытия, завершился ошибкой уже после него
+    breaker.record_failure("late timeout")
+
+    after = redis_client.hgetall(breaker.key)
+    assert after["open_until"] == before["open_until"]
+    assert after["open_count"] == before["open_count"]
+
+
+def test_probe_ttl_covers_retries_and_backoff(monkeypatch):
+    monkeypatch.setattr(settings, "fetch_timeout", 10.0)
+    monkeypatch.setattr(settings, "fetch_retries", 3)
+    monkeypatch.setattr(settings, "fetch_retry_backoff", 0.5)
+
+    # 4 попытки по 10 с + паузы 0.5 + 1 + 2
+    assert probe_ttl() == 44
+
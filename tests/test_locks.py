@@ -0,0 +1,110 @@
+import threading
+import time
+
+import pytest
+
+from app.keys import PUBLISHED_POSTS_KEY
+from app.locks import LeaseLock, LockBusy, LockLost, single_flight
+from app.telegram.publisher import published_urls_key, record_published
+
+from tests.helpers import make_news
+
+
+def test_lease_lock_is_exclusive_and_fenced():
+    first = LeaseLock("job", ttl_seconds=10)
+    second = LeaseLock("job", ttl_seconds=10)
+
+    assert first.acquire()
+    first_token = first.token
+    assert not second.acquire()
+
+    first.release()
+    assert second.acquire()
+    # Новый захват получает больший fencing-токен, старый владелец не проходит проверку
+    assert int(second.token) > int(first_token)
+    assert not first.is_owned()
+    assert second.is_owned()
+
+
+def test_single_flight_lease_outlives_ttl():
+    calls: list[int] = []
+
+    def slow() -> dict:
+        calls.append(1)
+        time.sleep(2.5)
+        return {"calls": len(calls)}
+
+    results: list[dict] = []
+    owner = threading.Thread(target=lambda: results.append(single_flight("slow", slow, ttl_seconds=1, wait_timeout=10)))
+    owner.start()
+    time.sleep(0.3)
+
+    # TTL аренды (1 с) меньше времени работы: без продления второй вызов запустил бы операцию повторно
+    results.append(single_flight("slow", slow, ttl_seconds=1, wait_timeout=10))
+    owner.join()
+
+    assert calls == [1]
+    assert results == [{"calls": 1}, {"calls": 1}]
+
+
+def test_single_flight_waiter_times_out_while_owner_runs():
+    started = threading.Event()
+
+    def slow() -> int:
+        started.set()
+        time.sleep(1)
+        return 1
+
+    owner = threading.Thread(target=lambda: single_flight("busy", slow, ttl_seconds=5, wait_timeout=5))
+    owner.start()
+    started.wait()
+
+    with pytest.raises(LockBusy):
+        single_flight("busy", slow, ttl_seconds=5, wait_timeout=0.2)
+    owner.join()
+
+
+def test_heartbeat_extends_lease():
+    lock = LeaseLock("beat", ttl_seconds=0.3)
+    assert lock.acquire()
+
+    with lock.heartbeat():
+        time.sleep(0.8)
+        assert lock.is_owned()
+    lock.release()
+
+
+def test_heartbeat_stops_when_lease_is_lost(redis_client):
+    lock = LeaseLock("lost", ttl_seconds=0.3)
+    assert lock.acquire()
+
+    with lock.heartbeat():
+        redis_client.delete(lock.key)
+        time.sleep(0.4)
+        # Потерянную аренду heartbeat не восстанавливает
+        assert redis_client.get(lock.key) is None
+    assert not lock.is_owned()
+
+
+def test_record_published_writes_while_fence_is_held(redis_client):
+    lock = LeaseLock("publish", ttl_seconds=10)
+    assert lock.acquire()
+
+    record_published(redis_client, make_news(1), "@main", fence=lock)
+
+    assert redis_client.llen(PUBLISHED_POSTS_KEY) == 1
+    assert redis_client.sismember(published_urls_key("@main"), "https://example.com/news/1/")
+
+
+def test_record_published_rejects_stale_fence(redis_client):
+    stale = LeaseLock("publish", ttl_seconds=10)
+    assert stale.acquire()
+    # Аренда истекла, блокировку захватил другой публикатор
+    redis_client.delete(stale.key)
+    assert LeaseLock("publish", ttl_seconds=10).acquire()
+
+    with pytest.raises(LockLost):
+        record_published(redis_client, make_news(1), "@main", fence=stale)
+
+    assert redis_client.llen(PUBLISHED_POSTS_KEY) == 0
+    assert not redis_client.sismember(published_urls_key("@main"), "https://example.com/news/1/")
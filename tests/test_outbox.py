@@ -0,0 +1,35 @@
+from app import outbox
+from app.outbox import OUTBOX_QUEUED_URLS_KEY, OUTBOX_STREAM_KEY, enqueue_news, read_outbox
+
+from tests.helpers import make_news
+
+
+def test_enqueue_skips_urls_already_queued(redis_client):
+    assert enqueue_news([make_news(1), make_news(2)], "@main") == 2
+    assert enqueue_news([make_news(2), make_news(3)], "@main") == 1
+
+    assert redis_client.xlen(OUTBOX_STREAM_KEY) == 3
+    # Тот же URL для другого канала — отдельная запись
+    assert enqueue_news([make_news(1)], "@other") == 1
+
+
+def test_enqueue_writes_mark_and_entry_together(redis_client):
+    enqueue_news([make_news(1)], "@main")
+
+    entries = read_outbox("consumer", 10)
+    assert [(channel, item.id) for _entry_id, channel, item in entries] == [("@main", "news-1")]
+    assert redis_client.sismember(OUTBOX_QUEUED_URLS_KEY, "@main|https://example.com/news/1/")
+
+
+def test_trimmed_entries_release_their_urls(redis_client, monkeypatch):
+    monkeypatch.setattr(outbox, "OUTBOX_MAXLEN", 2)
+
+    assert enqueue_news([make_news(n) for n in range(1, 5)], "@main") == 4
+
+    assert redis_client.xlen(OUTBOX_STREAM_KEY) == 2
+    assert redis_client.smembers(OUTBOX_QUEUED_URLS_KEY) == {
+        "@main|https://example.com/news/3/",
+        "@main|https://example.com/news/4/",
+    }
+    # Вытесненная новость снова может попасть в очередь
+    assert enqueue_news([make_news(1)], "@main") == 1
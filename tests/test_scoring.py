@@ -0,0 +1,48 @@
+from datetime import datetime, timezone
+
+import pytest
+
+from app import scoring
+from app.scoring import RelevanceScorer
+
+from tests.helpers import make_news
+
+
+def news_with_keywords(keywords: list[list[str]]):
+    items = []
+    for number, item_keywords in enumerate(keywords):
+        item = make_news(number)
+        item.keywords = item_keywords
+        items.append(item)
+    return items
+
+
+@pytest.mark.parametrize("use_numpy", [True, False])
+def test_top_k_breaks_ties_by_input_order(monkeypatch, use_numpy):
+    if not use_numpy:
+        monkeypatch.setattr(scoring, "np", None)
+    elif scoring.np is None:
+        pytest.skip("numpy не установлен")
+
+    # Оценки 1, 2, 1, 2, 1, 2, 1: на границе k=4 равны несколько новостей с оценкой 1
+    items = news_with_keywords([[], ["ai"], [], ["ai"], [], ["ai"], []])
+    scorer = RelevanceScorer(weights={"ai": 1.0}, half_life_hours=0)
+
+    top = scorer.top_k(items, 4, now=datetime.now(timezone.utc))
+
+    assert [item.id for item in top] == ["news-1", "news-3", "news-5", "news-0"]
+
+
+def test_numpy_and_fallback_agree(monkeypatch):
+    if scoring.np is None:
+        pytest.skip("numpy не установлен")
+
+    items = news_with_keywords([["ai"] if n % 3 else [] for n in range(30)])
+    scorer = RelevanceScorer(weights={"ai": 2.0}, half_life_hours=0)
+    now = datetime.now(timezone.utc)
+
+    expected = [[item.id for item in scorer.top_k(items, k, now=now)] for k in range(1, 31)]
+    monkeypatch.setattr(scoring, "np", None)
+    fallback = [[item.id for item in scorer.top_k(items, k, now=now)] for k in range(1, 31)]
+
+    assert expected == fallback
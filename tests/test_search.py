@@ -0,0 +1,32 @@
+from app.config import settings
+from app.news_store import query_news, save_news
+from app.search import SEARCH_DOC_ORDER_KEY, SEARCH_STATS_KEY, index_news, search_news
+
+from tests.helpers import make_news
+
+
+def test_bm25_ranks_matching_documents():
+    index_news([
+        make_news(1, title="Python release notes"),
+        make_news(2, title="Rust and Python interop with Python bindings"),
+        make_news(3, title="Weather forecast"),
+    ])
+
+    assert {item.id for item in search_news("python")} == {"news-1", "news-2"}
+    assert [item.id for item in search_news("rust python")][0] == "news-2"
+    assert search_news("football") == []
+
+
+def test_index_is_retained_beyond_news_store(redis_client, monkeypatch):
+    monkeypatch.setattr(settings, "news_latest_limit", 3)
+    monkeypatch.setattr(settings, "search_index_limit", 5)
+
+    for number in range(1, 8):
+        items = [make_news(number, title=f"Python digest {number}")]
+        index_news(items)
+        save_news(items)
+
+    assert len(query_news(limit=10)) == 3
+    assert sorted(item.id for item in search_news("python", limit=10)) == [f"news-{n}" for n in range(3, 8)]
+    assert redis_client.zcard(SEARCH_DOC_ORDER_KEY) == 5
+    assert redis_client.hget(SEARCH_STATS_KEY, "docs") == "5"